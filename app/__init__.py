@@ -1,15 +1,16 @@
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_cors import CORS # Import CORS
 from app.config import Config
+from app.token_cache import VerifiedTokenCache
+from app.routing import RoutingSession, init_routing, mark_write_after_commit
+from sqlalchemy import event
 import os # Import the os module
-from dotenv import load_dotenv
 
 # Global instances
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession}) # Routes read-only requests to replicas
+event.listen(db.session, 'after_commit', mark_write_after_commit)
 login_manager = LoginManager()
 
 def create_app():
@@ -25,20 +26,64 @@ def create_app():
     app.config['JWT_EXPIRATION_SECONDS'] = int(os.environ.get("JWT_EXPIRATION_SECONDS", 86400))
 
 
-    CORS(app) # Enable CORS for all routes and origins
+    CORS(app, expose_headers=['X-Next-Cursor', 'Link', 'ETag', 'Last-Modified', 'X-Last-Write']) # Enable CORS for all routes and origins
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    from app.engine import configure_engines
+    configure_engines(app, db)
+    # `flask db` imports Flask-Migrate/Alembic only when it runs
+    from app.migrate_cli import LazyMigrateGroup
+    app.cli.add_command(LazyMigrateGroup(app, db))
     login_manager.init_app(app)
 
-    from app.models import user, project, task, role
-    from app.routes import project_routes, task_routes, user_routes, role_routes, auth_routes # Import auth_routes
+    # Per-app cache of verified JWT payloads used by role_required
+    app.extensions['token_cache'] = VerifiedTokenCache(
+        maxsize=app.config['JWT_CACHE_SIZE'],
+        max_ttl=app.config['JWT_CACHE_TTL_SECONDS']
+    )
+    # Clients that just wrote read from the primary until replicas catch up
+    init_routing(app)
+    # Google ID-token verifier with a process-wide certificate cache
+    from app.google_verify import create_verifier
+    app.extensions['google_verifier'] = create_verifier(app)
+    if app.config['EAGER_INIT']:
+        app.extensions['google_verifier'].warm_up() # Otherwise imported on the first login
+    # Pub/sub backend that fans write events out to GET /events subscribers
+    from app.events import create_backend
+    app.extensions['events'] = create_backend(app)
+
+    from app.models import user, project, task, role, resource_version, change_log, job
+    from app import versioning, changelog # Registers the session write hooks
+    from app import search # Attaches the full-text index DDL to the task and project tables
+    from app.routes import project_routes, task_routes, user_routes, role_routes, auth_routes, sync_routes, event_routes, search_routes, job_routes # Import auth_routes
 
     app.register_blueprint(project_routes.project_bp)
     app.register_blueprint(task_routes.bp)
     app.register_blueprint(user_routes.bp)
     app.register_blueprint(role_routes.bp)
     app.register_blueprint(auth_routes.auth_bp) # Register the auth_bp blueprint
+    app.register_blueprint(sync_routes.sync_bp)
+    app.register_blueprint(event_routes.event_bp)
+    app.register_blueprint(search_routes.search_bp)
+    app.register_blueprint(job_routes.job_bp)
+
+    # Worker threads for queued import/export jobs (JOBS_MODE)
+    from app.jobs import init_jobs
+    init_jobs(app)
+
+    # Opt-in per-endpoint timings and GET /metrics (METRICS_ENABLED)
+    from app.metrics import init_metrics
+    init_metrics(app, db)
+    # Per-endpoint concurrency and rate limits (ADMISSION_ENABLED); after metrics so shed requests are counted
+    from app.admission import init_admission
+    init_admission(app)
+    # gzip/brotli for large responses; registered after metrics so its time is measured
+    from app.compression import init_compression
+    init_compression(app)
+
+    # Seed the default roles and cache the role table for the auth path
+    from app.roles import init_roles
+    init_roles(app)
 
     @app.route('/')
     def index():
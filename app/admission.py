@@ -0,0 +1,138 @@
+# app/admission.py
+"""
+Admission control (ADMISSION_ENABLED=true): sheds excess load with a fast
+error instead of letting it queue behind the worker threads.
+
+ADMISSION_LIMITS maps endpoint names to limits:
+
+  concurrency  requests of the endpoint in progress at once (all users);
+               one more gets 503 with Retry-After ADMISSION_RETRY_AFTER_SECONDS
+  rate, burst  token bucket per caller for the endpoint: `rate` requests/s
+               sustained, `burst` at once; beyond it, 429 with Retry-After
+               set to when the next token is due
+
+ADMISSION_USER_RATE / ADMISSION_USER_BURST add one bucket per caller across
+all endpoints. On views behind role_required, authenticate() charges the
+user id from the app token once it is verified, or the client address if
+the token is missing or rejected. Every other request, such as POST
+/auth/google, is charged to the client address up front, whatever headers
+or parameters it carries. The native routes of the ASGI mode (app/asgi.py)
+run the same hooks; their concurrency limit counts coroutines rather than
+threads.
+
+Counters and buckets live in a store named by ADMISSION_STORE. LocalStore
+keeps them in this process, so with several gunicorn workers each applies
+the limits on its own; a shared store (e.g. Redis) with the same take(),
+acquire() and release() methods applies them across workers.
+"""
+import math
+import threading
+import time
+
+from flask import current_app, g, jsonify, request
+from werkzeug.utils import import_string
+
+
+class LocalStore:
+    """In-process token buckets and in-flight counters."""
+
+    SWEEP_EVERY = 1024 # take() calls between sweeps of idle buckets
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._buckets = {} # key -> (tokens, updated, seconds to refill completely)
+        self._in_flight = {}
+        self._takes = 0
+
+    def take(self, key, rate, burst):
+        """Takes one token from bucket `key`. Returns 0 if granted, else seconds until a token is due."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, 0))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now, (burst - tokens + 1) / rate)
+                wait = 0
+            else:
+                self._buckets[key] = (tokens, now, (burst - tokens) / rate)
+                wait = (1 - tokens) / rate
+            self._takes += 1
+            if self._takes % self.SWEEP_EVERY == 0:
+                # Buckets that have refilled completely behave like new ones; drop them
+                self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < v[2]}
+        return wait
+
+    def acquire(self, key, limit):
+        """Reserves one of `limit` slots for `key`; False if they are all taken."""
+        with self._lock:
+            in_flight = self._in_flight.get(key, 0)
+            if in_flight >= limit:
+                return False
+            self._in_flight[key] = in_flight + 1
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._in_flight[key] -= 1
+
+
+def get_admission_store():
+    return current_app.extensions['admission']
+
+
+def _rejected(status, message, retry_after):
+    response = jsonify({'error': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def admit_caller(caller):
+    """
+    Applies the rate limits for `caller` to the current request. Returns
+    None if it may proceed, otherwise the 429 response.
+    """
+    config = current_app.config
+    if not config.get('ADMISSION_ENABLED') or request.method == 'OPTIONS':
+        return None
+    store = get_admission_store()
+    buckets = []
+    limits = config['ADMISSION_LIMITS'].get(request.endpoint) or {}
+    if limits.get('rate'):
+        buckets.append((f'rate:{request.endpoint}:{caller}', limits['rate'], limits.get('burst') or limits['rate']))
+    if config.get('ADMISSION_USER_RATE'):
+        rate = config['ADMISSION_USER_RATE']
+        buckets.append((f'rate:*:{caller}', rate, config.get('ADMISSION_USER_BURST') or rate))
+    for key, rate, burst in buckets:
+        wait = store.take(key, rate, burst)
+        if wait:
+            return _rejected(429, 'Too many requests. Please retry later.', wait)
+    return None
+
+
+def _admit_request():
+    limit = (current_app.config['ADMISSION_LIMITS'].get(request.endpoint) or {}).get('concurrency')
+    if limit and request.method != 'OPTIONS':
+        key = f'concurrency:{request.endpoint}'
+        if not get_admission_store().acquire(key, limit):
+            return _rejected(503, 'Server is busy. Please retry later.', current_app.config['ADMISSION_RETRY_AFTER_SECONDS'])
+        g.admission_slot = key
+    if not getattr(current_app.view_functions.get(request.endpoint), 'authenticates', False):
+        return admit_caller(f'addr:{request.remote_addr}')
+    return None
+
+
+def _release_slot(exc):
+    key = g.pop('admission_slot', None)
+    if key is not None:
+        get_admission_store().release(key)
+
+
+def init_admission(app):
+    """Installs the request hooks when ADMISSION_ENABLED is set."""
+    if not app.config.get('ADMISSION_ENABLED'):
+        return
+    store_class = import_string(app.config.get('ADMISSION_STORE', 'app.admission.LocalStore'))
+    app.extensions['admission'] = store_class(app)
+    app.before_request(_admit_request)
+    app.teardown_request(_release_slot)
@@ -0,0 +1,241 @@
+# app/asgi.py
+"""
+ASGI deployment mode: `uvicorn asgi:application` (see asgi.py at the repo root).
+
+The routes that hold a connection open or read a lot of rows - the /events
+SSE stream and the task listing - are served natively on the event loop
+through the SQLAlchemy asyncio engine, so an open stream or long-poll costs
+a coroutine instead of a server thread, and one process can keep thousands
+of them connected. This is about connections, not speed: paging
+/tasks/ is no faster than under the sync server (benchmarks/asgi_load.py
+measured it slightly slower). Every other request is handed to the Flask
+app unchanged through asgiref's WSGI adapter, which runs it in a thread
+pool.
+
+The native routes run inside a Flask request context built from the ASGI
+scope and through the app's before_request, after_request and teardown
+hooks, so admission control and metrics apply to them as to every other
+route, and they share authentication, query-string parsing, validators
+and serializers with their sync counterparts and answer identically.
+authenticate() may query the database (token or role cache misses), so
+it runs in a worker thread (asyncio.to_thread copies the request context)
+rather than on the event loop.
+"""
+import asyncio
+import io
+import json
+import sys
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import Response, current_app, jsonify, make_response, request
+
+from app.async_db import create_async_db_engine, get_async_engine
+from app.events import event_matches, get_event_backend
+from app.metrics import instrument_engine
+from app.models.task import Task
+from app.pagination import parse_cursor, parse_limit, set_pagination_headers, split_page
+from app.routes.auth_routes import authenticate
+from app.routes.task_routes import task_list_filters
+from app.serializers import dumps, list_response, parse_layout, task_serializer
+from app.streaming import NDJSON_MIMETYPE, wants_stream
+from app.versioning import (collection_validators, is_not_modified, not_modified_response,
+                            resource_versions_select, set_validators)
+
+ALL_ROLES = ['Admin', 'Task Creator', 'Read Only']
+
+
+async def list_tasks():
+    """Async GET /tasks/; same parameters and responses as task_routes.list_tasks."""
+    error = await asyncio.to_thread(authenticate, ALL_ROLES)
+    if error is not None:
+        return make_response(error)
+    engine = get_async_engine()
+    async with engine.connect() as connection:
+        # Validators first and on every 200, streamed or not, as @conditional('task') does
+        versions = (await connection.execute(resource_versions_select(['task']))).all()
+        etag, last_modified = collection_validators('task', rows=versions)
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        try:
+            limit = parse_limit()
+            cursor = parse_cursor()
+            fields = task_serializer.parse_fields()
+            layout = parse_layout()
+            criteria = task_list_filters()
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        statement = task_serializer.select(fields).where(*criteria).order_by(Task.id)
+        stream = wants_stream()
+        if not stream:
+            if cursor is not None:
+                statement = statement.where(Task.id > cursor)
+            rows = (await connection.execute(statement.limit(limit + 1))).all()
+
+    if stream:
+        batch_size = current_app.config.get('STREAM_BATCH_SIZE', 1000)
+
+        async def generate():
+            async with engine.connect() as connection:
+                result = await connection.stream(statement.execution_options(yield_per=batch_size))
+                async for row in result:
+                    yield dumps(task_serializer.to_dict(row)) + '\n'
+
+        response = Response(generate(), mimetype=NDJSON_MIMETYPE, direct_passthrough=True)
+        return set_validators(response, etag, last_modified)
+
+    tasks, next_cursor = split_page(rows, limit)
+    response = list_response([task_serializer.to_dict(task) for task in tasks], fields, layout)
+    return set_validators(set_pagination_headers(response, next_cursor), etag, last_modified)
+
+
+async def stream_events():
+    """Async GET /events/; same stream as event_routes.stream_events."""
+    error = await asyncio.to_thread(authenticate, ALL_ROLES, allow_query_token=True)
+    if error is not None:
+        return make_response(error)
+    project_id = None
+    if 'project_id' in request.args:
+        project_id = request.args.get('project_id', type=int)
+        if project_id is None:
+            return make_response(jsonify({'error': 'project_id must be an integer.'}), 400)
+
+    keepalive = current_app.config.get('EVENTS_KEEPALIVE_SECONDS', 15)
+    subscription = get_event_backend().subscribe_async()
+
+    async def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                message = await subscription.get(timeout=keepalive)
+                if message is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                staged = json.loads(message)
+                if event_matches(staged, project_id):
+                    yield f"event: {staged['resource']}.{staged['action']}\ndata: {message}\n\n"
+        finally:
+            subscription.close()
+
+    response = Response(generate(), mimetype='text/event-stream', direct_passthrough=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+ASYNC_ROUTES = {
+    ('GET', '/tasks/'): list_tasks,
+    ('GET', '/events/'): stream_events,
+}
+
+
+def build_environ(scope):
+    """Minimal WSGI environ for `scope`; the native routes never read a request body."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def send_response(response, receive, send):
+    """
+    Sends a Flask response over ASGI. An async iterable body is streamed
+    until it ends or the client disconnects.
+    """
+    await send({
+        'type': 'http.response.start',
+        'status': response.status_code,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in response.headers.items()],
+    })
+    if not hasattr(response.response, '__aiter__'):
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+        return
+
+    async def stream():
+        async for chunk in response.response:
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    streamer = asyncio.ensure_future(stream())
+    watcher = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await asyncio.wait([streamer, watcher], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Cancelling the body generator runs its cleanup (closing cursors, subscriptions)
+        streamer.cancel()
+        watcher.cancel()
+        await asyncio.gather(streamer, watcher, return_exceptions=True)
+
+
+class AsgiApp:
+    """Serves ASYNC_ROUTES natively and hands everything else to the Flask app."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi_app = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        handler = ASYNC_ROUTES.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+        if handler is None:
+            await self.wsgi_app(scope, receive, send)
+            return
+        with self.flask_app.request_context(build_environ(scope)): # Runs the teardown hooks on exit, after the body is sent
+            try:
+                # before_request hooks (admission control, metrics); a response from one replaces the route's
+                response = self.flask_app.preprocess_request()
+                response = make_response(response) if response is not None else await handler()
+            except Exception as e:
+                self.flask_app.logger.error(f"Error in async route {scope['path']}: {e}", exc_info=True)
+                response = make_response(jsonify({"error": "Could not process request."}), 500)
+            response = self.flask_app.process_response(response) # after_request hooks, e.g. CORS
+            await send_response(response, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.flask_app.extensions['async_engine'].dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(flask_app=None):
+    if flask_app is None:
+        from app import create_app
+        flask_app = create_app()
+    flask_app.extensions['async_engine'] = engine = create_async_db_engine(flask_app)
+    if 'metrics' in flask_app.extensions:
+        instrument_engine(engine.sync_engine) # Counts the native routes' statements too
+    return AsgiApp(flask_app)
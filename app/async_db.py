@@ -0,0 +1,48 @@
+# app/async_db.py
+"""
+SQLAlchemy asyncio engine used by the native async routes in app/asgi.py.
+It points at the same database as the Flask-SQLAlchemy engine, through the
+async driver of the same backend (aiosqlite for SQLite, asyncpg for
+PostgreSQL), unless ASYNC_DATABASE_URI names one explicitly. aiosqlite or asyncpg is only
+needed when the app is served through app/asgi.py.
+"""
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import db
+from app.config import engine_options
+from app.engine import sqlite_pragma_listener
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def async_database_url(url):
+    """Swaps the driver of `url` for its async counterpart."""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f'No async driver configured for {url.get_backend_name()} databases.')
+    return url.set(drivername=driver)
+
+
+def create_async_db_engine(app):
+    url = app.config.get('ASYNC_DATABASE_URI')
+    if not url:
+        # Flask-SQLAlchemy has already resolved relative SQLite paths against the instance folder
+        with app.app_context():
+            url = async_database_url(db.engine.url)
+    url = make_url(url)
+    engine = create_async_engine(url, **engine_options(url))
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if engine.dialect.name == 'sqlite' and pragmas:
+        event.listen(engine.sync_engine, 'connect', sqlite_pragma_listener(pragmas))
+    return engine
+
+
+def get_async_engine():
+    return current_app.extensions['async_engine']
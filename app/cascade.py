@@ -0,0 +1,91 @@
+# app/cascade.py
+"""
+Deletes projects and users without loading the rows that reference them.
+
+Tasks, projects and jobs that point at a deleted project or user are kept
+and unassigned: their foreign key is set to NULL. The foreign keys are
+declared ON DELETE SET NULL, so the database does this for any row the
+application misses; the application still nulls them itself first, with
+one bulk UPDATE per dependent table, so the rows' versions and the change
+log (GET /sync, GET /events) record the change.
+
+delete_with_dependents() does all of it in one transaction. Past
+CASCADE_SYNC_MAX_ROWS dependents the DELETE routes queue a 'delete' job
+instead (app/jobs.py), which detaches JOBS_CHUNK_SIZE rows per transaction,
+so no write lock is held for long, and deletes the row itself last.
+"""
+from sqlalchemy import func, select, update
+
+from app import db
+from app.changelog import record_changes
+from app.models.job import Job
+from app.models.project import Project
+from app.models.task import Task
+from app.models.user import User
+
+MODELS = {'project': Project, 'user': User}
+
+# resource -> (model, foreign key column) of the rows that reference it
+DEPENDENTS = {
+    'project': [(Task, Task.project_id)],
+    'user': [(Task, Task.owner_id), (Project, Project.owner_id), (Job, Job.created_by)],
+}
+
+
+def count_dependents(resource, row_id):
+    return sum(db.session.scalar(select(func.count()).select_from(model).where(column == row_id))
+               for model, column in DEPENDENTS[resource])
+
+
+def _detach(resource, row_id, model, column, limit):
+    """Nulls `column` on up to `limit` rows (all if None) of `model`; returns how many."""
+    criterion = column == row_id
+    if limit is not None:
+        criterion = model.id.in_(select(model.id).where(criterion).order_by(model.id).limit(limit).scalar_subquery())
+    table = model.__table__.name
+    returning = (model.id, Task.project_id) if table == 'task' else (model.id,)
+    rows = db.session.execute(
+        update(model).where(criterion).values({column.key: None}).returning(*returning),
+        execution_options={'synchronize_session': False},
+    ).all()
+    if table == 'task':
+        # A task detached from a project is still announced to that project's subscribers
+        record_changes('task', [row.id for row in rows], 'upsert',
+                       project_ids={row.id: row_id if resource == 'project' else row.project_id for row in rows})
+    elif table == 'project':
+        record_changes('project', [row.id for row in rows], 'upsert', project_ids={row.id: row.id for row in rows})
+    return len(rows)
+
+
+def detach_dependents(resource, row_id, limit=None):
+    """
+    Sets the foreign keys that reference `row_id` to NULL, on at most `limit`
+    rows in total (all if None). Returns the number of rows changed. Doesn't
+    commit.
+    """
+    detached = 0
+    for model, column in DEPENDENTS[resource]:
+        remaining = None if limit is None else limit - detached
+        if remaining == 0:
+            break
+        detached += _detach(resource, row_id, model, column, remaining)
+    return detached
+
+
+def delete_row(resource, row_id):
+    """
+    Detaches whatever still references the row and deletes it, in the
+    current transaction. Returns False if the row no longer exists.
+    """
+    row = db.session.get(MODELS[resource], row_id)
+    if row is None:
+        return False
+    detach_dependents(resource, row_id)
+    db.session.delete(row) # Recorded in the change log by the after_flush hook
+    return True
+
+
+def delete_with_dependents(resource, row_id):
+    deleted = delete_row(resource, row_id)
+    db.session.commit()
+    return deleted
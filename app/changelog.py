@@ -0,0 +1,66 @@
+# app/changelog.py
+"""
+Populates the change_log table that backs GET /sync, and stages the matching
+events for GET /events.
+
+ORM writes (the create/update/delete routes) are recorded automatically by
+an after_flush hook. Bulk statements bypass the unit of work, so code that
+issues them calls record_changes() with the affected ids.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, func, insert
+
+from app import db
+from app.events import queue_event
+from app.models.change_log import ChangeLog
+
+SYNCED_TABLES = ('task', 'project', 'user')
+
+
+def record_changes(resource, ids, action, project_ids=None, session=None):
+    """
+    Appends one change_log row per id inside the current transaction and
+    stages an event for each. `project_ids` maps row id -> project id, used
+    by per-project event subscriptions.
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    session = session or db.session
+    project_ids = project_ids or {}
+    now = datetime.utcnow()
+    connection = session.connection()
+    statement = insert(ChangeLog.__table__)
+    if connection.dialect.name == 'postgresql':
+        statement = statement.values(txid=func.txid_current()) # Orders the /sync cursor by commit visibility
+    connection.execute(
+        statement,
+        [{'resource': resource, 'resource_id': row_id, 'action': action, 'changed_at': now} for row_id in ids]
+    )
+    for row_id in ids:
+        queue_event(session, resource, row_id, action, project_ids.get(row_id))
+
+
+def _project_id_of(obj):
+    if obj.__table__.name == 'task':
+        return obj.project_id
+    if obj.__table__.name == 'project':
+        return obj.id
+    return None
+
+
+@event.listens_for(db.session, 'after_flush')
+def _record_flushed_changes(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state, but new rows already have ids
+    changes = {}
+    for action, objects in (('upsert', session.new), ('upsert', session.dirty), ('delete', session.deleted)):
+        for obj in objects:
+            table = getattr(obj, '__table__', None)
+            if table is None or table.name not in SYNCED_TABLES:
+                continue
+            if objects is session.dirty and not session.is_modified(obj):
+                continue
+            changes.setdefault((table.name, action), {})[obj.id] = _project_id_of(obj)
+    for (resource, action), project_ids in changes.items():
+        record_changes(resource, project_ids, action, project_ids=project_ids, session=session)
@@ -0,0 +1,51 @@
+# app/compression.py
+"""
+Response compression negotiated from Accept-Encoding: brotli when the
+optional brotli package is installed and the client accepts `br`, gzip
+otherwise. Only complete (non-streamed) 200 responses of a compressible
+type and at least COMPRESS_MIN_BYTES long are compressed; small bodies
+are not worth the CPU. A compressed response's ETag is weak, as the same
+content is sent as different bytes per encoding.
+"""
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli # Optional: ~15-25% smaller than gzip on JSON at similar speed
+except ImportError:
+    brotli = None
+
+
+def _compress(response):
+    config = current_app.config
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESS_MIMETYPES']):
+        return response
+    body = response.get_data()
+    if len(body) < config['COMPRESS_MIN_BYTES']:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    available = ['br', 'gzip'] if brotli is not None else ['gzip']
+    encoding = request.accept_encodings.best_match(available)
+    if encoding == 'br':
+        body = brotli.compress(body, quality=config['COMPRESS_BROTLI_QUALITY'])
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=config['COMPRESS_GZIP_LEVEL'])
+    else:
+        return response
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # A strong ETag vouches for these exact bytes, which now differ per encoding;
+        # a weak one only for the content, so it still matches If-None-Match either way
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    if app.config.get('COMPRESS_ENABLED'):
+        app.after_request(_compress)
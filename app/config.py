@@ -1,7 +1,35 @@
-from dotenv import load_dotenv
+import json
 import os
 
-load_dotenv()  # load from .env file
+from flask.helpers import get_load_dotenv
+from sqlalchemy.engine import make_url
+
+if get_load_dotenv(): # FLASK_SKIP_DOTENV=1 skips the .env lookup where the environment is already set
+    from dotenv import load_dotenv
+    load_dotenv()  # load from .env file
+
+def engine_options(database_uri):
+    """
+    Production engine profile: pre-ping and recycle pooled connections, and
+    size the pool for file/server databases. In-memory SQLite uses a
+    per-thread singleton pool that takes no sizing options.
+    """
+    options = {
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE_SECONDS', 1800)),
+    }
+    url = make_url(database_uri)
+    if url.get_backend_name() != 'sqlite' or url.database not in (None, '', ':memory:'):
+        options['pool_size'] = int(os.environ.get('DB_POOL_SIZE', 10))
+        options['max_overflow'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+        options['pool_timeout'] = int(os.environ.get('DB_POOL_TIMEOUT_SECONDS', 30))
+    return options
+
+def replica_binds():
+    """Read replicas from DATABASE_REPLICA_URLS (comma separated) as replica_<n> binds."""
+    urls = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    return {f'replica_{index}': url for index, url in enumerate(urls)}
+
 class Config:
     # ... your existing configurations ...
     # SECRET_KEY = os.environ.get('SECRET_KEY') or 'your_fallback_flask_secret_key' # For Flask session, CSRF
@@ -11,7 +39,110 @@ class Config:
     # GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID') or "YOUR_GOOGLE_CLIENT_ID.apps.googleusercontent.com" # **REPLACE THIS**
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your-very-strong-jwt-secret-key-shhh' # **REPLACE THIS and keep it secret**
     JWT_EXPIRATION_SECONDS = int(os.environ.get('JWT_EXPIRATION_SECONDS', 3600 * 24)) # 24 hours default
+    # Google ID-token verification (see app/google_verify.py)
+    GOOGLE_CERT_SOURCE = os.environ.get('GOOGLE_CERT_SOURCE', 'app.google_verify.HttpCertSource') # Import path
+    GOOGLE_CERTS_DEFAULT_MAX_AGE = int(os.environ.get('GOOGLE_CERTS_DEFAULT_MAX_AGE', 300)) # When no Cache-Control
+    GOOGLE_HTTP_TIMEOUT_SECONDS = int(os.environ.get('GOOGLE_HTTP_TIMEOUT_SECONDS', 5))
+    # Broadcasts role-registry invalidations (import path, see app/roles.py): the default reaches this worker only,
+    # app.roles.PostgresInvalidationChannel reaches every worker through LISTEN/NOTIFY
+    ROLE_INVALIDATION_CHANNEL = os.environ.get('ROLE_INVALIDATION_CHANNEL', 'app.roles.LocalInvalidationChannel')
+    ROLE_INVALIDATION_PG_CHANNEL = os.environ.get('ROLE_INVALIDATION_PG_CHANNEL', 'task_tracker_roles') # NOTIFY channel name
+    # How long another worker can serve a renamed or deleted role when the channel doesn't reach it (the default channel never does)
+    ROLE_CACHE_TTL_SECONDS = int(os.environ.get('ROLE_CACHE_TTL_SECONDS', 60))
+    # Verified-token cache used by role_required (entries also expire with the token)
+    JWT_CACHE_SIZE = int(os.environ.get('JWT_CACHE_SIZE', 10000))
+    JWT_CACHE_TTL_SECONDS = int(os.environ.get('JWT_CACHE_TTL_SECONDS', 300))
 
     # ... your SQLAlchemy and other configs ...
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///task_tracker.db'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Async engine of the ASGI mode (app/asgi.py); defaults to the database above via its async driver
+    ASYNC_DATABASE_URI = os.environ.get('ASYNC_DATABASE_URI')
+    SQLALCHEMY_BINDS = replica_binds() # GET requests read from these (see app/routing.py)
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10)) # Read-your-writes window after a write (X-Last-Write, see app/routing.py)
+    # Applied to every new SQLite connection: WAL lets readers run alongside the
+    # single writer, NORMAL sync is safe under WAL, busy_timeout makes writers
+    # wait for the lock instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)), # Negative = KiB, so 64 MB
+        # SQLite ignores foreign keys (and their ON DELETE rules) unless enabled per connection
+        'foreign_keys': os.environ.get('SQLITE_FOREIGN_KEYS', 'ON'),
+    }
+
+    # --- Pagination for list endpoints ---
+    DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 100))
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 1000))
+    # Rows fetched per round-trip when a list endpoint streams NDJSON
+    STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 1000))
+
+    # --- Response compression (app/compression.py) ---
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024)) # Smaller bodies are sent as-is
+    COMPRESS_MIMETYPES = ['application/json', 'application/msgpack', 'text/plain', 'text/csv']
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5)) # 0-11; higher is smaller but slower
+
+    # --- Bulk task operations (POST /tasks/bulk) ---
+    TASK_BULK_BATCH_SIZE = int(os.environ.get('TASK_BULK_BATCH_SIZE', 1000)) # Rows per executemany statement
+    TASK_BULK_MAX_OPERATIONS = int(os.environ.get('TASK_BULK_MAX_OPERATIONS', 100000))
+
+    # --- Delta sync (GET /sync) ---
+    SYNC_MAX_CHANGES = int(os.environ.get('SYNC_MAX_CHANGES', 5000)) # Change-log entries per response
+
+    # --- Background import/export/delete jobs (app/jobs.py, /jobs) ---
+    JOBS_DIR = os.environ.get('JOBS_DIR') # Uploads and export files; defaults to <instance path>/jobs
+    JOBS_MODE = os.environ.get('JOBS_MODE', 'thread') # 'thread': workers in each app process; 'external': `flask jobs worker`
+    JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 2)) # Worker threads per process
+    JOBS_CHUNK_SIZE = int(os.environ.get('JOBS_CHUNK_SIZE', 5000)) # Rows per import transaction / export read
+    JOBS_MAX_ERRORS = int(os.environ.get('JOBS_MAX_ERRORS', 1000)) # Row errors kept in a job's error report
+    JOBS_MAX_UPLOAD_BYTES = int(os.environ.get('JOBS_MAX_UPLOAD_BYTES', 200 * 1024 * 1024))
+    JOBS_POLL_SECONDS = int(os.environ.get('JOBS_POLL_SECONDS', 5)) # Idle workers check for jobs queued by other processes
+    JOBS_STALE_SECONDS = int(os.environ.get('JOBS_STALE_SECONDS', 600)) # Running jobs without a heartbeat this long are failed
+    # DELETE /projects/<id> and /users/<id> queue a delete job past this many referencing rows (see app/cascade.py)
+    CASCADE_SYNC_MAX_ROWS = int(os.environ.get('CASCADE_SYNC_MAX_ROWS', 10000))
+
+    # --- Startup ---
+    # Warm everything create_app otherwise leaves to first use (the Google
+    # verification stack, the role table). gunicorn.conf.py turns it on with preload_app.
+    EAGER_INIT = os.environ.get('EAGER_INIT', 'false').lower() == 'true'
+
+    # --- Server-sent events (GET /events) ---
+    EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND', 'app.events.LocalBackend') # Import path; app.events.PostgresBackend reaches every worker
+    EVENTS_CHANNEL = os.environ.get('EVENTS_CHANNEL', 'task_tracker_events') # NOTIFY channel of PostgresBackend
+    EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 1000)) # Buffered events per subscriber
+    EVENTS_KEEPALIVE_SECONDS = int(os.environ.get('EVENTS_KEEPALIVE_SECONDS', 15))
+
+    # --- Admission control (app/admission.py) ---
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'false').lower() == 'true'
+    ADMISSION_STORE = os.environ.get('ADMISSION_STORE', 'app.admission.LocalStore') # Import path; shared stores apply limits across workers
+    # Per endpoint: concurrent requests (all callers, else 503) and a per-caller token bucket (else 429).
+    # Override with a JSON object in ADMISSION_LIMITS.
+    ADMISSION_LIMITS = json.loads(os.environ['ADMISSION_LIMITS']) if os.environ.get('ADMISSION_LIMITS') else {
+        'task_routes.list_tasks': {'concurrency': 8, 'rate': 20, 'burst': 40},
+        'project_routes.list_projects': {'concurrency': 8, 'rate': 20, 'burst': 40},
+        'project_routes.list_project_stats': {'concurrency': 4, 'rate': 5, 'burst': 10},
+        'search_routes.search_all': {'concurrency': 4, 'rate': 10, 'burst': 20},
+        'sync_routes.sync_changes': {'concurrency': 8, 'rate': 10, 'burst': 20},
+        'task_routes.bulk_tasks': {'concurrency': 2, 'rate': 2, 'burst': 5},
+        'job_routes.create_import': {'concurrency': 2, 'rate': 1, 'burst': 5},
+        'auth_bp.google_auth_handler': {'concurrency': 4, 'rate': 1, 'burst': 10}, # Per client address
+    }
+    ADMISSION_USER_RATE = float(os.environ.get('ADMISSION_USER_RATE', 0)) # Requests/s per caller over all endpoints; 0 = no limit
+    ADMISSION_USER_BURST = int(os.environ.get('ADMISSION_USER_BURST', 0)) # Defaults to the rate
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.environ.get('ADMISSION_RETRY_AFTER_SECONDS', 1)) # Sent with 503s
+
+    # --- Instrumentation (app/metrics.py, GET /metrics) ---
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') # Bearer token required from scrapers, if set
+    METRICS_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10] # Latency histogram bounds, seconds
+    METRICS_PROFILE_SAMPLE_RATE = float(os.environ.get('METRICS_PROFILE_SAMPLE_RATE', 0)) # Fraction of requests run under cProfile
+    METRICS_PROFILE_SLOW_MS = int(os.environ.get('METRICS_PROFILE_SLOW_MS', 500)) # Only profiles of slower requests are kept
+    METRICS_PROFILE_DIR = os.environ.get('METRICS_PROFILE_DIR', 'profiles')
+
+    # --- Project dashboard stats ---
+    TASK_DONE_STATUSES = ['completed'] # Tasks in these statuses never count as overdue
@@ -0,0 +1,52 @@
+# app/engine.py
+from sqlalchemy import event
+
+
+def sqlite_pragma_listener(pragmas):
+    """Returns a 'connect' listener that applies `pragmas` to each new connection."""
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def configure_engines(app, db):
+    """
+    Installs the SQLite tuning profile (Config.SQLITE_PRAGMAS) on every SQLite
+    engine of `db`. Other databases are left as configured by
+    SQLALCHEMY_ENGINE_OPTIONS.
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not pragmas:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', sqlite_pragma_listener(pragmas))
+
+
+def dispose_inherited_connections(app, db):
+    """
+    Drops pooled connections inherited from a parent process without closing
+    them (the parent still owns the sockets). Call in each worker after fork
+    when the app was created before forking, e.g. gunicorn's preload_app.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def begin_transaction(session):
+    """
+    Makes sure the session's SQLite connection is inside a real transaction
+    before savepoints are used. pysqlite only emits BEGIN ahead of DML, so
+    a SAVEPOINT issued first becomes the outermost transaction and releasing
+    it commits. Other databases need nothing.
+    """
+    connection = session.connection()
+    if connection.dialect.name == 'sqlite' and not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql('BEGIN')
@@ -0,0 +1,277 @@
+# app/events.py
+"""
+Pub/sub for create/update/delete events, streamed to clients by GET /events
+as server-sent events.
+
+Writes are collected per session by app.changelog and published only after
+the transaction commits. Delivery goes through a pluggable backend named by
+the EVENTS_BACKEND config value (an import path):
+
+  app.events.LocalBackend     fans out within one process: with several
+                              gunicorn workers, a stream only sees the
+                              writes of the worker serving it
+  app.events.PostgresBackend  fans out across processes and hosts with
+                              LISTEN/NOTIFY on the primary (psycopg2)
+
+Another shared backend (e.g. Redis pub/sub) only has to implement publish()
+and subscribe(), plus subscribe_async() if it is used with the ASGI entry
+point.
+"""
+import asyncio
+import json
+import queue
+import select
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, make_url, text
+from werkzeug.utils import import_string
+
+from app import db
+
+
+class LocalSubscription:
+    def __init__(self, backend, maxsize):
+        self._backend = backend
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            pass # A slow client drops events rather than blocking publishers
+
+    def get(self, timeout=None):
+        """Returns the next message, or None if `timeout` seconds pass first."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._backend.unsubscribe(self)
+
+
+class AsyncLocalSubscription:
+    """
+    Subscription consumed from an event loop (the ASGI /events route).
+    Publishers run in worker threads, so messages are handed to the loop
+    with call_soon_threadsafe.
+    """
+
+    def __init__(self, backend, maxsize):
+        self._backend = backend
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=maxsize)
+
+    def _put_nowait(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    def put(self, message):
+        try:
+            self._loop.call_soon_threadsafe(self._put_nowait, message)
+        except RuntimeError:
+            pass # The loop has shut down; close() is about to run
+
+    async def get(self, timeout=None):
+        """Returns the next message, or None if `timeout` seconds pass first."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self._backend.unsubscribe(self)
+
+
+class CallbackSubscription:
+    """Subscription that calls `callback(message)` on the delivering thread instead of queueing."""
+
+    def __init__(self, backend, callback):
+        self._backend = backend
+        self.put = callback
+
+    def close(self):
+        self._backend.unsubscribe(self)
+
+
+class LocalBackend:
+    """Fans messages out to every subscriber in this process."""
+
+    def __init__(self, app=None):
+        self.queue_size = app.config.get('EVENTS_QUEUE_SIZE', 1000) if app else 1000
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(message)
+
+    def subscribe(self):
+        subscription = LocalSubscription(self, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def subscribe_async(self):
+        """Like subscribe(), for a coroutine running on the current event loop."""
+        subscription = AsyncLocalSubscription(self, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def subscribe_callback(self, callback):
+        """Calls `callback(message)` for every message; it must be quick and must not raise."""
+        subscription = CallbackSubscription(self, callback)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+class PostgresBackend(LocalBackend):
+    """
+    Sends messages with NOTIFY on the EVENTS_CHANNEL channel. Each process
+    keeps one connection LISTENing, in a thread started by its first
+    subscriber, and fans what arrives out to its own subscribers. Events
+    published while a process has no listener (e.g. it is reconnecting) are
+    not replayed; clients catch up through GET /sync.
+    """
+
+    RECONNECT_SECONDS = 1
+
+    def __init__(self, app, channel=None):
+        if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != 'postgresql':
+            raise RuntimeError('EVENTS_BACKEND=app.events.PostgresBackend needs a PostgreSQL DATABASE_URL.')
+        super().__init__(app)
+        self.app = app
+        self.channel = channel or app.config.get('EVENTS_CHANNEL', 'task_tracker_events')
+        self._listener = None
+
+    def publish(self, message):
+        self.publish_many([message])
+
+    def publish_many(self, messages):
+        """Sends all the messages of a commit in one statement."""
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(text('SELECT pg_notify(:channel, message) FROM unnest(CAST(:messages AS text[])) AS message'),
+                                   {'channel': self.channel, 'messages': list(messages)})
+                connection.commit()
+        except Exception as e:
+            # The write is committed already; streams miss these events, GET /sync still has them
+            self.app.logger.error(f"Could not publish {len(messages)} event(s): {e}", exc_info=True)
+
+    def subscribe(self):
+        self.start_listener()
+        return super().subscribe()
+
+    def subscribe_async(self):
+        self.start_listener()
+        return super().subscribe_async()
+
+    def start_listener(self):
+        """Starts this process's LISTEN thread unless it runs already. Called on demand, so no thread exists in a gunicorn master before it forks."""
+        if self._listener is not None and self._listener.is_alive():
+            return
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive(): # Not alive: inherited through a fork
+                self._listener = threading.Thread(target=self._listen, name='events-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    connection = db.engine.raw_connection()
+                driver_connection = connection.driver_connection
+                connection.detach() # Held for good: not one of the pool's connections
+                try:
+                    self._receive(driver_connection)
+                finally:
+                    connection.close()
+            except Exception as e:
+                self.app.logger.error(f"Events listener error: {e}", exc_info=True)
+            time.sleep(self.RECONNECT_SECONDS)
+
+    def _receive(self, driver_connection):
+        driver_connection.autocommit = True
+        with driver_connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        while True:
+            select.select([driver_connection], [], [], 60)
+            driver_connection.poll()
+            while driver_connection.notifies:
+                LocalBackend.publish(self, driver_connection.notifies.pop(0).payload)
+
+
+def create_backend(app):
+    backend_class = import_string(app.config.get('EVENTS_BACKEND', 'app.events.LocalBackend'))
+    return backend_class(app)
+
+
+def get_event_backend():
+    return current_app.extensions['events']
+
+
+def queue_event(session, resource, row_id, action, project_id=None):
+    """Stages an event on `session`; it is published if the session commits."""
+    session.info.setdefault('pending_events', []).append({
+        'resource': resource,
+        'id': row_id,
+        'action': action,
+        'project_id': project_id,
+    })
+
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_committed_events(session):
+    session.info.pop('savepoint_marks', None)
+    events = session.info.pop('pending_events', None)
+    if not events or not has_app_context():
+        return
+    backend = get_event_backend()
+    messages = [json.dumps(staged) for staged in events]
+    if hasattr(backend, 'publish_many'):
+        backend.publish_many(messages)
+    else:
+        for message in messages:
+            backend.publish(message)
+
+
+@event.listens_for(db.session, 'after_transaction_create')
+def _mark_savepoint(session, transaction):
+    if transaction.nested:
+        # Events staged from here on are dropped if the savepoint rolls back
+        session.info.setdefault('savepoint_marks', {})[transaction] = len(session.info.get('pending_events', []))
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _drop_rolled_back_events(session, previous_transaction):
+    mark = session.info.get('savepoint_marks', {}).get(previous_transaction)
+    if previous_transaction.nested and mark is not None:
+        del session.info.get('pending_events', [])[mark:] # Only the savepoint's; the rest may still commit
+    else:
+        session.info.pop('pending_events', None)
+        session.info.pop('savepoint_marks', None)
+
+
+def event_matches(staged, project_id=None):
+    """
+    Per-project subscription filter: with a project_id, only that project
+    and the tasks that belong to it are delivered.
+    """
+    if project_id is None:
+        return True
+    if staged['resource'] == 'project':
+        return staged['id'] == project_id
+    return staged['resource'] == 'task' and staged['project_id'] == project_id
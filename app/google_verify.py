@@ -0,0 +1,143 @@
+# app/google_verify.py
+"""
+Google ID-token verification with a process-wide certificate cache.
+
+id_token.verify_oauth2_token() downloads Google's signing certificates on
+every call over a fresh connection. GoogleTokenVerifier keeps them until
+their Cache-Control max-age runs out and fetches them through a pluggable
+cert source. HttpCertSource keeps one pooled keep-alive session.
+StaticCertSource serves certificates from config, so login can be tested
+offline against a local fake issuer.
+
+google-auth, requests and PyJWT are imported on the first verification,
+not at create_app time; only POST /auth/google needs them.
+"""
+import json
+import re
+import threading
+import time
+
+from flask import current_app
+from werkzeug.utils import import_string
+
+GOOGLE_OAUTH2_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+def parse_max_age(cache_control):
+    """Returns the max-age of a Cache-Control header value in seconds, or None."""
+    match = _MAX_AGE_RE.search(cache_control or '')
+    return int(match.group(1)) if match else None
+
+
+class HttpCertSource:
+    """Fetches Google's certificates over one pooled, keep-alive HTTP session."""
+
+    def __init__(self, app):
+        self.url = app.config.get('GOOGLE_CERTS_URL', GOOGLE_OAUTH2_CERTS_URL)
+        self.timeout = app.config.get('GOOGLE_HTTP_TIMEOUT_SECONDS', 5)
+        self._request = None
+
+    def warm_up(self):
+        """Imports requests and opens the session, otherwise done by the first fetch."""
+        if self._request is None:
+            import requests
+            from google.auth.transport import requests as google_requests
+            self._request = google_requests.Request(session=requests.Session())
+
+    def __call__(self):
+        """Returns ({key id: certificate}, max-age seconds or None)."""
+        self.warm_up()
+        response = self._request(self.url, method='GET', timeout=self.timeout)
+        if response.status != 200:
+            raise ValueError(f'Could not fetch Google certificates (HTTP {response.status}).')
+        certs = json.loads(response.data.decode('utf-8'))
+        return certs, parse_max_age(response.headers.get('cache-control'))
+
+
+class StaticCertSource:
+    """Serves the {key id: PEM} mapping in GOOGLE_STATIC_CERTS, for offline use."""
+
+    def __init__(self, app):
+        self.certs = app.config.get('GOOGLE_STATIC_CERTS') or {}
+
+    def __call__(self):
+        return dict(self.certs), None
+
+
+class GoogleTokenVerifier:
+    """
+    Verifies Google ID tokens against cached certificates. Certificates are
+    refetched when their max-age expires, or early when a token names an
+    unknown key id (key rotation). Early refetches happen at most once per
+    `min_refresh_interval`, so forged key ids can't turn into a fetch storm.
+    """
+
+    def __init__(self, cert_source, default_max_age=300, min_refresh_interval=30, clock_skew=0):
+        self.cert_source = cert_source
+        self.default_max_age = default_max_age
+        self.min_refresh_interval = min_refresh_interval
+        self.clock_skew = clock_skew
+        self._lock = threading.Lock()
+        self._certs = None
+        self._expires_at = 0
+        self._fetched_at = 0
+        self.fetches = 0
+
+    def _refresh(self):
+        certs, max_age = self.cert_source()
+        now = time.monotonic()
+        self._certs = certs
+        self._fetched_at = now
+        self._expires_at = now + (max_age if max_age is not None else self.default_max_age)
+        self.fetches += 1
+
+    def certs(self, key_id=None):
+        with self._lock:
+            now = time.monotonic()
+            if self._certs is None or now >= self._expires_at:
+                self._refresh()
+            elif key_id is not None and key_id not in self._certs \
+                    and now - self._fetched_at >= self.min_refresh_interval:
+                self._refresh()
+            return self._certs
+
+    def warm_up(self):
+        """Imports the verification stack now rather than on the first login."""
+        import jwt
+        from google.auth import jwt as google_jwt
+        if hasattr(self.cert_source, 'warm_up'):
+            self.cert_source.warm_up()
+
+    def verify(self, token, audience):
+        """
+        Same checks as id_token.verify_oauth2_token (signature, exp/iat,
+        audience, issuer). Returns the claims; raises ValueError if invalid.
+        """
+        import jwt # PyJWT, only used to read the unverified key id
+        from google.auth import jwt as google_jwt
+        try:
+            key_id = jwt.get_unverified_header(token).get('kid')
+        except jwt.InvalidTokenError as e:
+            raise ValueError(f'Malformed ID token: {e}')
+        idinfo = google_jwt.decode(
+            token, certs=self.certs(key_id), audience=audience, clock_skew_in_seconds=self.clock_skew
+        )
+        if idinfo.get('iss') not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer. 'iss' should be one of: {', '.join(GOOGLE_ISSUERS)}")
+        return idinfo
+
+
+def create_verifier(app):
+    source_class = import_string(app.config.get('GOOGLE_CERT_SOURCE', 'app.google_verify.HttpCertSource'))
+    return GoogleTokenVerifier(
+        source_class(app),
+        default_max_age=app.config.get('GOOGLE_CERTS_DEFAULT_MAX_AGE', 300),
+        clock_skew=app.config.get('GOOGLE_CLOCK_SKEW_SECONDS', 0),
+    )
+
+
+def get_google_verifier():
+    return current_app.extensions['google_verifier']
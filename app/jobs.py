@@ -0,0 +1,411 @@
+# app/jobs.py
+"""
+Background task imports and exports, and large deletes, queued in the
+job table.
+
+POST /jobs/imports stores the uploaded CSV/JSON/NDJSON file and queues a
+job; POST /jobs/exports queues a dump of the (filtered) task table to a
+file; DELETE /projects/<id> and /users/<id> queue a delete job for rows
+with many dependents (see app/cascade.py). Workers claim queued jobs with a conditional UPDATE, so any number of
+threads and processes can share the table without a broker:
+
+  JOBS_MODE=thread    each app process runs JOBS_WORKERS worker threads,
+                      started on its first request (after a gunicorn fork)
+  JOBS_MODE=external  the web processes only queue; run `flask jobs worker`
+                      alongside them
+
+Imports insert JOBS_CHUNK_SIZE rows per transaction, so a cancelled or
+failed import keeps the chunks committed before it stopped. A row that
+fails validation or that the database rejects (e.g. an owner_id that does
+not exist) is skipped and reported with its row number, like a rejected
+POST /tasks/bulk operation. JSON arrays are decoded JSON_READ_BYTES at a
+time, so no format holds the whole upload in memory. Progress,
+cancellation and row errors are recorded on the job row after each chunk.
+"""
+import csv
+import itertools
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import func, insert, select, update
+from werkzeug.datastructures import MultiDict
+
+from app import db
+from app.changelog import record_changes
+from app.engine import begin_transaction
+from app.models.job import Job
+from app.models.task import Task
+
+FORMATS = ('csv', 'json', 'ndjson')
+INTEGER_FIELDS = ('owner_id', 'project_id')
+FINISHED = ('completed', 'failed', 'cancelled')
+JSON_READ_BYTES = 64 * 1024
+WHITESPACE = re.compile(r'\s*')
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def jobs_dir(app):
+    return app.config.get('JOBS_DIR') or os.path.join(app.instance_path, 'jobs')
+
+
+def _json_array(handle):
+    """
+    Yields (row number, item) from the JSON array in `handle`, decoding it
+    JSON_READ_BYTES at a time. A malformed document raises ValueError at
+    the point it stops parsing; the rows before it have been yielded.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = '', 0, False
+
+    def read_more():
+        nonlocal buffer, position, eof
+        block = handle.read(JSON_READ_BYTES)
+        eof = not block
+        buffer, position = buffer[position:] + block, 0
+
+    def peek():
+        """Skips whitespace and returns the next character ('' at the end of the file)."""
+        nonlocal position
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position < len(buffer) or eof:
+                return buffer[position:position + 1]
+            read_more()
+
+    if peek() != '[':
+        raise ValueError('A JSON import must be an array of task objects.')
+    position += 1
+    if peek() == ']':
+        return
+    for number in itertools.count(1):
+        peek()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ValueError(f'Row {number} is not valid JSON: {e.msg}.')
+                read_more()
+                continue
+            if end < len(buffer) or eof:
+                break
+            read_more() # A number or literal may go on in the next block
+        position = end
+        yield number, item
+        separator = peek()
+        position += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f'Expected "," or "]" after row {number} of the JSON array.')
+
+
+def _read_rows(path, format):
+    """
+    Yields (row number, row) from an import file: a dict for CSV and JSON
+    (one array of objects), the line's text for NDJSON, which
+    _task_values() decodes so a malformed line only fails its own row.
+    """
+    if format == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            for number, row in enumerate(csv.DictReader(handle), start=1):
+                yield number, row
+    elif format == 'ndjson':
+        with open(path, encoding='utf-8') as handle:
+            for number, line in enumerate(handle, start=1):
+                if line.strip():
+                    yield number, line
+    else:
+        with open(path, encoding='utf-8') as handle:
+            yield from _json_array(handle)
+
+
+def _task_values(row, format):
+    """Validates one imported row like a /tasks/bulk create and returns the column values."""
+    from app.routes.task_routes import validate_task_operation
+    if format == 'ndjson':
+        try:
+            row = json.loads(row)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'Invalid JSON: {e.msg}.')
+    if not isinstance(row, dict):
+        raise ValueError('Each row must be an object.')
+    if format == 'csv':
+        # CSV cells are strings; empty cells are nulls and id columns must be integers
+        row = {key: (value if value != '' else None) for key, value in row.items() if key}
+        for key in INTEGER_FIELDS:
+            if row.get(key) is not None:
+                try:
+                    row[key] = int(row[key])
+                except ValueError:
+                    raise ValueError(f'{key} must be an integer.')
+    return validate_task_operation({'op': 'create', 'data': row})[2]
+
+
+def _progress(job_id, **values):
+    """Saves progress and returns True if cancellation was requested meanwhile."""
+    db.session.execute(update(Job).where(Job.id == job_id).values(heartbeat_at=datetime.utcnow(), **values))
+    db.session.commit()
+    return db.session.scalar(select(Job.cancel_requested).where(Job.id == job_id))
+
+
+def _insert_chunk(chunk):
+    """
+    Inserts a chunk of (row number, values) and commits. A chunk the
+    database rejects is retried row by row, like POST /tasks/bulk; returns
+    {row number: result} for the rows it rejected.
+    """
+    from app.routes.task_routes import apply_in_savepoints
+
+    def apply(items):
+        rows = db.session.execute(insert(Task).returning(Task.id, Task.project_id), [values for _, values in items]).all()
+        record_changes('task', [row.id for row in rows], 'upsert', project_ids=dict(rows))
+
+    rejected = {}
+    begin_transaction(db.session) # So releasing the first savepoint doesn't commit on SQLite
+    apply_in_savepoints(rejected, chunk, apply)
+    db.session.commit()
+    return rejected
+
+
+def run_import(job):
+    chunk_size = current_app.config.get('JOBS_CHUNK_SIZE', 5000)
+    max_errors = current_app.config.get('JOBS_MAX_ERRORS', 1000)
+    errors, chunk = [], []
+    processed = failed = 0
+
+    def reject(number, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < max_errors:
+            errors.append({'row': number, 'error': message})
+
+    def insert_chunk():
+        for number, result in _insert_chunk(chunk).items():
+            reject(number, result['error'])
+        errors.sort(key=lambda error: error['row']) # The chunk's validation errors were recorded first
+        chunk.clear()
+
+    for number, row in _read_rows(job.input_path, job.format):
+        try:
+            chunk.append((number, _task_values(row, job.format)))
+        except ValueError as e:
+            reject(number, str(e))
+        processed += 1
+        if len(chunk) >= chunk_size:
+            insert_chunk()
+            if _progress(job.id, processed=processed, failed=failed, errors=json.dumps(errors)):
+                raise JobCancelled()
+    if chunk:
+        insert_chunk()
+    _progress(job.id, processed=processed, failed=failed, total=processed, errors=json.dumps(errors))
+
+
+def run_export(job):
+    from app.routes.task_routes import task_list_filters
+    from app.serializers import dumps, task_serializer
+    chunk_size = current_app.config.get('JOBS_CHUNK_SIZE', 5000)
+    criteria = task_list_filters(MultiDict(json.loads(job.params or '{}')))
+    total = db.session.scalar(select(func.count()).select_from(Task).where(*criteria))
+    _progress(job.id, total=total)
+
+    path = os.path.join(jobs_dir(current_app), 'exports', f'tasks-{job.id}.{job.format}')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fields = task_serializer.fields
+    processed = 0
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.DictWriter(handle, fieldnames=fields) if job.format == 'csv' else None
+        if writer:
+            writer.writeheader()
+        elif job.format == 'json':
+            handle.write('[')
+        # Keyset chunks, so no transaction or cursor stays open for the whole export
+        cursor = 0
+        while True:
+            rows = task_serializer.query().filter(*criteria, Task.id > cursor).order_by(Task.id).limit(chunk_size).all()
+            if not rows:
+                break
+            for row in rows:
+                data = task_serializer.to_dict(row)
+                if writer:
+                    writer.writerow(data)
+                elif job.format == 'json':
+                    handle.write((',' if processed else '') + dumps(data))
+                else:
+                    handle.write(dumps(data) + '\n')
+                processed += 1
+            cursor = rows[-1].id
+            db.session.rollback() # End the read transaction between chunks
+            if _progress(job.id, processed=processed):
+                raise JobCancelled()
+        if job.format == 'json':
+            handle.write(']')
+    _progress(job.id, processed=processed, output_path=path)
+
+
+def run_delete(job):
+    """
+    Deletes a project or user with many dependents: JOBS_CHUNK_SIZE of them
+    are detached per transaction, then the row itself is deleted. A
+    cancelled job leaves the row in place, minus the references already
+    detached.
+    """
+    from app.cascade import count_dependents, delete_row, detach_dependents
+    chunk_size = current_app.config.get('JOBS_CHUNK_SIZE', 5000)
+    target = json.loads(job.params)
+    resource, row_id = target['resource'], target['id']
+    _progress(job.id, total=count_dependents(resource, row_id))
+    processed = 0
+    while True:
+        detached = detach_dependents(resource, row_id, limit=chunk_size)
+        db.session.commit()
+        processed += detached
+        if detached < chunk_size:
+            break
+        if _progress(job.id, processed=processed):
+            raise JobCancelled()
+    # Rows referencing it since the last chunk are detached in the same transaction as the delete
+    delete_row(resource, row_id)
+    db.session.commit()
+    if resource == 'user':
+        from app.token_cache import get_token_cache
+        get_token_cache().invalidate_user(row_id)
+    _progress(job.id, processed=processed)
+
+
+HANDLERS = {'import': run_import, 'export': run_export, 'delete': run_delete}
+
+
+def _finish(job_id, status, error=None):
+    values = {'status': status, 'finished_at': datetime.utcnow()}
+    if error is not None:
+        job = db.session.get(Job, job_id)
+        errors = json.loads(job.errors or '[]')
+        errors.append({'row': None, 'error': error})
+        values['errors'] = json.dumps(errors)
+    db.session.execute(update(Job).where(Job.id == job_id).values(**values))
+    db.session.commit()
+
+
+def claim_next_job():
+    """Marks the oldest queued job as running and returns its id, or None if the queue is empty."""
+    while True:
+        job_id = db.session.scalar(select(Job.id).where(Job.status == 'queued').order_by(Job.id).limit(1))
+        if job_id is None:
+            return None
+        now = datetime.utcnow()
+        claimed = db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', started_at=now, heartbeat_at=now)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return job_id # Otherwise another worker won the race; try the next one
+
+
+def run_job(job_id):
+    job = db.session.get(Job, job_id)
+    db.session.rollback() # Handlers work with plain attributes; don't hold the read transaction
+    try:
+        HANDLERS[job.kind](job)
+    except JobCancelled:
+        db.session.rollback()
+        _finish(job_id, 'cancelled')
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+        # ValueErrors are the handlers' own messages (e.g. a malformed file); others may hold SQL
+        _finish(job_id, 'failed', error=str(e) if isinstance(e, ValueError) else 'The job failed unexpectedly.')
+    else:
+        _finish(job_id, 'completed')
+
+
+def fail_stale_jobs(app):
+    """Fails running jobs whose worker stopped sending heartbeats (e.g. the process was killed)."""
+    cutoff = datetime.utcnow() - timedelta(seconds=app.config.get('JOBS_STALE_SECONDS', 600))
+    db.session.execute(
+        update(Job).where(Job.status == 'running', Job.heartbeat_at < cutoff)
+        .values(status='failed', finished_at=datetime.utcnow())
+    )
+    db.session.commit()
+
+
+class JobRunner:
+    """Worker threads that claim and run queued jobs; notify() wakes them after a job is queued."""
+
+    def __init__(self, app):
+        self.app = app
+        self.workers = app.config.get('JOBS_WORKERS', 2)
+        self.poll_seconds = app.config.get('JOBS_POLL_SECONDS', 5)
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self, daemon=True):
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                # The first worker recovers stale jobs, off the request that started the workers
+                thread = threading.Thread(target=self._work, args=(index == 0,), name=f'job-worker-{index}', daemon=daemon)
+                thread.start()
+                self._threads.append(thread)
+
+    def notify(self):
+        self._wake.set()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self, recover=False):
+        if recover:
+            with self.app.app_context():
+                try:
+                    fail_stale_jobs(self.app)
+                finally:
+                    db.session.remove()
+        while True:
+            with self.app.app_context():
+                try:
+                    job_id = claim_next_job()
+                    if job_id is not None:
+                        run_job(job_id)
+                except Exception as e:
+                    self.app.logger.error(f"Job worker error: {e}", exc_info=True)
+                    job_id = None
+                finally:
+                    db.session.remove()
+            if job_id is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+
+def get_job_runner():
+    return current_app.extensions['jobs']
+
+
+def init_jobs(app):
+    app.extensions['jobs'] = runner = JobRunner(app)
+    if app.config.get('JOBS_MODE', 'thread') == 'thread':
+        # Started lazily so no threads exist in a gunicorn master before it forks
+        app.before_request(runner.start)
+
+    @app.cli.group('jobs')
+    def jobs_cli():
+        """Background import/export/delete jobs."""
+
+    @jobs_cli.command('worker')
+    def worker_command():
+        """Runs JOBS_WORKERS job worker threads in the foreground."""
+        click.echo(f'Running {runner.workers} job worker(s); Ctrl+C to stop.')
+        runner.start(daemon=False)
+        runner.join()
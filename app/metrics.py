@@ -0,0 +1,191 @@
+# app/metrics.py
+"""
+Opt-in request instrumentation (METRICS_ENABLED=true).
+
+Per endpoint it records wall time, the number and total time of SQL
+statements (engine cursor events), the time role_required spends verifying
+the JWT and the time spent encoding JSON (jsonify and serializers.dumps),
+and serves them in the Prometheus text format at GET /metrics. Counters are
+per process; under gunicorn each worker reports its own, so scrape workers
+individually or aggregate.
+
+With METRICS_PROFILE_SAMPLE_RATE > 0 that fraction of requests also runs
+under cProfile, and the profile is written to METRICS_PROFILE_DIR when the
+request took at least METRICS_PROFILE_SLOW_MS.
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+TIMINGS = ('db', 'jwt', 'serialize')
+
+
+def record_timing(kind, seconds):
+    """Adds `seconds` of `kind` (one of TIMINGS) to the current request if it is being measured."""
+    if has_request_context():
+        timings = g.get('request_timings')
+        if timings is not None:
+            timings[kind] += seconds
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, with jsonify() encoding time counted as serialisation."""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        encoded = super().dumps(obj, **kwargs)
+        record_timing('serialize', time.perf_counter() - started)
+        return encoded
+
+
+class EndpointStats:
+    def __init__(self, buckets):
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.seconds = 0.0
+        self.statuses = {}
+        self.queries = 0
+        self.timings = dict.fromkeys(TIMINGS, 0.0)
+
+
+class Metrics:
+    """Thread-safe per-endpoint aggregates, rendered for Prometheus by render()."""
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def observe(self, endpoint, method, status, seconds, queries, timings):
+        with self._lock:
+            stats = self._endpoints.get((endpoint, method))
+            if stats is None:
+                stats = self._endpoints[(endpoint, method)] = EndpointStats(self.buckets)
+            stats.count += 1
+            stats.seconds += seconds
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.queries += queries
+            for kind in TIMINGS:
+                stats.timings[kind] += timings[kind]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    stats.bucket_counts[index] += 1
+
+    def render(self):
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = [
+                '# HELP http_requests_total Requests handled, by endpoint, method and status.',
+                '# TYPE http_requests_total counter',
+            ]
+            for (endpoint, method), stats in endpoints:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP http_request_duration_seconds Wall time from before_request to after_request.',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for (endpoint, method), stats in endpoints:
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                for bound, count in zip(self.buckets, stats.bucket_counts):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {stats.seconds:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {stats.count}')
+
+            lines += [
+                '# HELP db_queries_total SQL statements executed while handling requests.',
+                '# TYPE db_queries_total counter',
+            ]
+            lines += [f'db_queries_total{{endpoint="{endpoint}",method="{method}"}} {stats.queries}'
+                      for (endpoint, method), stats in endpoints]
+
+            for kind, help_text in (('db', 'Time spent executing SQL statements.'),
+                                    ('jwt', 'Time role_required spent verifying the app token.'),
+                                    ('serialize', 'Time spent encoding JSON response bodies.')):
+                name = f'{kind}_duration_seconds_total'
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                lines += [f'{name}{{endpoint="{endpoint}",method="{method}"}} {stats.timings[kind]:.6f}'
+                          for (endpoint, method), stats in endpoints]
+        return '\n'.join(lines) + '\n'
+
+
+def get_metrics():
+    return current_app.extensions['metrics']
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = context.metrics_started
+    if has_request_context():
+        timings = g.get('request_timings')
+        if timings is not None:
+            timings['db'] += time.perf_counter() - started
+            g.request_queries += 1
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.request_timings = dict.fromkeys(TIMINGS, 0.0)
+    g.request_queries = 0
+    g.request_profiler = None
+    if random.random() < current_app.config['METRICS_PROFILE_SAMPLE_RATE']:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return # Another profiler is active (one at a time from Python 3.12 on)
+        g.request_profiler = profiler
+
+
+def _finish_request(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    seconds = time.perf_counter() - started
+    endpoint = request.endpoint or 'unmatched'
+    get_metrics().observe(endpoint, request.method, response.status_code, seconds,
+                          g.request_queries, g.request_timings)
+
+    profiler = g.pop('request_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        if seconds * 1000 >= current_app.config['METRICS_PROFILE_SLOW_MS']:
+            directory = current_app.config['METRICS_PROFILE_DIR']
+            os.makedirs(directory, exist_ok=True)
+            stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S.%f')
+            profiler.dump_stats(os.path.join(directory, f'{stamp}-{endpoint}-{int(seconds * 1000)}ms.prof'))
+    return response
+
+
+def instrument_engine(engine):
+    """Counts and times the statements of `engine` in the current request's metrics."""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def init_metrics(app, db):
+    """Installs the request hooks and GET /metrics when METRICS_ENABLED is set."""
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    app.extensions['metrics'] = Metrics(app.config['METRICS_BUCKETS'])
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+    app.json = TimedJSONProvider(app) # dumps() in app/serializers.py records its own time
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    from app.routes.metrics_routes import metrics_bp
+    app.register_blueprint(metrics_bp)
@@ -0,0 +1,28 @@
+# app/migrate_cli.py
+import click
+
+
+class LazyMigrateGroup(click.Group):
+    """
+    `flask db`. Flask-Migrate (and with it Alembic) is imported and set up
+    only when a db command is invoked, not by every process that calls
+    create_app.
+    """
+
+    def __init__(self, app, db):
+        super().__init__(name='db', help='Perform database migrations.')
+        self.app = app
+        self.db = db
+        self._group = None
+
+    def _load(self):
+        if self._group is None:
+            from flask_migrate import Migrate
+            from flask_migrate.cli import db as db_cli_group
+            Migrate(self.app, self.db) # Sets app.extensions['migrate'], read by migrations/env.py
+            self._group = db_cli_group
+        return self._group
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # The real group parses the arguments and runs its own callback and subcommands
+        return self._load().make_context(info_name, args, parent=parent, **extra)
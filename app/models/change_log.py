@@ -0,0 +1,23 @@
+from datetime import datetime
+from app import db
+
+class ChangeLog(db.Model):
+    """
+    Append-only log of writes to tasks, projects and users, read by GET /sync.
+    On SQLite, which commits one writer at a time, id order is commit order
+    and the id is the sync cursor. On Postgres concurrent transactions can
+    commit out of id order, so entries also carry the writing transaction's
+    id and /sync orders by (txid, id) (see app/routes/sync_routes.py).
+    """
+    __tablename__ = 'change_log'
+
+    id = db.Column(db.Integer, primary_key=True)
+    resource = db.Column(db.String(50), nullable=False)
+    resource_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(10), nullable=False) # 'upsert' or 'delete'
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    txid = db.Column(db.BigInteger) # Postgres txid_current() of the write; null on SQLite
+
+    __table_args__ = (
+        db.Index('ix_change_log_txid_id', 'txid', 'id'),
+    )
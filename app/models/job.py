@@ -0,0 +1,31 @@
+from datetime import datetime
+from app import db
+
+class Job(db.Model):
+    """
+    A background task import or export (see app/jobs.py). The table doubles
+    as the queue: workers claim 'queued' rows with a conditional UPDATE.
+    """
+    __tablename__ = 'job'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), nullable=False) # 'import', 'export' or 'delete'
+    format = db.Column(db.String(10)) # 'csv', 'json' or 'ndjson'; imports and exports only
+    status = db.Column(db.String(10), nullable=False, default='queued') # queued, running, completed, failed, cancelled
+    params = db.Column(db.Text) # JSON: export filters, or the row a delete job removes
+    input_path = db.Column(db.String(255))
+    output_path = db.Column(db.String(255))
+    total = db.Column(db.Integer) # Rows to process, once known
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text) # JSON list of {"row", "error"}, capped at JOBS_MAX_ERRORS
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_job_created_by', ondelete='SET NULL'))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime) # Bumped after every chunk; stale running jobs are failed on recovery
+
+    __table_args__ = (
+        db.Index('ix_job_status_id', 'status', 'id'),
+    )
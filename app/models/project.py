@@ -1,3 +1,4 @@
+from datetime import datetime
 from app import db
 
 class Project(db.Model):
@@ -6,7 +7,11 @@ class Project(db.Model):
     description = db.Column(db.Text)
     start_date = db.Column(db.Date)
     end_date = db.Column(db.Date)
-    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    tasks = db.relationship('Task', backref='project', lazy=True)
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_project_owner_id', ondelete='SET NULL'))
+    # passive_deletes: deleting a project never loads its tasks; app/cascade.py detaches them in bulk
+    tasks = db.relationship('Task', backref='project', lazy=True, passive_deletes=True)
+    # Maintained on every write; used for ETag / Last-Modified on GET
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=db.literal_column('version + 1'))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     # Ensure the backref name here is unique, e.g., 'owner_user' if User.projects uses it
     
\ No newline at end of file
@@ -0,0 +1,14 @@
+from datetime import datetime
+from app import db
+
+class ResourceVersion(db.Model):
+    """
+    One row per resource type ('task', 'project', 'user', 'role') whose
+    version is bumped whenever any row of that type is written. List
+    endpoints derive their ETag from it without touching the resource table.
+    """
+    __tablename__ = 'resource_version'
+
+    resource = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1,6 +1,10 @@
+from datetime import datetime
 from app import db
 
 class Role(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), unique=True, nullable=False)
     users = db.relationship('User', back_populates='role', lazy=True)
+    # Maintained on every write; used for ETag / Last-Modified on GET
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=db.literal_column('version + 1'))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from app import db
 
 class Task(db.Model):
@@ -5,6 +6,19 @@ class Task(db.Model):
     description = db.Column(db.Text, nullable=False)
     due_date = db.Column(db.Date)
     status = db.Column(db.String(50))
-    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'))
-    
+    # Deleting the user or project leaves the task unassigned (see app/cascade.py)
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_task_owner_id', ondelete='SET NULL'))
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', name='fk_task_project_id', ondelete='SET NULL'))
+    # Maintained on every write; used for ETag / Last-Modified on GET
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=db.literal_column('version + 1'))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Composite indexes backing the filtered, keyset-paginated GET /tasks/
+    __table_args__ = (
+        db.Index('ix_task_status_id', 'status', 'id'),
+        db.Index('ix_task_owner_id_id', 'owner_id', 'id'),
+        db.Index('ix_task_project_id_id', 'project_id', 'id'),
+        db.Index('ix_task_due_date_id', 'due_date', 'id'),
+        # Covers the GROUP BY queries of the project stats endpoints
+        db.Index('ix_task_project_id_status_due_date', 'project_id', 'status', 'due_date'),
+    )
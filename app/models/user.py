@@ -1,3 +1,4 @@
+from datetime import datetime
 from app import db
 
 class User(db.Model):
@@ -11,3 +12,11 @@ class User(db.Model):
     picture = db.Column(db.String(255), nullable=True)
     role_id = db.Column(db.Integer, db.ForeignKey('role.id', name='fk_user_role_id'), nullable=True)
     role = db.relationship('Role', back_populates='users')
+    # Maintained on every write; used for ETag / Last-Modified on GET
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=db.literal_column('version + 1'))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Backs the role filter and keyset pagination of GET /users/
+    __table_args__ = (
+        db.Index('ix_user_role_id_id', 'role_id', 'id'),
+    )
@@ -0,0 +1,69 @@
+# app/pagination.py
+from urllib.parse import urlencode
+
+from flask import current_app, request
+
+
+def parse_limit():
+    """
+    Reads the `limit` query parameter, falling back to DEFAULT_PAGE_SIZE and
+    capping it at MAX_PAGE_SIZE. Raises ValueError on a non-positive or
+    non-integer value.
+    """
+    default_limit = current_app.config.get('DEFAULT_PAGE_SIZE', 100)
+    max_limit = current_app.config.get('MAX_PAGE_SIZE', 1000)
+    limit = request.args.get('limit', default_limit, type=int)
+    if limit is None or limit < 1:
+        raise ValueError('limit must be a positive integer.')
+    return min(limit, max_limit)
+
+
+def parse_cursor():
+    """
+    Reads the `cursor` query parameter: the id of the last row of the previous
+    page. Returns None for the first page.
+    """
+    cursor = request.args.get('cursor')
+    if cursor in (None, ''):
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise ValueError('cursor must be an integer id.')
+
+
+def keyset_page(query, id_column, limit, cursor=None):
+    """
+    Applies keyset pagination on `id_column` to `query`.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    One extra row is fetched to detect whether another page exists, so the
+    cost per page stays constant regardless of how deep the client has paged.
+    """
+    if cursor is not None:
+        query = query.filter(id_column > cursor)
+    return split_page(query.order_by(id_column).limit(limit + 1).all(), limit)
+
+
+def split_page(rows, limit):
+    """
+    Takes the `limit + 1` rows fetched for a page and returns
+    (rows, next_cursor), as keyset_page does.
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    return rows, next_cursor
+
+
+def set_pagination_headers(response, next_cursor):
+    """
+    Adds the X-Next-Cursor and Link headers to a list response. The body stays
+    a plain JSON array so existing clients keep working.
+    """
+    if next_cursor is not None:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
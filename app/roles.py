@@ -0,0 +1,192 @@
+# app/roles.py
+"""
+In-process registry of the role table. Roles are few and almost never
+change, so role lookups on the request path (the auth path, get_role,
+list_roles and the users' roleName) are answered from memory.
+
+The registry is loaded on the first lookup (at create_app time with
+EAGER_INIT), which also seeds the default roles once. The role routes
+invalidate it after every write, and the invalidation is broadcast to
+other workers through a pluggable channel named by
+ROLE_INVALIDATION_CHANNEL (an import path):
+
+  app.roles.LocalInvalidationChannel     reaches this process only: other
+                                         gunicorn workers and hosts serve
+                                         a renamed or deleted role for up
+                                         to ROLE_CACHE_TTL_SECONDS
+  app.roles.PostgresInvalidationChannel  reaches every process with
+                                         LISTEN/NOTIFY on the primary; the
+                                         TTL still bounds staleness for a
+                                         worker whose listener missed a
+                                         notification while reconnecting
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from werkzeug.utils import import_string
+
+from app import db
+from app.models.role import Role
+from app.versioning import bump_versions
+
+DEFAULT_ROLES = ('Admin', 'Task Creator', 'Read Only')
+
+
+class LocalInvalidationChannel:
+    """
+    Delivers invalidations to subscribers in this process only. A shared
+    implementation (e.g. Redis pub/sub) needs the same publish()/subscribe()
+    pair to reach every gunicorn worker.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def publish(self, message):
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback(message)
+
+
+class PostgresInvalidationChannel:
+    """
+    Sends invalidations with NOTIFY on the ROLE_INVALIDATION_PG_CHANNEL
+    channel, through the LISTEN/NOTIFY plumbing of app.events.PostgresBackend.
+    Each worker starts its listener on its first request.
+    """
+
+    def __init__(self, app):
+        from app.events import PostgresBackend
+        self._backend = PostgresBackend(app, channel=app.config.get('ROLE_INVALIDATION_PG_CHANNEL', 'task_tracker_roles'))
+        app.before_request(self._backend.start_listener)
+
+    def subscribe(self, callback):
+        self._backend.subscribe_callback(callback)
+
+    def publish(self, message):
+        self._backend.publish(message)
+
+
+class RoleCache:
+    """
+    Maps role ids to names and back. An unknown id triggers a reload at most
+    once per `miss_reload_seconds`, which covers roles created by another
+    worker without letting dangling role ids hit the DB on every request.
+    The table is also reloaded once it is `ttl_seconds` old, which bounds
+    how long a worker the invalidation channel doesn't reach (e.g. another
+    gunicorn worker with the local channel) serves a renamed or deleted role.
+    """
+
+    def __init__(self, channel=None, miss_reload_seconds=5, ttl_seconds=60):
+        self._lock = threading.Lock()
+        # (ids by name, names by id, loaded at), replaced as a whole so readers never see it half-updated
+        self._snapshot = None
+        self._generation = 0 # Bumped by invalidations, so a load racing one doesn't store stale rows
+        self._seeded = False
+        self.miss_reload_seconds = miss_reload_seconds
+        self.ttl_seconds = ttl_seconds
+        self.channel = channel
+        if channel is not None:
+            channel.subscribe(self._on_invalidation)
+
+    def load(self, max_age=None):
+        """
+        Reads the whole role table and returns the new snapshot; the first
+        load seeds any missing default roles. With `max_age`, a snapshot
+        that is younger (loaded by another thread while this one waited for
+        the lock) is returned instead. Uses its own connections, so the
+        caller's session is neither committed nor rolled back.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if max_age is not None and snapshot is not None and time.monotonic() - snapshot[2] < max_age:
+                return snapshot
+            if not self._seeded:
+                seed_roles()
+                self._seeded = True
+            generation = self._generation
+            with db.engine.connect() as connection:
+                rows = connection.execute(select(Role.id, Role.name)).all()
+            snapshot = ({row.name: row.id for row in rows}, {row.id: row.name for row in rows}, time.monotonic())
+            if self._generation == generation:
+                self._snapshot = snapshot
+            return snapshot
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot is None or (self.ttl_seconds and time.monotonic() - snapshot[2] >= self.ttl_seconds):
+            snapshot = self.load(max_age=self.ttl_seconds or None)
+        return snapshot
+
+    def _on_invalidation(self, message):
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def invalidate(self):
+        """Drops the cached table here at once and, through the channel, in every worker."""
+        self._on_invalidation('roles')
+        if self.channel is not None:
+            self.channel.publish('roles')
+
+    def all(self):
+        """Returns [{'id', 'name'}] for every role, ordered by id."""
+        _, names_by_id, _ = self._current()
+        return [{'id': role_id, 'name': name} for role_id, name in sorted(names_by_id.items())]
+
+    def id_for(self, name):
+        ids_by_name, _, _ = self._current()
+        return ids_by_name.get(name)
+
+    def name_for(self, role_id):
+        if role_id is None:
+            return None
+        _, names_by_id, loaded_at = self._current()
+        if role_id not in names_by_id and time.monotonic() - loaded_at >= self.miss_reload_seconds:
+            _, names_by_id, _ = self.load(max_age=self.miss_reload_seconds) # Possibly a role created since the last load
+        return names_by_id.get(role_id)
+
+
+def seed_roles():
+    """Inserts whichever of DEFAULT_ROLES are missing, in a transaction of its own."""
+    with db.engine.connect() as connection:
+        existing = set(connection.scalars(select(Role.name)))
+    missing = [name for name in DEFAULT_ROLES if name not in existing]
+    if not missing:
+        return
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(insert(Role), [{'name': name} for name in missing])
+            bump_versions(connection, {'role'})
+    except IntegrityError:
+        pass # Another worker seeded them first
+
+
+def init_roles(app):
+    """
+    Creates the app's role registry. With EAGER_INIT it is loaded right away
+    unless the schema doesn't exist yet (e.g. before `flask db upgrade`);
+    otherwise the first lookup loads it.
+    """
+    channel_class = import_string(app.config.get('ROLE_INVALIDATION_CHANNEL', 'app.roles.LocalInvalidationChannel'))
+    app.extensions['roles'] = RoleCache(channel=channel_class(app), ttl_seconds=app.config.get('ROLE_CACHE_TTL_SECONDS', 60))
+    if not app.config.get('EAGER_INIT'):
+        return
+    with app.app_context():
+        try:
+            app.extensions['roles'].load()
+        except (OperationalError, ProgrammingError):
+            pass
+
+
+def get_role_cache():
+    return current_app.extensions['roles']
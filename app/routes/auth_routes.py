@@ -1,59 +1,185 @@
 from flask import request, jsonify, Blueprint, current_app
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 import jwt # PyJWT for generating app tokens
 import datetime
 import os
+import time
 from flask_cors import cross_origin # Import cross_origin
 
 # Import your actual database and models
 from app import db
 from app.models.user import User # Assuming your User model is in app.models.user
-from app.models.role import Role # Assuming your Role model is in app.models.role
+from app.token_cache import get_token_cache
+from app.google_verify import get_google_verifier
+from app.roles import get_role_cache
+from app.changelog import record_changes
+from app.versioning import bump_versions
+from app.metrics import record_timing
+from app.admission import admit_caller
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 
 # This blueprint will be registered with the Flask app
 auth_bp = Blueprint('auth_bp', __name__, url_prefix='/auth')
 
+def authenticate(allowed_roles, allow_query_token=False):
+    """
+    Verifies the app token of the current request and checks its role.
+    Returns None and sets request.current_user_id and
+    request.current_user_role when the request may proceed, otherwise the
+    401/403 error response, or the 429 of the admission limits: they are
+    charged to the user id, or to the client address when the token doesn't
+    identify a user, so every call is counted once.
+    Shared by role_required and the async routes in app/asgi.py.
+    With allow_query_token, an ?access_token= parameter is accepted too, for
+    clients such as the browser EventSource that cannot send headers.
+    Verified payloads are cached per token until the token expires, so
+    repeat requests skip the HMAC check and claim parsing.
+    The role is not taken from the token's roleName claim, which is only
+    what the user had at sign-in: the user's current role id is read once
+    per cache entry and its name looked up in the role registry on every
+    request. A role change therefore applies once the user's cache entry
+    is invalidated (at once in the worker that made it, within
+    JWT_CACHE_TTL_SECONDS in the others), and a rename or delete of the
+    role as soon as the registry reloads.
+    """
+    jwt_secret_key = current_app.config.get("JWT_SECRET_KEY")
+    auth_header = request.headers.get('Authorization')
+    if allow_query_token and not auth_header and request.args.get('access_token'):
+        auth_header = f"Bearer {request.args['access_token']}"
+
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return _refused(jsonify({"error": "Authorization token is missing or invalid."}))
+
+    token = auth_header.split(' ')[1]
+    started = time.perf_counter()
+    try:
+        token_cache = get_token_cache()
+        payload = token_cache.get(token)
+        if payload is None:
+            payload = jwt.decode(token, jwt_secret_key, algorithms=["HS256"])
+            user = _current_user_role(payload.get('app_user_id'))
+            if user is None:
+                return _refused(jsonify({"error": "User not found or token invalid."}))
+            payload = dict(payload, currentRoleId=user.role_id)
+            token_cache.put(token, payload)
+    except jwt.ExpiredSignatureError:
+        return _refused(jsonify({"error": "Token has expired."}))
+    except jwt.InvalidTokenError:
+        return _refused(jsonify({"error": "Token is invalid."}))
+    finally:
+        record_timing('jwt', time.perf_counter() - started)
+
+    user_role_name = get_role_cache().name_for(payload['currentRoleId'])
+    if user_role_name not in allowed_roles:
+        return admit_caller(f"user:{payload.get('app_user_id')}") or (jsonify({"error": "Permission denied. Insufficient role."}), 403)
+
+    request.current_user_id = payload.get('app_user_id') # Make user ID available
+    request.current_user_role = user_role_name # Make role available
+    return admit_caller(f"user:{request.current_user_id}") # Per-user rate limits (ADMISSION_ENABLED)
+
+def _refused(response):
+    """A 401, or the 429 if the client address is over its admission limits (ADMISSION_ENABLED)."""
+    return admit_caller(f"addr:{request.remote_addr}") or (response, 401)
+
+def _current_user_role(user_id):
+    """
+    Reads the token's user from the primary and returns its (id, role_id)
+    row, or None if the user no longer exists. Only the role id: the
+    caller caches it with the token and resolves the role's current name
+    through the role registry (app/roles.py) on each request.
+    """
+    # Its own connection to the primary: also called from the async routes, which have no ORM session
+    with db.engine.connect() as connection:
+        return connection.execute(select(User.id, User.role_id).where(User.id == user_id)).first()
+
 # Custom decorator for role-based access control
-def role_required(allowed_roles):
+def role_required(allowed_roles, allow_query_token=False):
     """
-    Decorator to restrict access to routes based on user roles.
-    It verifies the JWT in the Authorization header and sets
-    request.current_user_id and request.current_user_role.
+    Decorator to restrict access to routes based on user roles; see
+    authenticate() for how the token is read and verified.
     """
     def decorator(f):
         def wrapper(*args, **kwargs):
-            jwt_secret_key = current_app.config.get("JWT_SECRET_KEY")
-            auth_header = request.headers.get('Authorization')
-
-            if not auth_header or not auth_header.startswith('Bearer '):
-                return jsonify({"error": "Authorization token is missing or invalid."}), 401
-            
-            token = auth_header.split(' ')[1]
             try:
-                payload = jwt.decode(token, jwt_secret_key, algorithms=["HS256"])
-                user_role_name = payload.get('roleName') # Get roleName from token payload
-
-                if user_role_name not in allowed_roles:
-                    return jsonify({"error": "Permission denied. Insufficient role."}), 403
-                
-                request.current_user_id = payload.get('app_user_id') # Make user ID available
-                request.current_user_role = user_role_name # Make role available
-
+                error = authenticate(allowed_roles, allow_query_token)
+                if error is not None:
+                    return error
                 return f(*args, **kwargs)
-
-            except jwt.ExpiredSignatureError:
-                return jsonify({"error": "Token has expired."}), 401
-            except jwt.InvalidTokenError:
-                return jsonify({"error": "Token is invalid."}), 401
             except Exception as e:
                 current_app.logger.error(f"Error in role_required decorator: {e}", exc_info=True)
                 return jsonify({"error": "Could not process request."}), 500
         wrapper.__name__ = f.__name__ # Preserve original function name for Flask
+        wrapper.authenticates = True # Rate limited in authenticate() rather than by app/admission.py's before_request
         return wrapper
     return decorator
 
 
+def _upsert_google_user(google_user_id, email, name, picture):
+    """
+    Finds or creates the app user for a verified Google identity. A known
+    user whose name and picture are unchanged is read with one SELECT and
+    nothing is written, so repeat sign-ins don't touch the change log, the
+    events or the /users/ ETag. Otherwise INSERT ... ON CONFLICT ... DO
+    UPDATE ... WHERE <something changed> ... RETURNING, which is safe under
+    concurrent first logins. Matches on google_id first, then falls back to
+    email to link a user who was created before their first Google sign-in.
+    A new user gets 'Read Only', or 'Admin' if they are the very first user.
+    """
+    returning = (User.id, User.email, User.google_id, User.name, User.picture, User.role_id)
+    existing = db.session.execute(select(*returning).where(User.google_id == google_user_id)).first()
+    if existing is not None and name in (None, existing.name) and picture in (None, existing.picture):
+        db.session.rollback() # End the read transaction
+        return existing
+
+    roles = get_role_cache()
+    role_expr = case((select(User.id).exists(), roles.id_for('Read Only')), else_=roles.id_for('Admin'))
+    if db.engine.dialect.name == 'postgresql':
+        # Imported here: the postgresql dialect package loads every driver module (~30 ms)
+        from sqlalchemy.dialects.postgresql import insert as insert_fn
+    else:
+        insert_fn = sqlite_insert
+    statement = insert_fn(User).values(
+        email=email,
+        username=email.split('@')[0], # Simple username from email prefix
+        name=name,
+        picture=picture,
+        google_id=google_user_id,
+        role_id=role_expr
+    )
+    # ON CONFLICT updates skip Python-side onupdate values, so set them here
+    refresh = {
+        'name': func.coalesce(statement.excluded.name, User.name), # Update name if provided by Google
+        'picture': func.coalesce(statement.excluded.picture, User.picture),
+        'version': User.version + 1,
+        'updated_at': datetime.datetime.utcnow(),
+    }
+    changed = or_(User.name.is_distinct_from(refresh['name']), User.picture.is_distinct_from(refresh['picture']))
+    options = {'bump_versions': False} # Bumped below, only if a row was written
+    try:
+        app_user = db.session.execute(
+            statement.on_conflict_do_update(index_elements=[User.google_id], set_=refresh, where=changed)
+            .returning(*returning), execution_options=options
+        ).one_or_none()
+    except IntegrityError:
+        # The email belongs to a user without this google_id: link their google_id
+        db.session.rollback()
+        app_user = db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[User.email], set_={**refresh, 'google_id': statement.excluded.google_id},
+            ).returning(*returning), execution_options=options
+        ).one()
+    if app_user is None:
+        # A concurrent sign-in wrote the same values first
+        app_user = db.session.execute(select(*returning).where(User.google_id == google_user_id)).one()
+        db.session.rollback()
+        return app_user
+    bump_versions(db.session.connection(), {'user'})
+    record_changes('user', [app_user.id], 'upsert')
+    db.session.commit()
+    return app_user
+
+
 @auth_bp.route('/google', methods=['POST'])
 @cross_origin() # Keep this decorator here to explicitly handle OPTIONS for this route
 def google_auth_handler():
@@ -78,77 +204,20 @@ def google_auth_handler():
         return jsonify({"error": "Google ID token is missing."}), 400
 
     try:
-        # Verify the Google ID token
-        idinfo = id_token.verify_oauth2_token(token, google_requests.Request(), google_client_id)
+        # Verify the Google ID token against the cached Google certificates
+        idinfo = get_google_verifier().verify(token, google_client_id)
         
         google_user_id = idinfo['sub']
         user_email = idinfo.get('email')
         user_name = idinfo.get('name')
         user_picture = idinfo.get('picture')
 
-        # --- User Lookup / Creation using SQLAlchemy ---
-        # Attempt to find user by google_id first, then by email
-        app_user = User.query.filter_by(google_id=google_user_id).first()
-        if not app_user and user_email:
-            app_user = User.query.filter_by(email=user_email).first()
-            if app_user: # User exists by email, link their google_id
-                app_user.google_id = google_user_id
-                app_user.name = user_name or app_user.name # Update name if provided by Google
-                app_user.picture = user_picture or app_user.picture # Update picture
-        
-        if not app_user:
-            # New user: Create them in your database
-            # Define default roles
-            default_role_name = 'Read Only' # Default for new users
-            # Ensure required roles exist, create if not (for initial setup)
-            task_creator_role = Role.query.filter_by(name='Task Creator').first()
-            admin_role = Role.query.filter_by(name='Admin').first()
-            read_only_role = Role.query.filter_by(name='Read Only').first()
-
-            if not admin_role:
-                admin_role = Role(name='Admin')
-                db.session.add(admin_role)
-            if not task_creator_role:
-                task_creator_role = Role(name='Task Creator')
-                db.session.add(task_creator_role)
-            if not read_only_role:
-                read_only_role = Role(name='Read Only')
-                db.session.add(read_only_role)
-            db.session.flush() # Ensure roles get IDs before assigning
-
-            # Assign 'Read Only' as default for new Google sign-ups
-            role_to_assign = read_only_role 
-            # Optional: For initial setup, if it's the very first user, make them Admin.
-            # This is a simple heuristic and might need more robust logic in production.
-            if not User.query.first(): # If no users exist yet, make the first one Admin
-                role_to_assign = admin_role
-
-            app_user = User(
-                email=user_email,
-                username=user_email.split('@')[0], # Simple username from email prefix
-                name=user_name,
-                picture=user_picture,
-                google_id=google_user_id,
-                role_id=role_to_assign.id
-            )
-            db.session.add(app_user)
-            current_app.logger.info(f"New app user created: {app_user.email} with role: {role_to_assign.name}")
-        else:
-            # Existing user, update details if necessary
-            app_user.name = user_name or app_user.name
-            app_user.picture = user_picture or app_user.picture
-            if not app_user.google_id: # If found by email but google_id was missing
-                app_user.google_id = google_user_id
-            current_app.logger.info(f"Existing app user found: {app_user.email}")
-        
-        db.session.commit() # Commit changes for new or updated user
-
-        # Fetch role name for the user
-        user_role_name = "N/A"
-        if app_user.role_id:
-            role_obj = Role.query.get(app_user.role_id)
-            if role_obj:
-                user_role_name = role_obj.name
+        # --- User upsert: one statement in the common case, two at most ---
+        app_user = _upsert_google_user(google_user_id, user_email, user_name, user_picture)
+        current_app.logger.info(f"App user signed in: {app_user.email}")
+
+        # Role names come from the in-memory role cache, not the DB
+        user_role_name = get_role_cache().name_for(app_user.role_id) or "N/A"
         
         # --- Generate Application Token (JWT) ---
         payload = {
@@ -176,7 +245,7 @@ def google_auth_handler():
             "token": app_token 
         }), 200
 
-    except ValueError as e: # For id_token.verify_oauth2_token errors
+    except ValueError as e: # For Google ID token verification errors
         current_app.logger.error(f"Google token verification failed: {e}")
         return jsonify({"error": "Invalid Google ID token."}), 401
     except Exception as e:
@@ -195,8 +264,8 @@ def get_current_user_profile():
     app_user_id = request.current_user_id
     user_role_name = request.current_user_role
 
-    app_user = User.query.get(app_user_id)
-    
+    app_user = db.session.get(User, app_user_id)
+
     if not app_user:
         return jsonify({"error": "User not found or token invalid."}), 401
 
@@ -207,6 +276,14 @@ def get_current_user_profile():
         "name": app_user.name,
         "picture": app_user.picture,
         "roleId": app_user.role_id,
-        "roleName": user_role_name # Already from token or fetched
+        "roleName": user_role_name # The current role's name, resolved by authenticate()
     }
     return jsonify({"user": frontend_user_profile}), 200
+
+@auth_bp.route('/token-cache', methods=['GET'])
+@role_required(allowed_roles=['Admin'])
+def get_token_cache_stats():
+    """
+    Hit/miss counters and size of the verified-token cache used by role_required.
+    """
+    return jsonify(get_token_cache().stats()), 200
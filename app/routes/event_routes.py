@@ -0,0 +1,47 @@
+# app/routes/event_routes.py
+import json
+from flask import Blueprint, Response, request, jsonify, current_app
+from app.routes.auth_routes import role_required
+from app.events import get_event_backend, event_matches
+
+event_bp = Blueprint('event_routes', __name__, url_prefix='/events')
+
+@event_bp.route('/', methods=['GET'])
+@role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only'], allow_query_token=True)
+def stream_events():
+    """
+    Server-sent event stream of task/project/user create, update and delete
+    events, sent after the writing transaction commits. Each event is named
+    "<resource>.<action>" (action is upsert or delete) and its data is
+    {"resource", "id", "action", "project_id"}.
+    ?project_id=<id> only delivers that project and its tasks.
+    Browsers may pass the app token as ?access_token= since EventSource
+    cannot set headers.
+    """
+    project_id = None
+    if 'project_id' in request.args:
+        project_id = request.args.get('project_id', type=int)
+        if project_id is None:
+            return jsonify({'error': 'project_id must be an integer.'}), 400
+
+    keepalive = current_app.config.get('EVENTS_KEEPALIVE_SECONDS', 15)
+    subscription = get_event_backend().subscribe()
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                message = subscription.get(timeout=keepalive)
+                if message is None:
+                    yield ': keep-alive\n\n' # Comment line keeps proxies from closing the connection
+                    continue
+                staged = json.loads(message)
+                if event_matches(staged, project_id):
+                    yield f"event: {staged['resource']}.{staged['action']}\ndata: {message}\n\n"
+        finally:
+            subscription.close()
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Disable nginx response buffering
+    return response
@@ -0,0 +1,227 @@
+# app/routes/job_routes.py
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+
+from flask import Blueprint, request, jsonify, current_app, send_file, url_for
+from sqlalchemy import update
+from werkzeug.datastructures import MultiDict
+from app.models.job import Job
+from app import db
+from app.routes.auth_routes import role_required
+from app.routes.task_routes import task_list_filters
+from app.jobs import FORMATS, FINISHED, jobs_dir, get_job_runner
+from app.cascade import count_dependents, delete_with_dependents
+
+job_bp = Blueprint('job_routes', __name__, url_prefix='/jobs')
+
+ALL_ROLES = ['Admin', 'Task Creator', 'Read Only']
+EXPORT_FILTERS = ['status', 'owner_id', 'project_id', 'due_after', 'due_before']
+MIMETYPES = {'csv': 'text/csv', 'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+def _job_to_dict(job):
+    data = {
+        'id': job.id,
+        'kind': job.kind,
+        'format': job.format,
+        'status': job.status,
+        'total': job.total,
+        'processed': job.processed,
+        'failed': job.failed,
+        'cancel_requested': job.cancel_requested,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.kind == 'export':
+        data['filters'] = json.loads(job.params or '{}')
+    if job.kind == 'delete':
+        data['target'] = json.loads(job.params)
+    if job.kind == 'export' and job.status == 'completed':
+        data['download_url'] = url_for('job_routes.download_job', job_id=job.id)
+    return data
+
+
+def _visible_job(job_id):
+    """The job, if it exists and the caller created it or is an Admin."""
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return None
+    if request.current_user_role != 'Admin' and job.created_by != request.current_user_id:
+        return None
+    return job
+
+
+def _import_format():
+    """?format=, else the upload's file extension, else the Content-Type."""
+    format = request.args.get('format')
+    if not format and 'file' in request.files:
+        format = os.path.splitext(request.files['file'].filename or '')[1].lstrip('.').lower()
+    if not format:
+        format = {mimetype: name for name, mimetype in MIMETYPES.items()}.get(request.mimetype)
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}.")
+    return format
+
+
+def queued_response(job):
+    """202 with the job and its status URL; also used by the DELETE routes that queue delete jobs."""
+    get_job_runner().notify()
+    response = jsonify({'message': f'{job.kind.capitalize()} job queued', 'job': _job_to_dict(job)})
+    response.status_code = 202
+    response.headers['Location'] = url_for('job_routes.get_job', job_id=job.id)
+    return response
+
+
+def delete_or_queue(resource, row_id):
+    """
+    Deletes a project or user with delete_with_dependents(), or queues a
+    delete job if the caller passed ?async=1 or the row is referenced by more
+    than CASCADE_SYNC_MAX_ROWS rows. Returns the 202 response of a queued
+    job, or None once the row is deleted.
+    """
+    queue = request.args.get('async', '').lower() in ('1', 'true', 'yes')
+    if not queue:
+        queue = count_dependents(resource, row_id) > current_app.config.get('CASCADE_SYNC_MAX_ROWS', 10000)
+    if not queue:
+        delete_with_dependents(resource, row_id)
+        return None
+    job = Job(kind='delete', params=json.dumps({'resource': resource, 'id': row_id}), created_by=request.current_user_id)
+    db.session.add(job)
+    db.session.commit()
+    return queued_response(job)
+
+
+@job_bp.route('/imports', methods=['POST'])
+@role_required(allowed_roles=['Admin', 'Task Creator']) # Same roles that can create tasks
+def create_import():
+    """
+    Queues an import of tasks from a CSV (header row of task fields), JSON
+    (array of task objects) or NDJSON file, sent as the multipart field
+    `file` or as the raw request body. Rows are validated like
+    POST /tasks/bulk creates; invalid rows are skipped and reported by
+    GET /jobs/<id>/errors. Responds 202 with the job; poll GET /jobs/<id>.
+    """
+    max_bytes = current_app.config.get('JOBS_MAX_UPLOAD_BYTES')
+    if max_bytes and (request.content_length or 0) > max_bytes:
+        return jsonify({'error': f'Uploads are limited to {max_bytes} bytes.'}), 413
+    try:
+        format = _import_format()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    upload = request.files.get('file')
+    source = upload.stream if upload is not None else request.stream
+
+    directory = os.path.join(jobs_dir(current_app), 'imports')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{uuid.uuid4().hex}.{format}')
+    with open(path, 'wb') as target:
+        shutil.copyfileobj(source, target, UPLOAD_CHUNK_BYTES)
+    if os.path.getsize(path) == 0:
+        os.remove(path)
+        return jsonify({'error': 'The uploaded file is empty.'}), 400
+
+    job = Job(kind='import', format=format, input_path=path, created_by=request.current_user_id)
+    db.session.add(job)
+    db.session.commit()
+    return queued_response(job)
+
+
+@job_bp.route('/exports', methods=['POST'])
+@role_required(allowed_roles=ALL_ROLES)
+def create_export():
+    """
+    Queues an export of tasks to a file.
+    Body (optional): {"format": "csv" | "json" | "ndjson" (default csv),
+                      "filters": {the GET /tasks/ filters: status, owner_id,
+                                  project_id, due_after, due_before}}
+    Responds 202 with the job; once completed, fetch GET /jobs/<id>/download.
+    """
+    data = request.get_json(silent=True) or {}
+    format = data.get('format', 'csv')
+    if format not in FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(FORMATS)}."}), 400
+    filters = data.get('filters') or {}
+    if not isinstance(filters, dict):
+        return jsonify({'error': 'filters must be an object.'}), 400
+    unknown = set(filters) - set(EXPORT_FILTERS)
+    if unknown:
+        return jsonify({'error': f"Unknown filter(s): {', '.join(sorted(unknown))}"}), 400
+    filters = {key: str(value) for key, value in filters.items()}
+    try:
+        task_list_filters(MultiDict(filters)) # Reject malformed values now rather than in the worker
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    job = Job(kind='export', format=format, params=json.dumps(filters), created_by=request.current_user_id)
+    db.session.add(job)
+    db.session.commit()
+    return queued_response(job)
+
+
+@job_bp.route('/<int:job_id>', methods=['GET'])
+@role_required(allowed_roles=ALL_ROLES)
+def get_job(job_id):
+    """Status and progress of a job created by the caller (Admins see every job)."""
+    job = _visible_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found.'}), 404
+    return jsonify(_job_to_dict(job))
+
+
+@job_bp.route('/<int:job_id>/errors', methods=['GET'])
+@role_required(allowed_roles=ALL_ROLES)
+def get_job_errors(job_id):
+    """
+    The job's error report: {"failed": <rows rejected>, "errors": [{"row", "error"}]}.
+    Row numbers count data rows from 1; an error with a null row failed the whole job.
+    """
+    job = _visible_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found.'}), 404
+    errors = json.loads(job.errors or '[]')
+    return jsonify({'id': job.id, 'status': job.status, 'failed': job.failed, 'errors': errors,
+                    'truncated': job.failed > len([error for error in errors if error['row'] is not None])})
+
+
+@job_bp.route('/<int:job_id>/download', methods=['GET'])
+@role_required(allowed_roles=ALL_ROLES)
+def download_job(job_id):
+    """The file written by a completed export job."""
+    job = _visible_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found.'}), 404
+    if job.kind != 'export' or job.status != 'completed' or not job.output_path:
+        return jsonify({'error': 'Only completed export jobs have a download.'}), 409
+    if not os.path.exists(job.output_path):
+        return jsonify({'error': 'The export file is no longer available.'}), 410
+    return send_file(job.output_path, mimetype=MIMETYPES[job.format], as_attachment=True,
+                     download_name=f'tasks-{job.id}.{job.format}')
+
+
+@job_bp.route('/<int:job_id>/cancel', methods=['POST'])
+@role_required(allowed_roles=ALL_ROLES)
+def cancel_job(job_id):
+    """
+    Cancels a job. A queued job is cancelled at once; a running one stops
+    after its current chunk (rows already imported stay imported).
+    """
+    job = _visible_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found.'}), 404
+    if job.status in FINISHED:
+        return jsonify({'error': f'Job is already {job.status}.'}), 409
+    # Conditional updates, so a worker claiming the job at the same moment is handled either way
+    cancelled = db.session.execute(
+        update(Job).where(Job.id == job_id, Job.status == 'queued')
+        .values(status='cancelled', cancel_requested=True, finished_at=datetime.utcnow())
+    ).rowcount
+    if not cancelled:
+        db.session.execute(update(Job).where(Job.id == job_id, Job.status == 'running').values(cancel_requested=True))
+    db.session.commit()
+    db.session.refresh(job)
+    return jsonify({'message': 'Job cancelled' if cancelled else 'Cancellation requested', 'job': _job_to_dict(job)}), 202
@@ -0,0 +1,19 @@
+# app/routes/metrics_routes.py
+import hmac
+
+from flask import Blueprint, Response, current_app, request, jsonify
+from app.metrics import get_metrics
+
+metrics_bp = Blueprint('metrics_routes', __name__, url_prefix='/metrics')
+
+@metrics_bp.route('', methods=['GET'])
+def prometheus_metrics():
+    """
+    Request, SQL, JWT and serialisation metrics in the Prometheus text format.
+    Scrapers send the METRICS_TOKEN as a bearer token when one is configured;
+    app tokens are not used so the scraper needs no user account.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'Authorization token is missing or invalid.'}), 401
+    return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
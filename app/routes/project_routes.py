@@ -1,9 +1,17 @@
 # app/routes/project_routes.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.models.project import Project
+from app.models.task import Task
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
 from app import db
 from datetime import datetime
 from app.routes.auth_routes import role_required # Import the decorator
+from app.routes.job_routes import delete_or_queue
+from app.routes.task_routes import CONSTRAINT_ERROR
+from app.streaming import wants_stream, ndjson_response
+from app.serializers import project_serializer, json_response, list_response, parse_layout
+from app.versioning import conditional, row_version, row_validators, is_not_modified, not_modified_response, set_validators
 
 project_bp = Blueprint('project_routes', __name__, url_prefix='/projects')
 
@@ -32,6 +40,9 @@ def create_project():
         return jsonify({'error': f"Missing required field: {e}"}), 400
     except ValueError as e:
         return jsonify({'error': f"Invalid date format. Please use ISO-MM-DD: {e}"}), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': CONSTRAINT_ERROR}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -56,42 +67,117 @@ def update_project(project_id):
         except ValueError:
             return jsonify({'error': 'Invalid end_date format. Please use ISO-MM-DD.'}), 400
 
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': CONSTRAINT_ERROR}), 409
     return jsonify({'message': 'Project updated successfully'})
 
 @project_bp.route('/<int:project_id>', methods=['DELETE'])
 @role_required(allowed_roles=['Admin']) # Only Admin can delete projects
 def delete_project(project_id):
-    project = Project.query.get_or_404(project_id)
-    db.session.delete(project)
-    db.session.commit()
-    return jsonify({'message': 'Project deleted successfully'})
+    """
+    Deletes the project; its tasks are kept, without a project. Projects
+    with many tasks (or ?async=1) are deleted by a background job: responds
+    202 with the job, poll GET /jobs/<id>.
+    """
+    if db.session.get(Project, project_id) is None:
+        return jsonify({'error': 'Project not found.'}), 404
+    try:
+        queued = delete_or_queue('project', project_id)
+        if queued is not None:
+            return queued
+        return jsonify({'message': 'Project deleted successfully'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
 
 @project_bp.route('/', methods=['GET'])
 @role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only']) # All roles can list projects
+@conditional('project')
 def list_projects():
-    projects = Project.query.all()
-    result = []
-    for project in projects:
-        result.append({
-            'id': project.id,
-            'name': project.name,
-            'description': project.description,
-            'start_date': str(project.start_date) if project.start_date else None,
-            'end_date': str(project.end_date) if project.end_date else None,
-            'owner_id': project.owner_id
-        })
-    return jsonify(result)
+    try:
+        fields = project_serializer.parse_fields()
+        layout = parse_layout()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = project_serializer.query(fields).order_by(Project.id)
+
+    if wants_stream():
+        return ndjson_response(query, project_serializer.to_dict)
+
+    result = [project_serializer.to_dict(project) for project in query.all()]
+    return list_response(result, fields, layout)
 
 @project_bp.route('/<int:project_id>', methods=['GET'])
 @role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only']) # All roles can get a single project
 def get_project(project_id):
-    project = Project.query.get_or_404(project_id)
-    return jsonify({
-        'id': project.id,
-        'name': project.name,
-        'description': project.description,
-        'start_date': str(project.start_date) if project.start_date else None,
-        'end_date': str(project.end_date) if project.end_date else None,
-        'owner_id': project.owner_id
-    })
+    try:
+        fields = project_serializer.parse_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    version = row_version(Project, project_id)
+    if version is None:
+        return jsonify({'error': 'Project not found.'}), 404
+    etag, last_modified = row_validators('project', project_id, *version)
+    if is_not_modified(etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    project = project_serializer.query(fields).filter(Project.id == project_id).first()
+    if project is None:
+        return jsonify({'error': 'Project not found.'}), 404
+    return set_validators(json_response(project_serializer.to_dict(project)), etag, last_modified)
+
+def _today():
+    return datetime.utcnow().date()
+
+def _task_stats(project_ids=None):
+    """
+    Per-project task counts by status plus overdue counts, computed with two
+    GROUP BY queries answered from the (project_id, status, due_date) index.
+    Returns {project_id: {'total', 'by_status', 'overdue'}}.
+    """
+    done_statuses = current_app.config.get('TASK_DONE_STATUSES', ['completed'])
+    by_status = db.session.query(Task.project_id, Task.status, func.count()).filter(Task.project_id.isnot(None))
+    overdue = db.session.query(Task.project_id, func.count()).filter(
+        Task.project_id.isnot(None),
+        Task.due_date < _today(),
+        or_(Task.status.is_(None), Task.status.notin_(done_statuses))
+    )
+    if project_ids is not None:
+        by_status = by_status.filter(Task.project_id.in_(project_ids))
+        overdue = overdue.filter(Task.project_id.in_(project_ids))
+
+    stats = {}
+    for project_id, status, count in by_status.group_by(Task.project_id, Task.status):
+        entry = stats.setdefault(project_id, {'total': 0, 'by_status': {}, 'overdue': 0})
+        entry['total'] += count
+        entry['by_status'][status or 'none'] = count
+    for project_id, count in overdue.group_by(Task.project_id):
+        stats.setdefault(project_id, {'total': 0, 'by_status': {}, 'overdue': 0})['overdue'] = count
+    return stats
+
+@project_bp.route('/stats', methods=['GET'])
+@role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only']) # All roles can view the dashboard
+@conditional('project', 'task', extra=_today) # Overdue counts change at midnight
+def list_project_stats():
+    """
+    Dashboard counters for every project: total tasks, tasks per status and
+    overdue tasks (past due_date and not in TASK_DONE_STATUSES).
+    """
+    stats = _task_stats()
+    result = []
+    for (project_id,) in db.session.query(Project.id).order_by(Project.id):
+        entry = stats.get(project_id, {'total': 0, 'by_status': {}, 'overdue': 0})
+        result.append({'project_id': project_id, **entry})
+    return json_response(result)
+
+@project_bp.route('/<int:project_id>/stats', methods=['GET'])
+@role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only']) # All roles can view the dashboard
+@conditional('project', 'task', extra=_today) # Overdue counts change at midnight
+def get_project_stats(project_id):
+    if row_version(Project, project_id) is None:
+        return jsonify({'error': 'Project not found.'}), 404
+    entry = _task_stats([project_id]).get(project_id, {'total': 0, 'by_status': {}, 'overdue': 0})
+    return json_response({'project_id': project_id, **entry})
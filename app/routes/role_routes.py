@@ -1,8 +1,12 @@
 # app/routes/role_routes.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from app.models.role import Role # Corrected import for Role model
 from app import db
 from app.routes.auth_routes import role_required # Import the decorator
+from app.streaming import wants_stream, NDJSON_MIMETYPE
+from app.serializers import role_serializer, dumps, list_response, parse_layout
+from app.versioning import content_etag, is_not_modified, not_modified_response, set_validators
+from app.roles import get_role_cache
 
 bp = Blueprint('role_routes', __name__, url_prefix='/roles') # Changed name and url_prefix
 
@@ -14,6 +18,7 @@ def create_role(): # Changed function name
         role = Role(name=data['name']) # Assuming Role model only needs 'name'
         db.session.add(role)
         db.session.commit()
+        get_role_cache().invalidate()
         return jsonify({'message': 'Role created successfully', 'role_id': role.id}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -26,6 +31,7 @@ def update_role(role_id): # Changed function name
     if 'name' in data:
         setattr(role, 'name', data['name'])
     db.session.commit()
+    get_role_cache().invalidate() # authenticate() resolves role names through the registry
     return jsonify({'message': 'Role updated successfully'})
 
 @bp.route('/<int:role_id>', methods=['DELETE'])
@@ -34,19 +40,48 @@ def delete_role(role_id): # Changed function name
     role = Role.query.get_or_404(role_id)
     db.session.delete(role)
     db.session.commit()
+    get_role_cache().invalidate()
     return jsonify({'message': 'Role deleted successfully'})
 
+def _select_fields(role, fields):
+    return {field: role[field] for field in fields}
+
 @bp.route('/', methods=['GET'])
 @role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only']) # All roles can list roles
 def list_roles(): # Changed function name
-    roles = Role.query.all()
-    result = []
-    for role in roles:
-        result.append({'id': role.id, 'name': role.name})
-    return jsonify(result)
+    """
+    Served from the in-memory role registry; the ETag is derived from the
+    body, so If-None-Match still works without a DB round-trip.
+    """
+    try:
+        fields = role_serializer.parse_fields()
+        layout = parse_layout()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    result = [_select_fields(role, fields) for role in get_role_cache().all()]
+
+    if wants_stream():
+        return Response(''.join(dumps(role) + '\n' for role in result), mimetype=NDJSON_MIMETYPE)
+
+    response = list_response(result, fields, layout)
+    etag = content_etag(response.get_data())
+    if is_not_modified(etag, None):
+        return not_modified_response(etag, None)
+    return set_validators(response, etag, None)
 
 @bp.route('/<int:role_id>', methods=['GET'])
 @role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only']) # All roles can get a single role
 def get_role(role_id): # Changed function name
-    role = Role.query.get_or_404(role_id)
-    return jsonify({'id': role.id, 'name': role.name})
+    try:
+        fields = role_serializer.parse_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    name = get_role_cache().name_for(role_id)
+    if name is None:
+        return jsonify({'error': 'Role not found.'}), 404
+
+    body = dumps(_select_fields({'id': role_id, 'name': name}, fields))
+    etag = content_etag(body)
+    if is_not_modified(etag, None):
+        return not_modified_response(etag, None)
+    return set_validators(Response(body, mimetype='application/json'), etag, None)
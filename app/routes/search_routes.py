@@ -0,0 +1,53 @@
+# app/routes/search_routes.py
+from flask import Blueprint, request, jsonify
+from app.routes.auth_routes import role_required
+from app.pagination import parse_limit
+from app.search import SEARCH_MODELS, parse_terms, search
+from app.serializers import task_serializer, project_serializer, json_response
+
+search_bp = Blueprint('search_routes', __name__, url_prefix='/search')
+
+SERIALIZERS = {'task': task_serializer, 'project': project_serializer}
+
+@search_bp.route('/', methods=['GET'])
+@role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only']) # All roles can search
+def search_all():
+    """
+    Ranked full-text search over task descriptions and project names and
+    descriptions. Every word of ?q= must match; the last also matches as a
+    prefix. ?type=task|project restricts the search; ?limit and ?offset page
+    through the results (the next page's offset is returned as next_offset).
+    """
+    terms = parse_terms(request.args.get('q'))
+    if not terms:
+        return jsonify({'error': 'q must contain at least one word.'}), 400
+    types = list(SEARCH_MODELS)
+    if request.args.get('type'):
+        if request.args['type'] not in SEARCH_MODELS:
+            return jsonify({'error': "type must be 'task' or 'project'."}), 400
+        types = [request.args['type']]
+    try:
+        limit = parse_limit()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    offset = request.args.get('offset', 0, type=int)
+    if offset is None or offset < 0:
+        return jsonify({'error': 'offset must be a non-negative integer.'}), 400
+
+    hits = search(terms, types, limit + 1, offset)
+    next_offset = offset + limit if len(hits) > limit else None
+    hits = hits[:limit]
+
+    # Hydrate the hits with one IN query per type, then restore rank order
+    rows = {}
+    for name in types:
+        ids = [hit.id for hit in hits if hit.type == name]
+        if ids:
+            model = SEARCH_MODELS[name]
+            for row in SERIALIZERS[name].query().filter(model.id.in_(ids)):
+                rows[(name, row.id)] = SERIALIZERS[name].to_dict(row)
+    results = [
+        {'type': hit.type, 'score': hit.score, **rows[(hit.type, hit.id)]}
+        for hit in hits if (hit.type, hit.id) in rows
+    ]
+    return json_response({'results': results, 'next_offset': next_offset})
@@ -0,0 +1,108 @@
+# app/routes/sync_routes.py
+from flask import Blueprint, request, jsonify, current_app
+from app.models.change_log import ChangeLog
+from app.models.task import Task
+from app.models.project import Project
+from app.models.user import User
+from app import db
+from sqlalchemy import func, select, tuple_
+from app.routes.auth_routes import role_required
+from app.serializers import task_serializer, project_serializer, user_serializer, json_response
+
+sync_bp = Blueprint('sync_routes', __name__, url_prefix='/sync')
+
+SYNC_RESOURCES = {
+    'task': (Task, task_serializer),
+    'project': (Project, project_serializer),
+    'user': (User, user_serializer),
+}
+
+def _orders_by_txid():
+    """
+    True on Postgres, where change_log ids are allocated before commit and
+    concurrent transactions can commit out of id order; the cursor is then
+    "<txid>.<id>" (see ChangeLog). SQLite commits one writer at a time, so
+    there the cursor is the entry id.
+    """
+    return db.engine.dialect.name == 'postgresql'
+
+def _parse_cursor(raw, commit_ordered):
+    """Returns the cursor as (txid, id); raises ValueError if it isn't one /sync returned."""
+    txid, _, entry_id = raw.rpartition('.') if commit_ordered else ('', '', raw)
+    try:
+        txid, entry_id = int(txid or 0), int(entry_id)
+    except ValueError:
+        raise ValueError('cursor must be 0 or the cursor of a previous response.')
+    if txid < 0 or entry_id < 0:
+        raise ValueError('cursor must be 0 or the cursor of a previous response.')
+    if commit_ordered and raw.isdigit() and entry_id:
+        # A plain id from before cursors carried the txid; resume after that entry's transaction
+        txid = db.session.scalar(select(ChangeLog.txid).where(ChangeLog.id == entry_id)) or 0
+    return txid, entry_id
+
+@sync_bp.route('/', methods=['GET'])
+@role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only'])
+def sync_changes():
+    """
+    Returns what changed since ?cursor=<the previous response's cursor> (0 or
+    absent for everything logged). Treat the cursor as opaque: it is the
+    entry id on SQLite and "<txid>.<id>" on Postgres.
+    Response: {"cursor": <pass back next time>, "has_more": bool,
+               "changes": {"task": {"upserted": [rows], "deleted": [ids]}, ...}}
+    Several changes to the same row collapse into its latest state, so the
+    payload scales with the number of rows changed, not the table size.
+    Optional: ?resources=task,project to restrict, ?limit=<log entries>.
+    """
+    commit_ordered = _orders_by_txid()
+    try:
+        cursor_txid, cursor_id = _parse_cursor(request.args.get('cursor') or '0', commit_ordered)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    max_limit = current_app.config.get('SYNC_MAX_CHANGES', 5000)
+    limit = request.args.get('limit', max_limit, type=int)
+    if limit is None or limit < 1:
+        return jsonify({'error': 'limit must be a positive integer.'}), 400
+    limit = min(limit, max_limit)
+    resources = list(SYNC_RESOURCES)
+    if request.args.get('resources'):
+        resources = [name.strip() for name in request.args['resources'].split(',') if name.strip()]
+        unknown = [name for name in resources if name not in SYNC_RESOURCES]
+        if unknown:
+            return jsonify({'error': f"Unknown resource(s): {', '.join(unknown)}"}), 400
+
+    query = db.session.query(ChangeLog.id, ChangeLog.txid, ChangeLog.resource, ChangeLog.resource_id, ChangeLog.action) \
+        .filter(ChangeLog.resource.in_(resources))
+    if commit_ordered:
+        # Only entries of transactions older than every one still in flight: no entry can
+        # ever be committed before them in (txid, id) order, so the cursor never skips one
+        query = query.filter(tuple_(ChangeLog.txid, ChangeLog.id) > tuple_(cursor_txid, cursor_id),
+                             ChangeLog.txid < func.txid_snapshot_xmin(func.txid_current_snapshot())) \
+            .order_by(ChangeLog.txid, ChangeLog.id)
+    else:
+        query = query.filter(ChangeLog.id > cursor_id).order_by(ChangeLog.id)
+    entries = query.limit(limit + 1).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Keep only the latest action per row
+    latest = {}
+    for entry in entries:
+        latest[(entry.resource, entry.resource_id)] = entry.action
+
+    changes = {}
+    for name in resources:
+        model, serializer = SYNC_RESOURCES[name]
+        upserted_ids = [row_id for (resource, row_id), action in latest.items() if resource == name and action == 'upsert']
+        deleted_ids = [row_id for (resource, row_id), action in latest.items() if resource == name and action == 'delete']
+        rows = []
+        if upserted_ids:
+            rows = [serializer.to_dict(row) for row in serializer.query().filter(model.id.in_(upserted_ids)).order_by(model.id)]
+            # Rows deleted after this window are reported as deleted now
+            found = {row['id'] for row in rows}
+            deleted_ids += [row_id for row_id in upserted_ids if row_id not in found]
+        changes[name] = {'upserted': rows, 'deleted': sorted(deleted_ids)}
+
+    if entries:
+        cursor_txid, cursor_id = entries[-1].txid, entries[-1].id
+    next_cursor = f'{cursor_txid}.{cursor_id}' if commit_ordered else cursor_id
+    return json_response({'cursor': next_cursor, 'has_more': has_more, 'changes': changes})
@@ -1,9 +1,17 @@
 # app/routes/task_routes.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import DataError, IntegrityError
 from app.models.task import Task
 from app import db
 from datetime import datetime
 from app.routes.auth_routes import role_required # Import the decorator
+from app.pagination import parse_limit, parse_cursor, keyset_page, set_pagination_headers
+from app.streaming import wants_stream, ndjson_response
+from app.serializers import task_serializer, json_response, list_response, parse_layout
+from app.changelog import record_changes
+from app.engine import begin_transaction
+from app.versioning import conditional, row_version, row_validators, is_not_modified, not_modified_response, set_validators
 
 bp = Blueprint('task_routes', __name__, url_prefix='/tasks')
 
@@ -35,6 +43,9 @@ def create_task():
     except KeyError as e:
         # Handle missing required fields
         return jsonify({'error': f"Missing required field: {e}"}), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': CONSTRAINT_ERROR}), 409
     except Exception as e:
         # Catch any other unexpected errors
         db.session.rollback() # Rollback the transaction in case of an error
@@ -78,6 +89,9 @@ def update_task(task_id):
     try:
         db.session.commit()
         return jsonify({'message': 'Task updated successfully'})
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': CONSTRAINT_ERROR}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
@@ -95,31 +109,269 @@ def delete_task(task_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+TASK_FIELDS = ['description', 'due_date', 'status', 'owner_id', 'project_id']
+
+def validate_task_operation(operation):
+    """
+    Checks a single /tasks/bulk (or import job) operation and returns it
+    normalised as (op, task_id, values). Raises ValueError with a
+    client-facing message.
+    """
+    if not isinstance(operation, dict):
+        raise ValueError('Each operation must be an object.')
+    op = operation.get('op')
+    if op not in ('create', 'update', 'delete'):
+        raise ValueError("op must be one of 'create', 'update' or 'delete'.")
+
+    task_id = None
+    if op in ('update', 'delete'):
+        task_id = operation.get('id')
+        if not isinstance(task_id, int) or isinstance(task_id, bool):
+            raise ValueError(f'{op} requires an integer id.')
+    if op == 'delete':
+        return op, task_id, None
+
+    data = operation.get('data')
+    if not isinstance(data, dict):
+        raise ValueError(f'{op} requires a data object.')
+    unknown = set(data) - set(TASK_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    if op == 'create' and not data.get('description'):
+        raise ValueError('Missing required field: description')
+    if op == 'update' and not data:
+        raise ValueError('update requires at least one field.')
+    # Checked here rather than left to the database, so one bad row fails alone with a readable error
+    if 'description' in data and (not isinstance(data['description'], str) or not data['description'].strip()):
+        raise ValueError('description must be a non-empty string.')
+    status = data.get('status')
+    if status is not None and not isinstance(status, str):
+        raise ValueError('status must be a string or null.')
+    if status is not None and len(status) > Task.status.type.length:
+        raise ValueError(f'status must be at most {Task.status.type.length} characters.')
+    for key in ('owner_id', 'project_id'):
+        value = data.get(key)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            raise ValueError(f'{key} must be an integer or null.')
+
+    values = dict(data)
+    if values.get('due_date'):
+        try:
+            values['due_date'] = datetime.strptime(values['due_date'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            raise ValueError('Invalid due_date format. Please use ISO-MM-DD or null.')
+    elif 'due_date' in values:
+        values['due_date'] = None
+    return op, task_id, values
+
+CONSTRAINT_ERROR = 'Rejected by the database, e.g. an owner_id or project_id that does not exist.'
+
+def apply_in_savepoints(results, chunk, apply):
+    """
+    Runs apply(chunk) in a savepoint. If the database rejects the batch,
+    retries its operations one at a time, each in its own savepoint, so a
+    bad row fails only its own result. `apply` fills in the results of the
+    operations it applies; each item's first element is its index.
+    """
+    try:
+        with db.session.begin_nested():
+            apply(chunk)
+        return
+    except (IntegrityError, DataError):
+        pass
+    for item in chunk:
+        try:
+            with db.session.begin_nested():
+                apply([item])
+        except (IntegrityError, DataError):
+            results[item[0]] = {'index': item[0], 'status': 409, 'error': CONSTRAINT_ERROR}
+
+def insert_tasks(rows):
+    """Inserts task rows (dicts of TASK_FIELDS) and returns their new ids, in the rows' order."""
+    # Rows with different keys (or None values, without render_nulls) are split
+    # into separate statements; none of TASK_FIELDS has a default, so a
+    # missing field is stored as NULL either way
+    keys = set().union(*rows)
+    rows = [{key: row.get(key) for key in keys} for row in rows]
+    options = {'render_nulls': True}
+    connection = db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        return db.session.scalars(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows,
+                                  execution_options=options).all()
+    # SQLite can't tie RETURNING rows to their parameters, so the statement
+    # above would run one INSERT per row there. A plain executemany runs one
+    # prepared statement instead: the transaction holds SQLite's write lock
+    # and each row takes the next rowid, so the new ids are the last len(rows)
+    # up to last_insert_rowid().
+    db.session.execute(insert(Task), rows, execution_options=options)
+    last_id = connection.exec_driver_sql('SELECT last_insert_rowid()').scalar()
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+@bp.route('/bulk', methods=['POST'])
+@role_required(allowed_roles=['Admin', 'Task Creator']) # Same roles that can create and delete tasks
+def bulk_tasks():
+    """
+    Applies many task operations in one transaction; each one succeeds or
+    fails on its own.
+    Body: {"operations": [{"op": "create", "data": {...}},
+                          {"op": "update", "id": 1, "data": {...}},
+                          {"op": "delete", "id": 2}]}
+    Valid operations are grouped into executemany-style INSERT, UPDATE and
+    DELETE statements of at most TASK_BULK_BATCH_SIZE rows each (creates,
+    then updates, then deletes), each batch in a savepoint; a batch the
+    database rejects is retried row by row, and the rejected rows get a 409.
+    An operation on an id deleted earlier in the request gets a 404.
+    Returns one result per operation, in order.
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list):
+        return jsonify({'error': 'operations must be a list.'}), 400
+    max_operations = current_app.config.get('TASK_BULK_MAX_OPERATIONS', 100000)
+    if len(operations) > max_operations:
+        return jsonify({'error': f'At most {max_operations} operations are allowed per request.'}), 400
+    batch_size = current_app.config.get('TASK_BULK_BATCH_SIZE', 1000)
+
+    results = [None] * len(operations)
+    creates, updates, deletes = [], [], []
+    deleted = set() # Ids deleted by an earlier operation; later ones on them find no task
+    for index, operation in enumerate(operations):
+        try:
+            op, task_id, values = validate_task_operation(operation)
+        except ValueError as e:
+            results[index] = {'index': index, 'status': 400, 'error': str(e)}
+            continue
+        if task_id in deleted:
+            results[index] = {'index': index, 'status': 404, 'id': task_id, 'error': 'Task not found.'}
+            continue
+        if op == 'create':
+            creates.append((index, values))
+        elif op == 'update':
+            updates.append((index, task_id, values))
+        else:
+            deletes.append((index, task_id))
+            deleted.add(task_id)
+
+    # Look up which referenced ids exist (and their projects), one IN query per batch
+    referenced_ids = [item[1] for item in updates + deletes]
+    project_ids = {}
+    for start in range(0, len(referenced_ids), batch_size):
+        chunk = referenced_ids[start:start + batch_size]
+        project_ids.update(db.session.execute(select(Task.id, Task.project_id).where(Task.id.in_(chunk))).all())
+    existing_ids = set(project_ids)
+    for index, task_id, *_ in updates + deletes:
+        if task_id not in existing_ids:
+            results[index] = {'index': index, 'status': 404, 'id': task_id, 'error': 'Task not found.'}
+    updates = [item for item in updates if item[1] in existing_ids]
+    deletes = [item for item in deletes if item[1] in existing_ids]
+
+    def apply_creates(chunk):
+        new_ids = insert_tasks([values for _, values in chunk])
+        record_changes('task', new_ids, 'upsert',
+                       project_ids={task_id: values.get('project_id') for (_, values), task_id in zip(chunk, new_ids)})
+        for (index, _), task_id in zip(chunk, new_ids):
+            results[index] = {'index': index, 'status': 201, 'id': task_id}
+
+    def apply_updates(chunk):
+        db.session.execute(update(Task), [{'id': task_id, **values} for _, task_id, values in chunk])
+        record_changes('task', [task_id for _, task_id, _ in chunk], 'upsert',
+                       project_ids={task_id: values.get('project_id', project_ids[task_id]) for _, task_id, values in chunk})
+        for index, task_id, _ in chunk:
+            results[index] = {'index': index, 'status': 200, 'id': task_id}
+
+    def apply_deletes(chunk):
+        db.session.execute(delete(Task).where(Task.id.in_([task_id for _, task_id in chunk])))
+        record_changes('task', [task_id for _, task_id in chunk], 'delete', project_ids=project_ids)
+        for index, task_id in chunk:
+            results[index] = {'index': index, 'status': 200, 'id': task_id}
+
+    try:
+        begin_transaction(db.session) # So releasing the first savepoint doesn't commit on SQLite
+        for items, apply in ((creates, apply_creates), (updates, apply_updates), (deletes, apply_deletes)):
+            for start in range(0, len(items), batch_size):
+                apply_in_savepoints(results, items[start:start + batch_size], apply)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback() # Nothing from this request is applied
+        current_app.logger.error(f"Bulk task operations failed: {e}", exc_info=True)
+        return jsonify({'error': 'Could not apply the operations; none were applied.'}), 500
+
+    applied = sum(1 for result in results if result['status'] < 400)
+    return jsonify({'message': f'{applied} of {len(operations)} operations applied', 'results': results})
+
+def task_list_filters(args=None):
+    """
+    Returns the WHERE criteria for the list filters in `args` (default: the
+    query string): status, owner_id, project_id and the inclusive
+    due_after / due_before bounds. Raises ValueError on a malformed value.
+    """
+    args = request.args if args is None else args
+    criteria = []
+    if 'status' in args:
+        criteria.append(Task.status == args['status'])
+    for key in ['owner_id', 'project_id']:
+        if key in args:
+            value = args.get(key, type=int)
+            if value is None:
+                raise ValueError(f'{key} must be an integer.')
+            criteria.append(getattr(Task, key) == value)
+    for key in ['due_after', 'due_before']:
+        if key in args:
+            try:
+                bound = datetime.strptime(args[key], '%Y-%m-%d').date()
+            except ValueError:
+                raise ValueError(f'Invalid {key} format. Please use ISO-MM-DD.')
+            if key == 'due_after':
+                criteria.append(Task.due_date >= bound)
+            else:
+                criteria.append(Task.due_date <= bound)
+    return criteria
+
 @bp.route('/', methods=['GET'])
 @role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only']) # All roles can list tasks
+@conditional('task')
 def list_tasks():
-    tasks = Task.query.all()
-    result = []
-    for task in tasks:
-        result.append({
-            'id': task.id,
-            'description': task.description,
-            'due_date': str(task.due_date) if task.due_date else None, # Convert date object to string for JSON
-            'status': task.status,
-            'owner_id': task.owner_id,
-            'project_id': task.project_id
-        })
-    return jsonify(result)
+    """
+    Lists tasks one page at a time using keyset pagination on id.
+    Optional filters: status, owner_id, project_id, due_after, due_before.
+    ?fields=a,b selects a subset of the task fields.
+    The next page is requested with ?cursor=<X-Next-Cursor header value>.
+    Pass ?stream=1 (or Accept: application/x-ndjson) to stream all matches.
+    """
+    try:
+        limit = parse_limit()
+        cursor = parse_cursor()
+        fields = task_serializer.parse_fields()
+        layout = parse_layout()
+        criteria = task_list_filters()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = task_serializer.query(fields).filter(*criteria)
+
+    # Streaming mode: dump every matching task as NDJSON, ignoring limit/cursor
+    if wants_stream():
+        return ndjson_response(query.order_by(Task.id), task_serializer.to_dict)
+
+    tasks, next_cursor = keyset_page(query, Task.id, limit, cursor)
+    result = [task_serializer.to_dict(task) for task in tasks]
+    return set_pagination_headers(list_response(result, fields, layout), next_cursor)
 
 @bp.route('/<int:task_id>', methods=['GET'])
 @role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only']) # All roles can get a single task
 def get_task(task_id):
-    task = Task.query.get_or_404(task_id)
-    return jsonify({
-        'id': task.id,
-        'description': task.description,
-        'due_date': str(task.due_date) if task.due_date else None, # Convert date object to string for JSON
-        'status': task.status,
-        'owner_id': task.owner_id,
-        'project_id': task.project_id
-    })
+    try:
+        fields = task_serializer.parse_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    version = row_version(Task, task_id)
+    if version is None:
+        return jsonify({'error': 'Task not found.'}), 404
+    etag, last_modified = row_validators('task', task_id, *version)
+    if is_not_modified(etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    task = task_serializer.query(fields).filter(Task.id == task_id).first()
+    if task is None:
+        return jsonify({'error': 'Task not found.'}), 404
+    return set_validators(json_response(task_serializer.to_dict(task)), etag, last_modified)
@@ -1,13 +1,21 @@
 # app/routes/user_routes.py
 
 from flask import Blueprint, request, jsonify
+from sqlalchemy import false
 from app.models.user import User
-from app.models.role import Role # Ensure Role is imported
 from app import db
 from app.routes.auth_routes import role_required
+from app.routes.job_routes import delete_or_queue
+from app.pagination import parse_limit, parse_cursor, keyset_page, set_pagination_headers
+from app.streaming import wants_stream, ndjson_response
+from app.serializers import user_serializer, json_response, list_response, parse_layout
+from app.versioning import conditional, row_version, row_validators, is_not_modified, not_modified_response, set_validators
+from app.token_cache import get_token_cache
+from app.roles import get_role_cache
 
 bp = Blueprint('user_routes', __name__, url_prefix='/users')
 
+
 # --- Other routes like POST, PUT, DELETE remain the same ---
 @bp.route('/', methods=['POST'])
 @role_required(allowed_roles=['Admin'])
@@ -31,6 +39,9 @@ def update_user(id):
         for key, value in data.items():
             setattr(user, key, value)
         db.session.commit()
+        # Cached tokens must not keep authorising the user's previous role
+        if 'role_id' in data:
+            get_token_cache().invalidate_user(user.id)
         return jsonify({'message': 'User updated successfully'})
     except Exception as e:
         db.session.rollback()
@@ -39,10 +50,18 @@ def update_user(id):
 @bp.route('/<int:id>', methods=['DELETE'])
 @role_required(allowed_roles=['Admin'])
 def delete_user(id):
-    user = User.query.get_or_404(id)
+    """
+    Deletes the user; tasks and projects they own are kept, without an
+    owner. Users who own many rows (or ?async=1) are deleted by a background
+    job: responds 202 with the job, poll GET /jobs/<id>.
+    """
+    if db.session.get(User, id) is None:
+        return jsonify({'error': 'User not found.'}), 404
     try:
-        db.session.delete(user)
-        db.session.commit()
+        queued = delete_or_queue('user', id)
+        get_token_cache().invalidate_user(id)
+        if queued is not None:
+            return queued
         return jsonify({'message': 'User deleted successfully'})
     except Exception as e:
         db.session.rollback()
@@ -53,24 +72,41 @@ def delete_user(id):
 # --- REVISED list_users FUNCTION ---
 @bp.route('/', methods=['GET'])
 @role_required(allowed_roles=['Admin', 'Task Creator', 'Read Only'])
+@conditional('user', 'role')
 def list_users():
     """
-    Retrieves a list of all users, correctly including their role name.
+    Retrieves a page of users, correctly including their role name.
+    Role names come from the in-memory role registry, so the query count
+    does not grow with the number of users. Optional filters: role (name),
+    role_id. ?fields=a,b selects a subset of the user fields.
+    The next page is requested with ?cursor=<X-Next-Cursor header value>.
+    Pass ?stream=1 (or Accept: application/x-ndjson) to stream it as NDJSON.
     """
-    users = User.query.all()
-    result = []
-    for user in users:
-        # This check ensures that if a user's role is deleted, the app doesn't crash.
-        role_name = user.role.name if user.role else None
+    try:
+        limit = parse_limit()
+        cursor = parse_cursor()
+        fields = user_serializer.parse_fields()
+        layout = parse_layout()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        result.append({
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'role_id': user.role_id,
-            'roleName': role_name  # The crucial field for the frontend filter
-        })
-    return jsonify(result)
+    query = user_serializer.query(fields)
+    if 'role' in request.args:
+        # Resolved through the role registry; an unknown name matches no users
+        role_id = get_role_cache().id_for(request.args['role'])
+        query = query.filter(User.role_id == role_id if role_id is not None else false())
+    if 'role_id' in request.args:
+        role_id = request.args.get('role_id', type=int)
+        if role_id is None:
+            return jsonify({'error': 'role_id must be an integer.'}), 400
+        query = query.filter(User.role_id == role_id)
+
+    if wants_stream():
+        return ndjson_response(query.order_by(User.id), user_serializer.to_dict)
+
+    users, next_cursor = keyset_page(query, User.id, limit, cursor)
+    result = [user_serializer.to_dict(user) for user in users]
+    return set_pagination_headers(list_response(result, fields, layout), next_cursor)
 
 # --- REVISED get_user FUNCTION ---
 @bp.route('/<int:id>', methods=['GET'])
@@ -79,12 +115,18 @@ def get_user(id):
     """
     Retrieves a single user by ID, correctly including their role name.
     """
-    user = User.query.get_or_404(id)
-    role_name = user.role.name if user.role else None
-    return jsonify({
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'role_id': user.role_id,
-        'roleName': role_name # Also include roleName here for consistency
-    })
\ No newline at end of file
+    try:
+        fields = user_serializer.parse_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    version = row_version(User, id)
+    if version is None:
+        return jsonify({'error': 'User not found.'}), 404
+    etag, last_modified = row_validators('user', id, *version, 'role')
+    if is_not_modified(etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    user = user_serializer.query(fields).filter(User.id == id).first()
+    if user is None:
+        return jsonify({'error': 'User not found.'}), 404
+    return set_validators(json_response(user_serializer.to_dict(user)), etag, last_modified)
@@ -0,0 +1,88 @@
+# app/routing.py
+"""
+Read-replica routing for the shared db session.
+
+Requests with a safe method (GET/HEAD: the list_*/get_* handlers, search,
+stats and sync) read from one of the replica binds named "replica_*",
+picked once per session, so all the statements of a request see the same
+replica. Writes and everything else go to the primary.
+
+After a request commits a write, its response carries the time of the
+write in the X-Last-Write header and a cookie of the same name. A client
+that sends either back reads from the primary until REPLICA_STICKY_SECONDS
+after that time, so it sees its own changes despite replication lag,
+whichever worker or host serves it. Browsers send the cookie by themselves
+only to the same origin; a cross-origin client such as
+task-tracker-frontend echoes the header (CORS exposes and allows it).
+The marker travels with the client; a forged one can only send that
+client's own reads to the primary.
+"""
+import random
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND_PREFIX = 'replica_'
+READ_ONLY_METHODS = ('GET', 'HEAD')
+LAST_WRITE_HEADER = 'X-Last-Write'
+LAST_WRITE_COOKIE = 'last_write'
+
+
+def _last_write():
+    """Unix time of the client's last write, from the header or the cookie; None if absent or malformed."""
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _reads_from_replica():
+    if not has_request_context() or request.method not in READ_ONLY_METHODS:
+        return False
+    last_write = _last_write()
+    # abs(): a time in the future (clock skew, or made up) doesn't pin the client for longer
+    return last_write is None or abs(time.time() - last_write) > current_app.config['REPLICA_STICKY_SECONDS']
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends read-only requests to a replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _reads_from_replica():
+            replica = self._replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica(self):
+        """The replica engine this session reads from (None without replicas); kept until the session is removed."""
+        if 'replica' not in self.info:
+            replicas = [engine for key, engine in self._db.engines.items()
+                        if key and key.startswith(REPLICA_BIND_PREFIX)]
+            self.info['replica'] = random.choice(replicas) if replicas else None
+        return self.info['replica']
+
+
+def mark_write_after_commit(session):
+    """after_commit hook: notes the write for send_last_write()."""
+    if has_request_context() and request.method not in READ_ONLY_METHODS:
+        g.last_write = time.time()
+
+
+def send_last_write(response):
+    """after_request hook: hands the time of the request's write to the client."""
+    last_write = g.pop('last_write', None)
+    if last_write is not None:
+        value = f'{last_write:.3f}'
+        response.headers[LAST_WRITE_HEADER] = value
+        response.set_cookie(LAST_WRITE_COOKIE, value, max_age=current_app.config['REPLICA_STICKY_SECONDS'],
+                            httponly=True, samesite='Lax')
+    return response
+
+
+def init_routing(app):
+    """Installs send_last_write when replica binds are configured."""
+    if any(key.startswith(REPLICA_BIND_PREFIX) for key in app.config.get('SQLALCHEMY_BINDS') or {}):
+        app.after_request(send_last_write)
@@ -0,0 +1,105 @@
+# app/search.py
+"""
+Full-text search over task and project descriptions.
+
+SQLite uses FTS5 external-content tables (task_fts, project_fts) kept in sync
+by triggers on the base tables. Postgres uses a generated tsvector column
+with a GIN index. Either way every write path stays in sync, including the
+bulk statements, with no Python hooks. The DDL below is attached to the
+tables so db.create_all() builds it as well; the migration builds it for
+existing databases.
+"""
+import re
+
+from sqlalchemy import DDL, event, text
+
+from app import db
+from app.models.project import Project
+from app.models.task import Task
+
+SQLITE_DDL = {
+    'task': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5(description, content='task', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS task_fts_ai AFTER INSERT ON task BEGIN "
+        "INSERT INTO task_fts(rowid, description) VALUES (new.id, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS task_fts_ad AFTER DELETE ON task BEGIN "
+        "INSERT INTO task_fts(task_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS task_fts_au AFTER UPDATE OF description ON task BEGIN "
+        "INSERT INTO task_fts(task_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+        "INSERT INTO task_fts(rowid, description) VALUES (new.id, new.description); END",
+    ],
+    'project': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS project_fts USING fts5(name, description, content='project', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS project_fts_ai AFTER INSERT ON project BEGIN "
+        "INSERT INTO project_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS project_fts_ad AFTER DELETE ON project BEGIN "
+        "INSERT INTO project_fts(project_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS project_fts_au AFTER UPDATE OF name, description ON project BEGIN "
+        "INSERT INTO project_fts(project_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+        "INSERT INTO project_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    ],
+}
+
+POSTGRES_DDL = {
+    'task': [
+        "ALTER TABLE task ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', coalesce(description, ''))) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_task_search_vector ON task USING GIN (search_vector)",
+    ],
+    'project': [
+        "ALTER TABLE project ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_project_search_vector ON project USING GIN (search_vector)",
+    ],
+}
+
+for _model in (Task, Project):
+    _name = _model.__tablename__
+    for _statement in SQLITE_DDL[_name]:
+        event.listen(_model.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+    event.listen(_model.__table__, 'before_drop', DDL(f'DROP TABLE IF EXISTS {_name}_fts').execute_if(dialect='sqlite'))
+    for _statement in POSTGRES_DDL[_name]:
+        event.listen(_model.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+
+SEARCH_MODELS = {'task': Task, 'project': Project}
+
+
+def parse_terms(raw):
+    """
+    Splits a user query into word tokens. Everything else is dropped, so the
+    FTS syntax can't be injected and a query can't fail to parse.
+    """
+    return re.findall(r'\w+', raw or '')[:20]
+
+
+def _sqlite_query(terms, types):
+    # Every term must match; the last one also matches as a prefix (search-as-you-type)
+    match = ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}" *'])
+    selects = [
+        f"SELECT '{name}' AS type, rowid AS id, -bm25({name}_fts) AS score FROM {name}_fts WHERE {name}_fts MATCH :match"
+        for name in types
+    ]
+    return ' UNION ALL '.join(selects), {'match': match}
+
+
+def _postgres_query(terms, types):
+    tsquery = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+    selects = [
+        f"SELECT '{name}' AS type, id, ts_rank(search_vector, to_tsquery('english', :tsquery)) AS score "
+        f"FROM {name} WHERE search_vector @@ to_tsquery('english', :tsquery)"
+        for name in types
+    ]
+    return ' UNION ALL '.join(selects), {'tsquery': tsquery}
+
+
+def search(terms, types, limit, offset=0):
+    """
+    Returns [(type, id, score)] for rows matching every term, best first.
+    Scores are "higher is better" on both backends.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        sql, params = _postgres_query(terms, types)
+    else:
+        sql, params = _sqlite_query(terms, types)
+    sql = f'SELECT type, id, score FROM ({sql}) AS hits ORDER BY score DESC, type, id LIMIT :limit OFFSET :offset'
+    return db.session.execute(text(sql), {**params, 'limit': limit, 'offset': offset}).all()
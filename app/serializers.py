@@ -0,0 +1,192 @@
+# app/serializers.py
+"""
+Column-projected serialization shared by the route modules.
+
+Read endpoints select only the columns they return, as plain row tuples, so
+large listings skip ORM entity hydration and the identity map. Clients can
+ask for a subset of fields with ?fields=a,b,c. Rows are encoded with orjson
+when it is installed and with a compact stdlib json encoder otherwise; list
+endpoints can also answer in MessagePack and in a columnar layout.
+"""
+import datetime
+import json
+import time
+
+from flask import Response, request
+from sqlalchemy import select
+
+from app import db
+from app.models.project import Project
+from app.models.role import Role
+from app.models.task import Task
+from app.models.user import User
+from app.metrics import record_timing
+from app.roles import get_role_cache
+
+try:
+    import orjson # Optional: noticeably faster encoding of large lists
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack # Optional: enables application/msgpack on the list endpoints
+except ImportError:
+    msgpack = None
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+LAYOUTS = ('rows', 'columnar')
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(payload):
+    """Encodes `payload` to a JSON string; dates become ISO-8601 strings."""
+    started = time.perf_counter()
+    if orjson is not None:
+        encoded = orjson.dumps(payload).decode('utf-8')
+    else:
+        encoded = json.dumps(payload, default=_json_default, separators=(',', ':'))
+    record_timing('serialize', time.perf_counter() - started)
+    return encoded
+
+
+def json_response(payload, status=200):
+    """Drop-in replacement for jsonify() that goes through dumps()."""
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+def _msgpack_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not MessagePack serializable')
+
+
+def parse_layout():
+    """
+    Reads ?layout=: `rows` (default) is a list of objects, `columnar` is one
+    array per field, {"id": [...], "status": [...]}, which drops the keys
+    repeated on every row. Raises ValueError on anything else.
+    """
+    layout = request.args.get('layout') or 'rows'
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout must be one of: {', '.join(LAYOUTS)}.")
+    return layout
+
+
+def list_response(rows, fields, layout='rows'):
+    """
+    Encodes the rows (dicts) of a list endpoint in `layout` and in the format
+    negotiated from the Accept header: MessagePack for application/msgpack
+    when msgpack is installed, JSON otherwise.
+    """
+    payload = {field: [row[field] for row in rows] for field in fields} if layout == 'columnar' else rows
+    available = ['application/json', MSGPACK_MIMETYPE] if msgpack is not None else ['application/json']
+    if request.accept_mimetypes.best_match(available, default='application/json') == MSGPACK_MIMETYPE:
+        started = time.perf_counter()
+        body = msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+        record_timing('serialize', time.perf_counter() - started)
+        response = Response(body, mimetype=MSGPACK_MIMETYPE)
+    else:
+        response = json_response(payload)
+    response.vary.add('Accept')
+    return response
+
+
+class Serializer:
+    """
+    Describes the public fields of one resource as {field name: column}.
+    `derived` adds fields computed in Python from another column, as
+    {field name: (source field, function)}. The user's roleName, for
+    example, is resolved from role_id through the in-memory role cache
+    instead of a join.
+    """
+
+    def __init__(self, columns, derived=None):
+        self.columns = columns
+        self.derived = derived or {}
+
+    @property
+    def fields(self):
+        return [*self.columns, *self.derived]
+
+    def parse_fields(self):
+        """
+        Reads ?fields= and returns the requested field names in order; all
+        fields when absent. `id` is always included because keyset pagination
+        needs it. Raises ValueError on unknown fields.
+        """
+        raw = request.args.get('fields')
+        if not raw:
+            return self.fields
+        fields = [field.strip() for field in raw.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in self.columns and field not in self.derived]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+        if 'id' not in fields:
+            fields.insert(0, 'id')
+        return fields
+
+    def _labelled_columns(self, fields):
+        columns = [self.columns[field].label(field) for field in fields if field in self.columns]
+        # A derived field selects its source column under a private "_<field>" label
+        for field in fields:
+            if field in self.derived:
+                source = self.derived[field][0]
+                columns.append(self.columns[source].label(f'_{field}'))
+        return columns
+
+    def query(self, fields=None):
+        """Returns a Query selecting just `fields` (default: all) as labelled columns."""
+        return db.session.query(*self._labelled_columns(fields or self.fields))
+
+    def select(self, fields=None):
+        """Same columns as query(), as a Core select() for the async engine."""
+        return select(*self._labelled_columns(fields or self.fields))
+
+    def to_dict(self, row):
+        data = row._asdict()
+        for field, (_, compute) in self.derived.items():
+            if f'_{field}' in data:
+                data[field] = compute(data.pop(f'_{field}'))
+        return data
+
+
+def _role_name(role_id):
+    return get_role_cache().name_for(role_id)
+
+
+task_serializer = Serializer({
+    'id': Task.id,
+    'description': Task.description,
+    'due_date': Task.due_date,
+    'status': Task.status,
+    'owner_id': Task.owner_id,
+    'project_id': Task.project_id,
+})
+
+project_serializer = Serializer({
+    'id': Project.id,
+    'name': Project.name,
+    'description': Project.description,
+    'start_date': Project.start_date,
+    'end_date': Project.end_date,
+    'owner_id': Project.owner_id,
+})
+
+user_serializer = Serializer({
+    'id': User.id,
+    'username': User.username,
+    'email': User.email,
+    'role_id': User.role_id,
+}, derived={
+    'roleName': ('role_id', _role_name), # The crucial field for the frontend filter
+})
+
+role_serializer = Serializer({
+    'id': Role.id,
+    'name': Role.name,
+})
@@ -0,0 +1,31 @@
+# app/streaming.py
+from flask import Response, current_app, request, stream_with_context
+
+from app.serializers import dumps
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_stream():
+    """
+    True if the client opted into streaming, either with ?stream=1 or by
+    preferring application/x-ndjson in its Accept header.
+    """
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def ndjson_response(query, serialize):
+    """
+    Streams every row of `query` as newline-delimited JSON.
+    Rows are pulled from a server-side cursor STREAM_BATCH_SIZE at a time, so
+    memory stays flat and the first line is sent before the query finishes.
+    """
+    batch_size = current_app.config.get('STREAM_BATCH_SIZE', 1000)
+
+    def generate():
+        for row in query.yield_per(batch_size):
+            yield dumps(serialize(row)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,74 @@
+# app/token_cache.py
+import hashlib
+import threading
+import time
+
+from cachetools import TLRUCache
+from flask import current_app
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of already-verified JWT payloads, keyed by a SHA-256
+    digest of the raw token so tokens themselves are never kept in memory.
+    An entry never outlives the token's own `exp` claim, nor `max_ttl` seconds.
+    cachetools caches are not thread-safe, so every access takes a lock.
+    """
+
+    def __init__(self, maxsize=10000, max_ttl=300):
+        self.max_ttl = max_ttl
+        self._lock = threading.Lock()
+        self._cache = TLRUCache(maxsize=maxsize, ttu=self._time_to_use, timer=time.time)
+        self.hits = 0
+        self.misses = 0
+
+    def _time_to_use(self, key, payload, now):
+        expires_at = now + self.max_ttl
+        exp = payload.get('exp')
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        return expires_at
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token):
+        key = self.digest(token)
+        with self._lock:
+            payload = self._cache.get(key)
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return payload
+
+    def put(self, token, payload):
+        with self._lock:
+            self._cache[self.digest(token)] = payload
+
+    def invalidate_user(self, user_id):
+        """Drops every cached token issued to `user_id`, so its next request re-reads the user's role."""
+        with self._lock:
+            stale = [key for key, payload in self._cache.items() if payload.get('app_user_id') == user_id]
+            for key in stale:
+                del self._cache[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._cache),
+                'maxsize': self._cache.maxsize,
+            }
+
+
+def get_token_cache():
+    """Returns the current app's VerifiedTokenCache (created in create_app)."""
+    return current_app.extensions['token_cache']
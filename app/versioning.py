@@ -0,0 +1,156 @@
+# app/versioning.py
+"""
+Per-resource version counters and conditional GET support.
+
+Every write to a task/project/user/role row bumps that row's `version` column
+(via the column's onupdate) and the resource's counter in `resource_version`
+(via the session hooks below, which also cover bulk INSERT/UPDATE/DELETE
+statements; one that only writes conditionally can pass
+execution_options(bump_versions=False) and call bump_versions() itself if
+it changed a row). GET endpoints turn those into ETag / Last-Modified headers and
+answer If-None-Match / If-Modified-Since with 304 before serialising rows.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request
+from sqlalchemy import event, insert, select, update
+
+from app import db
+from app.models.resource_version import ResourceVersion
+
+VERSIONED_TABLES = ('task', 'project', 'user', 'role')
+
+
+def bump_versions(connection, resources):
+    """Increments the counters of `resources` inside the caller's transaction."""
+    table = ResourceVersion.__table__
+    now = datetime.utcnow()
+    for resource in sorted(resources): # Fixed order avoids lock-order deadlocks
+        result = connection.execute(
+            update(table).where(table.c.resource == resource).values(version=table.c.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(resource=resource, version=1, updated_at=now))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_after_flush(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state at this point
+    resources = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, '__table__', None)
+        if table is not None and table.name in VERSIONED_TABLES:
+            resources.add(table.name)
+    if resources:
+        bump_versions(session.connection(), resources)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _bump_on_bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if orm_execute_state.execution_options.get('bump_versions', True) is False:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table.name in VERSIONED_TABLES:
+        bump_versions(orm_execute_state.session.connection(), {mapper.local_table.name})
+
+
+def _make_etag(parts):
+    # The URL (filters, fields, cursor) and Accept header select the representation
+    key = '|'.join([*parts, request.full_path, request.headers.get('Accept', '')])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _as_utc(value):
+    return value.replace(tzinfo=timezone.utc, microsecond=0) if value else None
+
+
+def resource_versions_select(resources):
+    return (
+        select(ResourceVersion.resource, ResourceVersion.version, ResourceVersion.updated_at)
+        .where(ResourceVersion.resource.in_(resources))
+    )
+
+
+def collection_validators(*resources, extra=None, rows=None):
+    """
+    Returns (etag, last_modified) for a listing built from `resources`.
+    `extra` is a callable whose result also feeds the ETag, for responses
+    that change without a write (e.g. anything relative to today's date).
+    `rows` are the results of resource_versions_select(resources) when the
+    caller has already fetched them (the async routes do).
+    """
+    if rows is None:
+        rows = db.session.execute(resource_versions_select(resources)).all()
+    versions = {row.resource: row for row in rows}
+    parts = [f'{resource}:{versions[resource].version if resource in versions else 0}' for resource in resources]
+    if extra is not None:
+        parts.append(str(extra()))
+    modified = [row.updated_at for row in rows if row.updated_at]
+    return _make_etag(parts), _as_utc(max(modified)) if modified else None
+
+
+def row_validators(resource, row_id, version, updated_at, *related_resources):
+    """
+    Returns (etag, last_modified) for one row. `related_resources` are
+    resources whose rows also feed the representation (e.g. role for a user).
+    """
+    etag, related_modified = collection_validators(*related_resources) if related_resources else ('', None)
+    last_modified = _as_utc(updated_at)
+    if related_modified and (last_modified is None or related_modified > last_modified):
+        last_modified = related_modified
+    return _make_etag([f'{resource}:{row_id}:{version}', etag]), last_modified
+
+
+def content_etag(body):
+    """ETag for a response whose body (str or bytes) is already built, e.g. from an in-memory cache."""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return _make_etag([hashlib.sha1(body).hexdigest()])
+
+
+def row_version(model, row_id):
+    """Returns (version, updated_at) of one row, or None if it does not exist."""
+    return db.session.query(model.version, model.updated_at).filter(model.id == row_id).first()
+
+
+def is_not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
+
+def not_modified_response(etag, last_modified):
+    return set_validators(make_response('', 304), etag, last_modified)
+
+
+def conditional(*resources, extra=None):
+    """
+    Decorator for list endpoints: answers 304 from the resource counters
+    alone, and stamps ETag / Last-Modified on 200 responses.
+    Apply it below role_required so authorisation still runs first.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = collection_validators(*resources, extra=extra)
+            if is_not_modified(etag, last_modified):
+                return not_modified_response(etag, last_modified)
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,291 @@
+# benchmarks/api_load.py
+"""
+Drives every REST endpoint with concurrent clients and reports, per
+endpoint, requests/s, p50/p95/p99 latency and SQL statements per request.
+
+The app runs in-process behind Werkzeug's threaded server (as run.py
+serves it), so statements can be attributed to the endpoint that issued
+them. Endpoints are driven one after another, reads first, then writes on
+rows created by the run itself. GET /events (a never-ending stream) and
+POST /auth/google (needs Google) are left out; see asgi_load for events.
+
+Results are written as JSON together with the git commit, and --baseline
+prints the change against an earlier results file:
+
+    python -m benchmarks.api_load --output before.json
+    (check out another commit)
+    python -m benchmarks.api_load --output after.json --baseline before.json
+
+Usage: python -m benchmarks.api_load [--db bench.db] [--users 1000]
+       [--projects 10000] [--tasks 100000] [--concurrency 16]
+       [--requests 300] [--only tasks.list,tasks.get] [--output FILE]
+       [--baseline FILE]
+"""
+import argparse
+import datetime
+import http.client
+import json
+import logging
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.seed import WORDS
+from benchmarks.tokens import mint_token
+
+HOST = '127.0.0.1'
+SECRET = 'benchmark-secret'
+
+
+class Context:
+    """Dataset sizes plus the rows created during the run, handed out to update/delete scenarios."""
+
+    def __init__(self, users, projects, tasks):
+        self.sizes = {'user': users, 'project': projects, 'task': tasks}
+        self._lock = threading.Lock()
+        self._created = {}
+        self._counter = 0
+
+    def created(self, resource, row_id):
+        with self._lock:
+            self._created.setdefault(resource, []).append(row_id)
+
+    def take(self, resource):
+        """Pops a row created by this run, or None when there is none left."""
+        with self._lock:
+            rows = self._created.get(resource)
+            return rows.pop() if rows else None
+
+    def peek(self, rng, resource):
+        with self._lock:
+            rows = self._created.get(resource)
+            return rng.choice(rows) if rows else None
+
+    def unique(self):
+        with self._lock:
+            self._counter += 1
+            return f'{os.getpid()}-{self._counter}'
+
+    def existing(self, rng, resource):
+        return rng.randrange(max(self.sizes[resource], 1)) + 1
+
+
+def _row_path(prefix, row_id):
+    return f'{prefix}{row_id}' if row_id is not None else None
+
+
+def _user_body(rng, ctx):
+    unique = ctx.unique()
+    return {'username': f'bench{unique}', 'email': f'bench{unique}@example.com', 'role_id': 3}
+
+
+def _task_body(rng, ctx):
+    return {'description': ' '.join(rng.choice(WORDS) for _ in range(4)), 'status': 'open',
+            'project_id': ctx.existing(rng, 'project'), 'due_date': datetime.date.today().isoformat()}
+
+
+# (name, method, path or path builder, body builder, resource created by the response)
+# Builders take (rng, ctx); a path builder returning None skips the request.
+SCENARIOS = [
+    ('index', 'GET', '/', None, None),
+    ('auth.me', 'GET', '/auth/me', None, None),
+    ('auth.token_cache', 'GET', '/auth/token-cache', None, None),
+    ('projects.list', 'GET', lambda rng, ctx: f"/projects/?limit=100&cursor={ctx.existing(rng, 'project')}", None, None),
+    ('projects.get', 'GET', lambda rng, ctx: f"/projects/{ctx.existing(rng, 'project')}", None, None),
+    ('projects.stats', 'GET', '/projects/stats', None, None),
+    ('projects.project_stats', 'GET', lambda rng, ctx: f"/projects/{ctx.existing(rng, 'project')}/stats", None, None),
+    ('tasks.list', 'GET', lambda rng, ctx: f"/tasks/?limit=100&cursor={ctx.existing(rng, 'task')}", None, None),
+    ('tasks.list_filtered', 'GET', lambda rng, ctx: f"/tasks/?project_id={ctx.existing(rng, 'project')}&status=open", None, None),
+    ('tasks.get', 'GET', lambda rng, ctx: f"/tasks/{ctx.existing(rng, 'task')}", None, None),
+    ('users.list', 'GET', lambda rng, ctx: f"/users/?limit=100&cursor={ctx.existing(rng, 'user')}", None, None),
+    ('users.get', 'GET', lambda rng, ctx: f"/users/{ctx.existing(rng, 'user')}", None, None),
+    ('roles.list', 'GET', '/roles/', None, None),
+    ('roles.get', 'GET', '/roles/1', None, None),
+    ('sync', 'GET', '/sync/?cursor=0&limit=100', None, None),
+    ('search', 'GET', lambda rng, ctx: f"/search/?q={rng.choice(WORDS)}+{rng.choice(WORDS)}&limit=20", None, None),
+    ('tasks.create', 'POST', '/tasks/', _task_body, 'task'),
+    ('tasks.bulk', 'POST', '/tasks/bulk',
+     lambda rng, ctx: {'operations': [{'op': 'create', 'data': _task_body(rng, ctx)} for _ in range(50)]}, None),
+    ('tasks.update', 'PUT', lambda rng, ctx: _row_path('/tasks/', ctx.peek(rng, 'task')),
+     lambda rng, ctx: {'status': rng.choice(['open', 'in progress', 'completed'])}, None),
+    ('tasks.delete', 'DELETE', lambda rng, ctx: _row_path('/tasks/', ctx.take('task')), None, None),
+    ('projects.create', 'POST', '/projects/',
+     lambda rng, ctx: {'name': f'Bench {ctx.unique()}', 'start_date': datetime.date.today().isoformat()}, 'project'),
+    ('projects.update', 'PUT', lambda rng, ctx: _row_path('/projects/', ctx.peek(rng, 'project')),
+     lambda rng, ctx: {'description': ' '.join(rng.choice(WORDS) for _ in range(6))}, None),
+    ('projects.delete', 'DELETE', lambda rng, ctx: _row_path('/projects/', ctx.take('project')), None, None),
+    ('users.create', 'POST', '/users/', _user_body, 'user'),
+    ('users.update', 'PUT', lambda rng, ctx: _row_path('/users/', ctx.peek(rng, 'user')),
+     lambda rng, ctx: {'role_id': rng.choice([2, 3])}, None),
+    ('users.delete', 'DELETE', lambda rng, ctx: _row_path('/users/', ctx.take('user')), None, None),
+    ('roles.create', 'POST', '/roles/', lambda rng, ctx: {'name': f'Bench {ctx.unique()}'}, 'role'),
+    ('roles.update', 'PUT', lambda rng, ctx: _row_path('/roles/', ctx.peek(rng, 'role')),
+     lambda rng, ctx: {'name': f'Bench {ctx.unique()}'}, None),
+    ('roles.delete', 'DELETE', lambda rng, ctx: _row_path('/roles/', ctx.take('role')), None, None),
+]
+
+
+class QueryCounter:
+    """Counts SQL statements per Flask endpoint on every engine of the app."""
+
+    def __init__(self, app, db):
+        from sqlalchemy import event
+        self._lock = threading.Lock()
+        self.counts = {}
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        from flask import has_request_context, request
+        if has_request_context():
+            with self._lock:
+                self.counts[request.endpoint] = self.counts.get(request.endpoint, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            total = sum(self.counts.values())
+            self.counts = {}
+        return total
+
+
+def _percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)] * 1000 if values else 0
+
+
+def _drive(port, token, scenario, ctx, requests, concurrency, seed):
+    name, method, path, body, creates = scenario
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one(index):
+        rng = random.Random(f'{seed}-{name}-{index}')
+        target = path(rng, ctx) if callable(path) else path
+        if target is None:
+            return
+        payload = json.dumps(body(rng, ctx)) if body else None
+        if not hasattr(local, 'connection'):
+            local.connection = http.client.HTTPConnection(HOST, port, timeout=60)
+        headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+        started = time.perf_counter()
+        try:
+            local.connection.request(method, target, body=payload, headers=headers)
+            response = local.connection.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            local.connection.close()
+            del local.connection
+            status = 'error'
+            data = b''
+        elapsed = time.perf_counter() - started
+        if creates and status == 201:
+            ctx.created(creates, json.loads(data)[f'{creates}_id'])
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if isinstance(status, int) and status < 400:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests)))
+    return time.perf_counter() - started, sorted(latencies), statuses
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_row(name, result, baseline=None):
+    line = (f"{name:<24} {result['rps']:9.1f} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} "
+            f"{result['p99_ms']:8.1f} {result['queries_per_request']:8.1f} {result['errors']:6d}")
+    if baseline:
+        def change(key):
+            return (result[key] - baseline[key]) / baseline[key] * 100 if baseline[key] else 0
+        line += f"   rps {change('rps'):+6.1f}%  p99 {change('p99_ms'):+6.1f}%  queries {result['queries_per_request'] - baseline['queries_per_request']:+.1f}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='SQLite file; seeded first if it does not exist (default: temporary)')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--projects', type=int, default=10000)
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=300, help='requests per endpoint')
+    parser.add_argument('--only', help='comma-separated endpoint names to run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='results JSON of an earlier run to compare against')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.abspath(args.db) if args.db else os.path.join(directory, 'bench.db')
+        needs_seed = not os.path.exists(path)
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+        os.environ['GOOGLE_CLIENT_SECRET'] = SECRET # create_app takes JWT_SECRET_KEY from it
+
+        from werkzeug.serving import make_server
+        from app import create_app, db
+        from benchmarks.seed import seed
+
+        app = create_app()
+        if needs_seed:
+            seed(app, args.users, args.projects, args.tasks, seed=args.seed)
+        counter = QueryCounter(app, db)
+        logging.getLogger('werkzeug').setLevel(logging.ERROR) # No per-request access log
+        server = make_server(HOST, 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        token = mint_token(SECRET, 1, 'Admin', role_id=1)
+        ctx = Context(args.users, args.projects, args.tasks)
+        selected = set(args.only.split(',')) if args.only else None
+        baseline = {}
+        if args.baseline:
+            with open(args.baseline) as handle:
+                baseline = json.load(handle)['endpoints']
+
+        print(f"{'endpoint':<24} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>6}")
+        results = {}
+        for scenario in SCENARIOS:
+            name = scenario[0]
+            if selected and name not in selected:
+                continue
+            counter.reset()
+            elapsed, latencies, statuses = _drive(server.port, token, scenario, ctx, args.requests, args.concurrency, args.seed)
+            completed = sum(statuses.values())
+            results[name] = {
+                'requests': completed,
+                'rps': completed / elapsed if elapsed else 0,
+                'p50_ms': _percentile(latencies, 0.50),
+                'p95_ms': _percentile(latencies, 0.95),
+                'p99_ms': _percentile(latencies, 0.99),
+                'queries_per_request': counter.reset() / completed if completed else 0,
+                'errors': completed - len(latencies),
+                'statuses': {str(status): count for status, count in statuses.items()},
+            }
+            _print_row(name, results[name], baseline.get(name))
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({
+                'commit': _git_commit(),
+                'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+                'endpoints': results,
+            }, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+# benchmarks/asgi_load.py
+"""
+Load test of the sync server (Werkzeug, threaded, as run.py serves the app)
+versus the ASGI mode (uvicorn asgi:application) on the same SQLite file.
+
+While `--streams` clients hold GET /events/ open, `--clients` concurrent
+clients page through GET /tasks/ for `--seconds`; the report gives
+requests/s, p50/p99 latency, how many event streams were accepted and
+the server's memory and thread count while they are open.
+
+Usage: python -m benchmarks.asgi_load [--clients 50] [--streams 200]
+       [--seconds 10] [--rows 20000]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.tokens import mint_token
+
+HOST = '127.0.0.1'
+SECRET = 'benchmark-secret'
+WARMUP_SECONDS = 2
+
+
+def _serve(mode, port):
+    from app import create_app
+    app = create_app()
+    if mode == 'sync':
+        from werkzeug.serving import make_server
+        make_server(HOST, port, app, threaded=True).serve_forever()
+    else:
+        import uvicorn
+        from app.asgi import create_asgi_app
+        uvicorn.run(create_asgi_app(app), host=HOST, port=port, log_level='warning')
+
+
+def _seed(rows):
+    from app import create_app
+    from benchmarks.seed import seed
+    seed(create_app(), users=1, projects=0, tasks=rows)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+async def _request(port, path, token):
+    """One GET over a fresh connection; returns the status code."""
+    reader, writer = await asyncio.open_connection(HOST, port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\nAuthorization: Bearer {token}\r\n'
+                     f'Connection: close\r\n\r\n'.encode('latin-1'))
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        await reader.read() # Body, until the server closes the connection
+        return status
+    finally:
+        writer.close()
+
+
+async def _hold_stream(port, token, opened, stop):
+    try:
+        reader, writer = await asyncio.open_connection(HOST, port)
+    except OSError:
+        return
+    try:
+        writer.write(f'GET /events/ HTTP/1.1\r\nHost: {HOST}\r\nAuthorization: Bearer {token}\r\n\r\n'.encode('latin-1'))
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), 10)
+        if status_line.split()[1] == b'200':
+            opened.append(1)
+        await stop.wait()
+    except (OSError, asyncio.TimeoutError, IndexError):
+        pass
+    finally:
+        writer.close()
+
+
+def _process_status(pid):
+    """Resident memory (MiB) and thread count of `pid`, from /proc (Linux only)."""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            fields = dict(line.split(':', 1) for line in status)
+    except OSError:
+        return None, None
+    return int(fields['VmRSS'].split()[0]) / 1024, int(fields['Threads'])
+
+
+async def _load(port, server_pid, clients, streams, seconds, rows):
+    token = mint_token(SECRET, 1, 'Admin')
+    stop = asyncio.Event()
+    opened = []
+    holders = [asyncio.ensure_future(_hold_stream(port, token, opened, stop)) for _ in range(streams)]
+    await asyncio.sleep(1) # Let the streams connect before measuring
+
+    latencies = []
+    errors = 0
+    # The first seconds only warm up the server's connection pool and are not measured
+    measure_from = time.monotonic() + WARMUP_SECONDS
+    deadline = measure_from + seconds
+
+    async def client(seed):
+        nonlocal errors
+        cursor = seed * 997 % rows
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                status = await _request(port, f'/tasks/?limit=100&cursor={cursor}', token)
+            except OSError:
+                status = None
+            if started < measure_from:
+                pass
+            elif status == 200:
+                latencies.append(time.monotonic() - started)
+            else:
+                errors += 1
+            cursor = (cursor + 100) % rows
+
+    await asyncio.gather(*[client(i) for i in range(clients)])
+    rss, threads = _process_status(server_pid) # Sampled while the streams are still open
+    stop.set()
+    await asyncio.gather(*holders)
+    latencies.sort()
+    return {
+        'rss': rss,
+        'threads': threads,
+        'rps': len(latencies) / seconds,
+        'p50': latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        'p99': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+        'errors': errors,
+        'streams': len(opened),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--streams', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--serve', choices=['sync', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        _serve(args.serve, args.port)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                   GOOGLE_CLIENT_SECRET=SECRET, EVENTS_KEEPALIVE_SECONDS='5')
+        os.environ.update(env)
+        _seed(args.rows)
+        for mode in ('sync', 'asgi'):
+            port = _free_port()
+            server = subprocess.Popen([sys.executable, '-m', 'benchmarks.asgi_load', '--serve', mode, '--port', str(port)],
+                                      env=env, stderr=subprocess.DEVNULL)
+            try:
+                _wait_for_port(port)
+                result = asyncio.run(_load(port, server.pid, args.clients, args.streams, args.seconds, args.rows))
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{mode:>5}: {result['rps']:8.1f} req/s  p50 {result['p50']:7.1f} ms  p99 {result['p99']:7.1f} ms  "
+                  f"{result['errors']:5d} errors  {result['streams']:5d}/{args.streams} streams open")
+            if result['rss'] is not None:
+                print(f"       server: {result['rss']:.0f} MiB resident, {result['threads']} threads")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/seed.py
+"""
+Fills a database with synthetic users, projects and tasks for the
+benchmarks. Rows are generated deterministically from --seed and inserted
+with batched Core INSERTs outside the ORM session, so the change-log and
+version hooks do not fire and millions of rows load in minutes. The FTS
+triggers still run, so search stays consistent with the data.
+
+The first user is an Admin; tokens minted for user 1 match a real row.
+
+Usage: python -m benchmarks.seed --db bench.db [--users 10000]
+       [--projects 100000] [--tasks 1000000]
+"""
+import argparse
+import datetime
+import os
+import random
+import time
+
+from sqlalchemy import insert
+
+WORDS = ('design', 'review', 'deploy', 'invoice', 'migrate', 'backup', 'report', 'release', 'audit',
+         'onboard', 'refactor', 'budget', 'client', 'roadmap', 'hiring', 'security', 'launch', 'support')
+STATUSES = ('open', 'in progress', 'completed')
+
+
+def _batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _phrase(rng, words=4):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(app, users, projects, tasks, batch_size=20000, seed=0):
+    """Creates the schema if needed and inserts the requested volumes; returns the row counts."""
+    from app import db
+    from app.models.project import Project
+    from app.models.task import Task
+    from app.models.user import User
+    from app.roles import get_role_cache
+
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    with app.app_context():
+        db.create_all()
+        roles = get_role_cache()
+        roles.load() # Seeds the default roles
+        role_ids = [roles.id_for('Admin'), roles.id_for('Task Creator'), roles.id_for('Read Only')]
+
+        user_rows = ({
+            'username': f'user{i}',
+            'email': f'user{i}@example.com',
+            'name': f'User {i}',
+            'role_id': role_ids[0] if i == 0 else rng.choice(role_ids),
+        } for i in range(users))
+        project_rows = ({
+            'name': f'Project {i}',
+            'description': _phrase(rng, 8),
+            'start_date': today - datetime.timedelta(days=rng.randrange(365)),
+            'end_date': today + datetime.timedelta(days=rng.randrange(365)),
+            'owner_id': rng.randrange(users) + 1 if users else None,
+        } for i in range(projects))
+        task_rows = ({
+            'description': _phrase(rng),
+            'due_date': today + datetime.timedelta(days=rng.randrange(-180, 180)),
+            'status': rng.choice(STATUSES),
+            'owner_id': rng.randrange(users) + 1 if users else None,
+            'project_id': rng.randrange(projects) + 1 if projects else None,
+        } for i in range(tasks))
+
+        for model, rows in ((User, user_rows), (Project, project_rows), (Task, task_rows)):
+            with db.engine.begin() as connection:
+                for batch in _batches(rows, batch_size):
+                    connection.execute(insert(model), batch)
+    return {'users': users, 'projects': projects, 'tasks': tasks}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True, help='SQLite file to create or extend')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--projects', type=int, default=100000)
+    parser.add_argument('--tasks', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(args.db)}'
+    from app import create_app
+    started = time.monotonic()
+    counts = seed(create_app(), args.users, args.projects, args.tasks, args.batch_size, args.seed)
+    print(f"seeded {counts['users']} users, {counts['projects']} projects, {counts['tasks']} tasks "
+          f"in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/sqlite_concurrency.py
+"""
+Concurrent read/write throughput of the SQLite database with the default
+connection settings versus the Config.SQLITE_PRAGMAS tuning profile.
+
+Reader threads page through the task table (the list_tasks query shape)
+while writer threads insert tasks in short transactions, as the API does.
+
+Usage: python -m benchmarks.sqlite_concurrency [--readers 8] [--writers 2]
+       [--seconds 5] [--rows 50000]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from app.config import Config
+from app.engine import sqlite_pragma_listener
+
+
+def _make_engine(path, pragmas):
+    engine = create_engine(f'sqlite:///{path}', pool_size=32, max_overflow=0)
+    if pragmas:
+        event.listen(engine, 'connect', sqlite_pragma_listener(pragmas))
+    return engine
+
+
+def _seed(engine, rows):
+    with engine.begin() as connection:
+        connection.execute(text(
+            'CREATE TABLE task (id INTEGER PRIMARY KEY, description TEXT NOT NULL, '
+            'due_date DATE, status VARCHAR(50), owner_id INTEGER, project_id INTEGER)'
+        ))
+        connection.execute(
+            text('INSERT INTO task (description, status, project_id) VALUES (:description, :status, :project_id)'),
+            [{'description': f'task {i}', 'status': 'open', 'project_id': i % 100} for i in range(rows)]
+        )
+
+
+def _run(engine, readers, writers, seconds, rows):
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def reader(seed):
+        done = errors = 0
+        cursor = seed * 997 % rows
+        while time.monotonic() < stop:
+            try:
+                with engine.connect() as connection:
+                    connection.execute(
+                        text('SELECT id, description, due_date, status, owner_id, project_id FROM task '
+                             'WHERE id > :cursor ORDER BY id LIMIT 100'),
+                        {'cursor': cursor}
+                    ).all()
+                done += 1
+            except OperationalError:
+                errors += 1
+            cursor = (cursor + 100) % rows
+        with lock:
+            counts['reads'] += done
+            counts['errors'] += errors
+
+    def writer():
+        done = errors = 0
+        while time.monotonic() < stop:
+            try:
+                with engine.begin() as connection:
+                    connection.execute(
+                        text('INSERT INTO task (description, status, project_id) VALUES (:d, :s, :p)'),
+                        {'d': 'new task', 's': 'open', 'p': 1}
+                    )
+                done += 1
+            except OperationalError:
+                errors += 1
+        with lock:
+            counts['writes'] += done
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {key: value / seconds if key != 'errors' else value for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    for label, pragmas in (('default', None), ('tuned', Config.SQLITE_PRAGMAS)):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = _make_engine(os.path.join(directory, 'bench.db'), pragmas)
+            _seed(engine, args.rows)
+            result = _run(engine, args.readers, args.writers, args.seconds, args.rows)
+            engine.dispose()
+        print(f"{label:>8}: {result['reads']:10.1f} reads/s {result['writes']:10.1f} writes/s "
+              f"{result['errors']:6d} lock errors")
+
+
+if __name__ == '__main__':
+    main()
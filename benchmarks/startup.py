@@ -0,0 +1,120 @@
+# benchmarks/startup.py
+"""
+Cold-start benchmark: how long a fresh process takes before it can answer.
+
+Each run starts a new interpreter that times, in order, `import app`,
+create_app() and the first authenticated request (GET /tasks/?limit=1
+through the test client, so it includes the first database connection and
+token check). The process wall time, from spawn to the first response,
+includes interpreter startup. Medians and minimums over --runs are
+reported, with the number of modules loaded.
+
+    python -m benchmarks.startup --output before.json
+    (check out another commit)
+    python -m benchmarks.startup --output after.json --baseline before.json
+
+Usage: python -m benchmarks.startup [--runs 15] [--output FILE] [--baseline FILE]
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SECRET = 'benchmark-secret'
+PHASES = ('import_ms', 'create_app_ms', 'first_request_ms', 'process_ms')
+
+
+def _measure():
+    """
+    Runs in the child process; prints one JSON line of timings. Nothing from
+    the app or its dependencies may be imported before `started`.
+    """
+    started = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    response = app.test_client().get('/tasks/?limit=1', headers={'Authorization': f"Bearer {os.environ['BENCH_TOKEN']}"})
+    answered = time.perf_counter()
+    if response.status_code != 200:
+        raise SystemExit(f'first request failed: {response.status_code} {response.get_data(as_text=True)}')
+    print(json.dumps({
+        'import_ms': (imported - started) * 1000,
+        'create_app_ms': (created - imported) * 1000,
+        'first_request_ms': (answered - created) * 1000,
+        'modules': len(sys.modules),
+    }))
+
+
+def _prepare():
+    from app import create_app
+    from benchmarks.seed import seed
+    seed(create_app(), users=1, projects=0, tasks=100)
+
+
+def _run_once(env):
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.startup', '--measure'],
+                            env=env, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='results JSON of an earlier run to compare against')
+    parser.add_argument('--measure', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        _measure()
+        return
+
+    from benchmarks.api_load import _git_commit
+    from benchmarks.tokens import mint_token
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                   GOOGLE_CLIENT_SECRET=SECRET, BENCH_TOKEN=mint_token(SECRET, 1, 'Admin'))
+        os.environ.update(env)
+        _prepare()
+        _run_once(env) # Warm the OS file cache and bytecode caches; not measured
+        runs = [_run_once(env) for _ in range(args.runs)]
+
+    results = {phase: {'median': statistics.median(run[phase] for run in runs),
+                       'min': min(run[phase] for run in runs)} for phase in PHASES}
+    results['modules'] = runs[-1]['modules']
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)['results']
+
+    print(f"{'phase':<18} {'median ms':>10} {'min ms':>10}")
+    for phase in PHASES:
+        line = f"{phase:<18} {results[phase]['median']:10.1f} {results[phase]['min']:10.1f}"
+        if phase in baseline:
+            before = baseline[phase]['median']
+            line += f"   {(results[phase]['median'] - before) / before * 100:+6.1f}%"
+        print(line)
+    print(f"{'modules loaded':<18} {results['modules']:10d}"
+          + (f"   {results['modules'] - baseline['modules']:+d}" if 'modules' in baseline else ''))
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({
+                'commit': _git_commit(),
+                'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'parameters': {'runs': args.runs},
+                'results': results,
+            }, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+# benchmarks/tokens.py
+import datetime
+
+import jwt
+
+
+def mint_token(secret, user_id, role_name, role_id=None, email=None, lifetime_seconds=3600):
+    """
+    Signs an app token with the same claims google_auth_handler issues, so
+    role_required accepts it without a Google sign-in. The user must exist:
+    role_required checks the user's current role, not the roleName claim.
+    """
+    payload = {
+        'app_user_id': user_id,
+        'email': email,
+        'roleId': role_id,
+        'roleName': role_name,
+        'exp': datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=lifetime_seconds),
+    }
+    return jwt.encode(payload, secret, algorithm='HS256')
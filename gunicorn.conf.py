@@ -0,0 +1,65 @@
+# gunicorn.conf.py
+"""
+Production settings for `gunicorn -c gunicorn.conf.py wsgi:app` (what
+`python serve.py` runs on Linux/macOS). Each value can be overridden from
+the environment.
+
+With preload_app the master imports create_app, the models and the
+blueprints once; workers are forked from it and share those pages
+copy-on-write instead of each importing the app again. Preloading also
+sets EAGER_INIT, so what create_app otherwise defers to first use is done
+once in the master too.
+
+Reloading:
+  kill -HUP <master pid>   new workers replace the old ones once their
+                           in-flight requests finish (graceful_timeout).
+                           Config is re-read, but preloaded code is not.
+  kill -USR2 <master pid>  starts a new master with the new code; then
+                           QUIT the old master for a zero-downtime deploy.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Threaded workers overlap DB and Google round-trips within a process.
+# Every open /events stream holds a thread; use the ASGI mode (asgi.py) for many streams.
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+keepalive = int(os.environ.get('WEB_KEEPALIVE_SECONDS', 5))
+timeout = int(os.environ.get('WEB_TIMEOUT_SECONDS', 30))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT_SECONDS', 30))
+# Recycle workers after this many requests (0 = never), with jitter so they don't all restart together
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 50))
+preload_app = os.environ.get('WEB_PRELOAD', 'true').lower() == 'true'
+if preload_app:
+    os.environ.setdefault('EAGER_INIT', 'true')
+accesslog = os.environ.get('WEB_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    if workers > 1 and os.environ.get('EVENTS_BACKEND', 'app.events.LocalBackend') == 'app.events.LocalBackend':
+        server.log.warning('EVENTS_BACKEND is the in-process LocalBackend: with %d workers each GET /events stream '
+                           'only sees the writes of its own worker. Set EVENTS_BACKEND=app.events.PostgresBackend '
+                           '(or WEB_CONCURRENCY=1).', workers)
+    if workers > 1 and os.environ.get('ROLE_INVALIDATION_CHANNEL', 'app.roles.LocalInvalidationChannel') == 'app.roles.LocalInvalidationChannel':
+        server.log.warning('ROLE_INVALIDATION_CHANNEL is the in-process LocalInvalidationChannel: with %d workers a role '
+                           'change reaches the other workers only after ROLE_CACHE_TTL_SECONDS. Set '
+                           'ROLE_INVALIDATION_CHANNEL=app.roles.PostgresInvalidationChannel (or WEB_CONCURRENCY=1).', workers)
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach, so GC
+    # passes in the workers don't write to (and un-share) the preloaded pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import db
+        from app.engine import dispose_inherited_connections
+        dispose_inherited_connections(server.app.wsgi(), db)
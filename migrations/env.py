@@ -97,6 +97,15 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        sqlite_foreign_keys = None
+        if connection.dialect.name == 'sqlite':
+            sqlite_foreign_keys = connection.exec_driver_sql('PRAGMA foreign_keys').scalar()
+            # Batch mode rebuilds tables by copying and dropping them; with
+            # foreign keys enforced, dropping a parent would run the ON DELETE
+            # rules of its children. The pragma can't change inside a transaction.
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
@@ -106,6 +115,10 @@ def run_migrations_online():
         with context.begin_transaction():
             context.run_migrations()
 
+        if sqlite_foreign_keys:
+            connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+            connection.commit()
+
 
 if context.is_offline_mode():
     run_migrations_offline()
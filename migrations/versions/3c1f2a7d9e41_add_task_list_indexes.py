@@ -0,0 +1,32 @@
+"""Add composite indexes for task listing
+
+Revision ID: 3c1f2a7d9e41
+Revises: ab608bd3eb26
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f2a7d9e41'
+down_revision = 'ab608bd3eb26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.create_index('ix_task_status_id', ['status', 'id'], unique=False)
+        batch_op.create_index('ix_task_owner_id_id', ['owner_id', 'id'], unique=False)
+        batch_op.create_index('ix_task_project_id_id', ['project_id', 'id'], unique=False)
+        batch_op.create_index('ix_task_due_date_id', ['due_date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_due_date_id')
+        batch_op.drop_index('ix_task_project_id_id')
+        batch_op.drop_index('ix_task_owner_id_id')
+        batch_op.drop_index('ix_task_status_id')
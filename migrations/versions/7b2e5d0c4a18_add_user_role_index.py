@@ -0,0 +1,26 @@
+"""Add user role index
+
+Revision ID: 7b2e5d0c4a18
+Revises: 3c1f2a7d9e41
+Create Date: 2026-10-18 10:03:27.561904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2e5d0c4a18'
+down_revision = '3c1f2a7d9e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index('ix_user_role_id_id', ['role_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_role_id_id')
@@ -0,0 +1,26 @@
+"""Add task index for project stats
+
+Revision ID: 9d4b7e2a1c05
+Revises: 52a9c0e7b3d6
+Create Date: 2026-10-18 13:55:18.402776
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4b7e2a1c05'
+down_revision = '52a9c0e7b3d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.create_index('ix_task_project_id_status_due_date', ['project_id', 'status', 'due_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_project_id_status_due_date')
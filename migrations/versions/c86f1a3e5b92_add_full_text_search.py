@@ -0,0 +1,71 @@
+"""Add full-text search indexes for tasks and projects
+
+Revision ID: c86f1a3e5b92
+Revises: 9d4b7e2a1c05
+Create Date: 2026-10-18 15:02:44.917350
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c86f1a3e5b92'
+down_revision = '9d4b7e2a1c05'
+branch_labels = None
+depends_on = None
+
+# Kept in step with app/search.py
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5(description, content='task', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_ai AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_ad AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_au AFTER UPDATE OF description ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+    "INSERT INTO task_fts(rowid, description) VALUES (new.id, new.description); END",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS project_fts USING fts5(name, description, content='project', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS project_fts_ai AFTER INSERT ON project BEGIN "
+    "INSERT INTO project_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS project_fts_ad AFTER DELETE ON project BEGIN "
+    "INSERT INTO project_fts(project_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS project_fts_au AFTER UPDATE OF name, description ON project BEGIN "
+    "INSERT INTO project_fts(project_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO project_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    # Index the rows that already exist
+    "INSERT INTO task_fts(task_fts) VALUES ('rebuild')",
+    "INSERT INTO project_fts(project_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_DDL = [
+    "ALTER TABLE task ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(description, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_task_search_vector ON task USING GIN (search_vector)",
+    "ALTER TABLE project ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_project_search_vector ON project USING GIN (search_vector)",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for name in ('task', 'project'):
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {name}_fts_{suffix}')
+            op.execute(f'DROP TABLE IF EXISTS {name}_fts')
+    elif dialect == 'postgresql':
+        for name in ('task', 'project'):
+            op.execute(f'DROP INDEX IF EXISTS ix_{name}_search_vector')
+            op.execute(f'ALTER TABLE {name} DROP COLUMN IF EXISTS search_vector')
@@ -0,0 +1,31 @@
+"""Add change_log.txid so /sync pages in commit order on Postgres
+
+Revision ID: d2b6f4a8c391
+Revises: a7d3c9e2f415
+Create Date: 2026-10-19 10:12:40.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b6f4a8c391'
+down_revision = 'a7d3c9e2f415'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('txid', sa.BigInteger(), nullable=True))
+        batch_op.create_index('ix_change_log_txid_id', ['txid', 'id'], unique=False)
+    if op.get_bind().dialect.name == 'postgresql':
+        # Entries written before this revision are all committed; they sort before any new one
+        op.execute('UPDATE change_log SET txid = 0 WHERE txid IS NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_change_log_txid_id')
+        batch_op.drop_column('txid')
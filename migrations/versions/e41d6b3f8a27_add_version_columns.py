@@ -0,0 +1,41 @@
+"""Add version columns and resource_version table
+
+Revision ID: e41d6b3f8a27
+Revises: 7b2e5d0c4a18
+Create Date: 2026-10-18 11:20:05.734512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41d6b3f8a27'
+down_revision = '7b2e5d0c4a18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    resource_version = op.create_table('resource_version',
+    sa.Column('resource', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('resource')
+    )
+    op.bulk_insert(resource_version, [
+        {'resource': resource, 'version': 1, 'updated_at': None}
+        for resource in ('task', 'project', 'user', 'role')
+    ])
+    for table in ('role', 'user', 'project', 'task'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    for table in ('task', 'project', 'user', 'role'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
+            batch_op.drop_column('version')
+    op.drop_table('resource_version')
@@ -0,0 +1,29 @@
+"""
+Production launcher: runs the app under gunicorn with gunicorn.conf.py on
+Linux/macOS, and under waitress on Windows, where gunicorn does not run.
+Both read the same BIND/PORT and WEB_THREADS settings from the environment.
+"""
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    if sys.platform == 'win32':
+        from waitress import serve
+        from wsgi import app
+        serve(
+            app,
+            listen=os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}"),
+            threads=int(os.environ.get('WEB_THREADS', 4)),
+            channel_timeout=int(os.environ.get('WEB_TIMEOUT_SECONDS', 30)),
+        )
+        return
+    # exec keeps this process as the gunicorn master, so signals (HUP, USR2) reach it directly
+    os.chdir(HERE)
+    os.execvp(sys.executable, [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', *sys.argv[1:], 'wsgi:app'])
+
+
+if __name__ == '__main__':
+    main()
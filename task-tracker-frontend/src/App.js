@@ -54,17 +54,27 @@ function AppContent() {
   }, [fetchProjects, fetchUsers, fetchTasks, fetchRoles]);
 
   // --- Utility Functions ---
+  // The API reads from a replica unless we send back the X-Last-Write marker of our latest write;
+  // its cookie doesn't reach a cross-origin API, so the header is echoed on every request instead.
   const getAuthHeaders = () => {
     const token = localStorage.getItem('app_token');
+    const lastWrite = localStorage.getItem('last_write');
     return {
       'Content-Type': 'application/json',
-      ...(token && { 'Authorization': `Bearer ${token}` })
+      ...(token && { 'Authorization': `Bearer ${token}` }),
+      ...(lastWrite && { 'X-Last-Write': lastWrite })
     };
   };
 
+  const rememberLastWrite = (response) => {
+    const lastWrite = response.headers.get('X-Last-Write');
+    if (lastWrite) localStorage.setItem('last_write', lastWrite);
+  };
+
   const handleLogout = () => {
     localStorage.removeItem('app_token');
     localStorage.removeItem('user_profile');
+    localStorage.removeItem('last_write');
     setIsLoggedIn(false);
     setUserProfile(null);
     navigate('/login');
@@ -105,7 +115,21 @@ function AppContent() {
         throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
       }
       
-      const data = await response.json();
+      let data = await response.json();
+
+      // Paginated list endpoints return the next page's cursor in a header; keep following it.
+      let nextCursor = response.headers.get('X-Next-Cursor');
+      while (nextCursor) {
+        const separator = endpoint.includes('?') ? '&' : '?';
+        const pageResponse = await fetch(`${API_BASE_URL}${endpoint}${separator}cursor=${nextCursor}`, {
+          headers: getAuthHeaders(),
+        });
+        if (!pageResponse.ok) {
+          throw new Error(`HTTP error! status: ${pageResponse.status}`);
+        }
+        data = data.concat(await pageResponse.json());
+        nextCursor = pageResponse.headers.get('X-Next-Cursor');
+      }
       setter(data);
     } catch (err) {
       // This will now only catch server errors or network failures, not permission errors.
@@ -123,6 +147,7 @@ function AppContent() {
         headers: getAuthHeaders(),
         body: JSON.stringify(itemData),
       });
+      rememberLastWrite(response);
       const data = await response.json();
       if (!response.ok) throw new Error(data.error || 'Failed to create item');
       localSetMessage(data.message || successMsg);
@@ -145,6 +170,7 @@ function AppContent() {
         headers: getAuthHeaders(),
         body: JSON.stringify(itemData),
       });
+      rememberLastWrite(response);
       const data = await response.json();
       if (!response.ok) throw new Error(data.error || 'Failed to update item');
       if (localSetMessage) localSetMessage(data.message || successMsg);
@@ -179,6 +205,7 @@ function AppContent() {
         method: 'DELETE',
         headers: getAuthHeaders(),
       });
+      rememberLastWrite(response);
       const data = await response.json();
       if (!response.ok) throw new Error(data.error || 'Failed to delete item');
       setGlobalMessage(data.message || successMsg);
@@ -0,0 +1,81 @@
+# tests/conftest.py
+import datetime
+import os
+
+# Config reads the environment when app.config is first imported
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['FLASK_SKIP_DOTENV'] = '1'
+os.environ['JOBS_MODE'] = 'external' # No worker threads on the shared in-memory connection
+os.environ.setdefault('GOOGLE_CLIENT_SECRET', 'test-secret')
+os.environ.setdefault('GOOGLE_CLIENT_ID', 'test-client-id')
+os.environ.pop('DATABASE_REPLICA_URLS', None)
+
+import jwt
+import pytest
+
+from app import create_app, db
+from app.config import Config
+from app.models.user import User
+from app.roles import get_role_cache
+from app.token_cache import get_token_cache
+
+
+@pytest.fixture
+def make_app(monkeypatch):
+    """Builds an app on a fresh in-memory database; keyword arguments override Config."""
+    apps = []
+
+    def make(**config):
+        for key, value in config.items():
+            monkeypatch.setattr(Config, key, value, raising=False)
+        app = create_app()
+        with app.app_context():
+            db.create_all(bind_key=None) # The models live on the primary; replica binds stay registered on db between apps
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_token(app, user_id, role, **claims):
+    payload = {
+        'app_user_id': user_id,
+        'roleName': role,
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1),
+        **claims,
+    }
+    return jwt.encode(payload, app.config['JWT_SECRET_KEY'], algorithm='HS256')
+
+
+@pytest.fixture
+def auth_headers(app):
+    """
+    Returns headers carrying an app token for user `user_id`, created (or
+    updated) with `role` first, as authenticate() checks the user's current role.
+    """
+    def headers(role='Admin', user_id=1):
+        with app.app_context():
+            role_id = get_role_cache().id_for(role)
+            user = db.session.get(User, user_id)
+            if user is None:
+                db.session.add(User(id=user_id, username=f'auth{user_id}', email=f'auth{user_id}@example.com', role_id=role_id))
+            else:
+                user.role_id = role_id
+            db.session.commit()
+            get_token_cache().invalidate_user(user_id)
+        return {'Authorization': f'Bearer {make_token(app, user_id, role, roleId=role_id)}'}
+    return headers
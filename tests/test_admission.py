@@ -0,0 +1,64 @@
+# tests/test_admission.py
+import pytest
+
+from app.admission import get_admission_store
+
+SLOW = {'rate': 0.001, 'burst': 2} # Two requests, then nothing for a long while
+
+
+@pytest.fixture
+def admission():
+    """Config overrides for the app; tests parametrize it."""
+    return {}
+
+
+@pytest.fixture
+def app(make_app, admission):
+    return make_app(ADMISSION_ENABLED=True, **{'ADMISSION_LIMITS': {}, **admission})
+
+
+def _statuses(client, method, url, count, **kwargs):
+    return [client.open(url, method=method, **kwargs).status_code for _ in range(count)]
+
+
+@pytest.mark.parametrize('admission', [{'ADMISSION_LIMITS': {'auth_bp.google_auth_handler': SLOW}}])
+def test_login_is_limited_by_address_whatever_it_carries(client):
+    statuses = _statuses(client, 'POST', '/auth/google?access_token=1', 3, json={},
+                         headers={'Authorization': 'Bearer forged'})
+    assert statuses == [400, 400, 429]
+
+
+@pytest.mark.parametrize('admission', [{'ADMISSION_LIMITS': {'task_routes.list_tasks': SLOW}}])
+def test_rejected_tokens_are_limited_by_address(client):
+    statuses = _statuses(client, 'GET', '/tasks/', 3, headers={'Authorization': 'Bearer forged'})
+    assert statuses == [401, 401, 429]
+    response = client.get('/tasks/', headers={'Authorization': 'Bearer forged'})
+    assert int(response.headers['Retry-After']) > 1
+
+
+@pytest.mark.parametrize('admission', [{'ADMISSION_LIMITS': {'task_routes.list_tasks': SLOW}}])
+def test_users_have_their_own_buckets(client, auth_headers):
+    first, second = auth_headers(user_id=1), auth_headers(user_id=2)
+    assert _statuses(client, 'GET', '/tasks/', 3, headers=first) == [200, 200, 429]
+    assert client.get('/tasks/', headers=second).status_code == 200
+
+
+@pytest.mark.parametrize('admission', [{'ADMISSION_USER_RATE': 0.001, 'ADMISSION_USER_BURST': 2}])
+def test_user_rate_applies_across_endpoints(client, auth_headers):
+    headers = auth_headers()
+    assert client.get('/tasks/', headers=headers).status_code == 200
+    assert client.get('/projects/', headers=headers).status_code == 200
+    assert client.get('/roles/', headers=headers).status_code == 429
+
+
+@pytest.mark.parametrize('admission', [{'ADMISSION_LIMITS': {'task_routes.list_tasks': {'concurrency': 1}}}])
+def test_concurrency_limit(app, client, auth_headers):
+    headers = auth_headers()
+    with app.app_context():
+        store = get_admission_store()
+    assert store.acquire('concurrency:task_routes.list_tasks', 1) # A request in progress
+    response = client.get('/tasks/', headers=headers)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    store.release('concurrency:task_routes.list_tasks')
+    assert _statuses(client, 'GET', '/tasks/', 2, headers=headers) == [200, 200] # Slots are released
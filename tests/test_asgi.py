@@ -0,0 +1,141 @@
+# tests/test_asgi.py
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.admission import get_admission_store
+from app.asgi import create_asgi_app
+from app.config import engine_options
+from app.metrics import get_metrics
+from app.routes import auth_routes
+
+
+@pytest.fixture
+def admission():
+    """Config overrides for the app; tests parametrize it."""
+    return {}
+
+
+@pytest.fixture
+def app(make_app, tmp_path, admission):
+    # A file database: the async engine opens its own connections
+    uri = f"sqlite:///{tmp_path / 'asgi.db'}"
+    return make_app(SQLALCHEMY_DATABASE_URI=uri, SQLALCHEMY_ENGINE_OPTIONS=engine_options(uri), **admission)
+
+
+async def _get(asgi_app, url, headers):
+    """Sends GET `url` through the ASGI app; returns (status, headers, body)."""
+    sent = []
+    finished = asyncio.Event()
+
+    async def receive():
+        await finished.wait() # The client stays connected until the body has been sent
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+        if message['type'] == 'http.response.body' and not message.get('more_body'):
+            finished.set()
+
+    path, _, query = url.partition('?')
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode('latin-1'), 'root_path': '',
+             'client': ('127.0.0.1', 50000), 'server': ('testserver', 80), 'scheme': 'http',
+             'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()]}
+    await asgi_app(scope, receive, send)
+    response_headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in sent[0]['headers']}
+    return sent[0]['status'], response_headers, b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def _run(app, scenario):
+    """Runs `scenario(asgi_app)` on a fresh event loop."""
+    asgi_app = create_asgi_app(app)
+
+    async def run():
+        try:
+            return await scenario(asgi_app)
+        finally:
+            await app.extensions['async_engine'].dispose()
+    return asyncio.run(run())
+
+
+def _requests(app, urls, headers):
+    """Sends GET `urls` one after another through the ASGI app; returns [(status, body)]."""
+    async def scenario(asgi_app):
+        return [(status, body) for status, _, body in [await _get(asgi_app, url, headers) for url in urls]]
+    return _run(app, scenario)
+
+
+def test_native_listing_answers_like_the_sync_route(app, client, auth_headers):
+    headers = auth_headers()
+    client.post('/tasks/', json={'description': 'first'}, headers=headers)
+    [(status, body)] = _requests(app, ['/tasks/'], headers)
+    assert status == 200
+    assert json.loads(body) == client.get('/tasks/', headers=headers).get_json()
+
+
+@pytest.mark.parametrize('admission', [{'ADMISSION_ENABLED': True, 'ADMISSION_LIMITS': {
+    'task_routes.list_tasks': {'concurrency': 1, 'rate': 0.001, 'burst': 2}}}])
+def test_native_routes_go_through_admission(app, auth_headers):
+    headers = auth_headers()
+    statuses = [status for status, _ in _requests(app, ['/tasks/'] * 3, headers)]
+    assert statuses == [200, 200, 429] # And each request released its concurrency slot
+
+    with app.app_context():
+        store = get_admission_store()
+    assert store.acquire('concurrency:task_routes.list_tasks', 1)
+    assert _requests(app, ['/tasks/'], auth_headers(user_id=2))[0][0] == 503
+
+
+@pytest.mark.parametrize('admission', [{'METRICS_ENABLED': True}])
+def test_native_routes_are_measured(app, auth_headers):
+    _requests(app, ['/tasks/'], auth_headers())
+    with app.app_context():
+        rendered = get_metrics().render()
+    assert 'http_requests_total{endpoint="task_routes.list_tasks",method="GET",status="200"} 1' in rendered
+    queries = [line for line in rendered.splitlines()
+               if line.startswith('db_queries_total{endpoint="task_routes.list_tasks"')]
+    assert queries and int(queries[0].split()[-1]) > 0
+
+
+def test_streamed_listing_has_the_validators(app, client, auth_headers):
+    headers = auth_headers()
+    client.post('/tasks/', json={'description': 'first'}, headers=headers)
+    sync = client.get('/tasks/?stream=1', headers=headers)
+
+    async def scenario(asgi_app):
+        streamed = await _get(asgi_app, '/tasks/?stream=1', headers)
+        revalidated = await _get(asgi_app, '/tasks/?stream=1', {**headers, 'If-None-Match': sync.headers['ETag']})
+        return streamed, revalidated
+    (status, streamed_headers, body), (revalidated_status, _, _) = _run(app, scenario)
+    assert status == 200 and body == sync.data
+    assert streamed_headers['etag'] == sync.headers['ETag']
+    assert streamed_headers['last-modified'] == sync.headers['Last-Modified']
+    assert revalidated_status == 304
+
+
+def test_authentication_does_not_block_the_event_loop(app, auth_headers, monkeypatch):
+    headers = auth_headers()
+    lookup = auth_routes._current_user_role
+
+    def slow_lookup(user_id):
+        time.sleep(0.3) # A slow database
+        return lookup(user_id)
+    monkeypatch.setattr(auth_routes, '_current_user_role', slow_lookup)
+
+    async def scenario(asgi_app):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        ticker = asyncio.ensure_future(tick())
+        status, _, _ = await _get(asgi_app, '/tasks/', headers)
+        ticker.cancel()
+        return status, ticks
+    status, ticks = _run(app, scenario)
+    assert status == 200
+    assert ticks >= 10 # The loop kept running while the token's user was looked up
@@ -0,0 +1,111 @@
+# tests/test_auth.py
+import datetime
+import warnings
+
+from conftest import make_token
+from sqlalchemy import func, select
+from sqlalchemy.exc import LegacyAPIWarning
+
+from app import db
+from app.models.change_log import ChangeLog
+from app.models.resource_version import ResourceVersion
+from app.models.user import User
+from app.roles import get_role_cache
+from app.routes.auth_routes import _upsert_google_user
+
+
+def test_missing_invalid_and_expired_tokens(app, client):
+    assert client.get('/auth/me').status_code == 401
+    assert client.get('/auth/me', headers={'Authorization': 'Bearer nope'}).status_code == 401
+    expired = make_token(app, 1, 'Admin', exp=datetime.datetime.utcnow() - datetime.timedelta(minutes=1))
+    response = client.get('/auth/me', headers={'Authorization': f'Bearer {expired}'})
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Token has expired.'
+
+
+def test_repeat_requests_hit_the_token_cache(client, auth_headers):
+    headers = auth_headers()
+    for _ in range(3):
+        assert client.get('/auth/me', headers=headers).status_code == 200
+    stats = client.get('/auth/token-cache', headers=headers).get_json()
+    assert stats['hits'] >= 3
+
+
+def test_me_reports_the_current_role(app, client, auth_headers):
+    headers = auth_headers('Task Creator', user_id=3)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', LegacyAPIWarning)
+        response = client.get('/auth/me', headers=headers)
+    assert response.status_code == 200
+    user = response.get_json()['user']
+    with app.app_context():
+        assert (user['id'], user['roleId'], user['roleName']) == (3, get_role_cache().id_for('Task Creator'), 'Task Creator')
+
+
+def test_role_claim_is_not_trusted(app, client, auth_headers):
+    auth_headers('Read Only', user_id=5)
+    forged = make_token(app, 5, 'Admin')
+    assert client.get('/auth/token-cache', headers={'Authorization': f'Bearer {forged}'}).status_code == 403
+
+
+def test_role_change_revokes_access_of_existing_tokens(app, client, auth_headers):
+    admin = auth_headers(user_id=1)
+    other = auth_headers(user_id=2)
+    assert client.get('/auth/token-cache', headers=other).status_code == 200
+    with app.app_context():
+        read_only = get_role_cache().id_for('Read Only')
+    assert client.put('/users/2', json={'role_id': read_only}, headers=admin).status_code == 200
+    assert client.get('/auth/token-cache', headers=other).status_code == 403
+    assert client.get('/auth/me', headers=other).status_code == 200
+
+
+def test_deleting_a_role_revokes_it(app, client, auth_headers):
+    admin = auth_headers(user_id=1)
+    creator = auth_headers('Task Creator', user_id=2)
+    assert client.post('/tasks/', json={'description': 'x'}, headers=creator).status_code == 201
+    with app.app_context():
+        creator_role = get_role_cache().id_for('Task Creator')
+    assert client.delete(f'/roles/{creator_role}', headers=admin).status_code == 200
+    assert client.post('/tasks/', json={'description': 'y'}, headers=creator).status_code == 403
+
+
+def test_deleted_user_is_rejected(client, auth_headers):
+    admin = auth_headers(user_id=1)
+    other = auth_headers(user_id=2)
+    assert client.get('/auth/me', headers=other).status_code == 200
+    assert client.delete('/users/2', headers=admin).status_code == 200
+    assert client.get('/auth/me', headers=other).status_code == 401
+
+
+def _user_writes():
+    """(change_log rows for users, the user resource version, the users' row versions)."""
+    return (db.session.scalar(select(func.count()).select_from(ChangeLog).where(ChangeLog.resource == 'user')),
+            db.session.scalar(select(ResourceVersion.version).where(ResourceVersion.resource == 'user')),
+            db.session.scalars(select(User.version).order_by(User.id)).all())
+
+
+def test_repeat_sign_ins_write_nothing(app):
+    with app.app_context():
+        first = _upsert_google_user('g-1', 'ann@example.com', 'Ann', 'pic-1')
+        assert get_role_cache().name_for(first.role_id) == 'Admin' # The very first user
+        before = _user_writes()
+        again = _upsert_google_user('g-1', 'ann@example.com', 'Ann', 'pic-1')
+        assert again.id == first.id
+        assert _upsert_google_user('g-1', 'ann@example.com', None, None).id == first.id # Missing claims keep the stored ones
+        assert _user_writes() == before
+
+        renamed = _upsert_google_user('g-1', 'ann@example.com', 'Ann B', 'pic-1')
+        assert renamed.name == 'Ann B'
+        logged, version, row_versions = _user_writes()
+        assert (logged, version, row_versions) == (before[0] + 1, before[1] + 1, [before[2][0] + 1])
+
+
+def test_sign_in_links_an_existing_email(app):
+    with app.app_context():
+        db.session.add(User(username='bob', email='bob@example.com', role_id=get_role_cache().id_for('Task Creator')))
+        db.session.commit()
+        user = _upsert_google_user('g-2', 'bob@example.com', 'Bob', None)
+        assert (user.id, user.google_id, user.name) == (1, 'g-2', 'Bob')
+        assert get_role_cache().name_for(user.role_id) == 'Task Creator'
+        second = _upsert_google_user('g-3', 'carol@example.com', 'Carol', None)
+        assert get_role_cache().name_for(second.role_id) == 'Read Only'
@@ -0,0 +1,158 @@
+# tests/test_bulk_tasks.py
+import pytest
+from sqlalchemy import event, func, select
+
+from app import db
+from app.config import engine_options
+from app.models.change_log import ChangeLog
+from app.models.project import Project
+from app.models.task import Task
+
+
+@pytest.fixture(params=['memory', 'file'])
+def app(request, make_app, tmp_path):
+    if request.param == 'memory':
+        return make_app()
+    uri = f"sqlite:///{tmp_path / 'bulk.db'}"
+    return make_app(SQLALCHEMY_DATABASE_URI=uri, SQLALCHEMY_ENGINE_OPTIONS=engine_options(uri))
+
+
+def _bulk(client, headers, operations):
+    response = client.post('/tasks/bulk', json={'operations': operations}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return [(result['status'], result.get('id')) for result in response.get_json()['results']], response.get_json()
+
+
+def _task_count(app):
+    with app.app_context():
+        return db.session.scalar(select(func.count()).select_from(Task))
+
+
+def test_creates_updates_and_deletes(app, client, auth_headers):
+    headers = auth_headers()
+    statuses, _ = _bulk(client, headers, [{'op': 'create', 'data': {'description': f't{i}'}} for i in range(3)])
+    assert statuses == [(201, 1), (201, 2), (201, 3)]
+    statuses, _ = _bulk(client, headers, [
+        {'op': 'update', 'id': 1, 'data': {'status': 'done', 'due_date': '2025-01-31'}},
+        {'op': 'delete', 'id': 2},
+        {'op': 'update', 'id': 99, 'data': {'status': 'done'}},
+    ])
+    assert statuses == [(200, 1), (200, 2), (404, 99)]
+    with app.app_context():
+        task = db.session.get(Task, 1)
+        assert (task.status, task.due_date.isoformat()) == ('done', '2025-01-31')
+    assert _task_count(app) == 2
+
+
+@pytest.mark.parametrize('operation, error', [
+    ({'op': 'update', 'id': 1, 'data': {'description': None}}, 'description must be a non-empty string.'),
+    ({'op': 'update', 'id': 1, 'data': {'description': '  '}}, 'description must be a non-empty string.'),
+    ({'op': 'create', 'data': {'description': 5}}, 'description must be a non-empty string.'),
+    ({'op': 'create', 'data': {'description': 'x', 'status': 5}}, 'status must be a string or null.'),
+    ({'op': 'create', 'data': {'description': 'x', 'status': 's' * 51}}, 'status must be at most 50 characters.'),
+    ({'op': 'create', 'data': {'description': 'x', 'owner_id': '1'}}, 'owner_id must be an integer or null.'),
+    ({'op': 'create', 'data': {'description': 'x', 'project_id': True}}, 'project_id must be an integer or null.'),
+    ({'op': 'create', 'data': {'description': 'x', 'due_date': '31/01/2025'}}, 'Invalid due_date format. Please use ISO-MM-DD or null.'),
+    ({'op': 'create', 'data': {}}, 'Missing required field: description'),
+    ({'op': 'update', 'id': '1', 'data': {'status': 'x'}}, 'update requires an integer id.'),
+    ({'op': 'upsert'}, "op must be one of 'create', 'update' or 'delete'."),
+])
+def test_invalid_operations_fail_alone(app, client, auth_headers, operation, error):
+    headers = auth_headers()
+    _bulk(client, headers, [{'op': 'create', 'data': {'description': 'existing'}}])
+    _, body = _bulk(client, headers, [operation, {'op': 'create', 'data': {'description': 'ok'}}])
+    assert body['results'][0] == {'index': 0, 'status': 400, 'error': error}
+    assert body['results'][1]['status'] == 201
+    assert _task_count(app) == 2
+
+
+def test_rows_the_database_rejects_fail_alone(app, client, auth_headers):
+    headers = auth_headers()
+    with app.app_context():
+        db.session.add(Project(id=1, name='p'))
+        db.session.commit()
+        changes_before = db.session.scalar(select(func.count()).select_from(ChangeLog))
+    statuses, body = _bulk(client, headers, [
+        {'op': 'create', 'data': {'description': 'a', 'project_id': 1}},
+        {'op': 'create', 'data': {'description': 'b', 'project_id': 999}}, # No such project
+        {'op': 'create', 'data': {'description': 'c'}},
+    ])
+    assert [status for status, _ in statuses] == [201, 409, 201]
+    assert 'INSERT' not in body['results'][1]['error']
+    statuses, _ = _bulk(client, headers, [
+        {'op': 'update', 'id': statuses[0][1], 'data': {'owner_id': 12345}}, # No such user
+        {'op': 'update', 'id': statuses[2][1], 'data': {'status': 'done'}},
+    ])
+    assert [status for status, _ in statuses] == [409, 200]
+    with app.app_context():
+        assert sorted(db.session.scalars(select(Task.description))) == ['a', 'c']
+        assert db.session.scalar(select(Task.owner_id).where(Task.description == 'a')) is None
+        # The change log only records the rows that were written
+        assert db.session.scalar(select(func.count()).select_from(ChangeLog)) == changes_before + 3
+
+
+def test_operations_on_an_id_deleted_earlier_in_the_request(app, client, auth_headers):
+    headers = auth_headers()
+    _bulk(client, headers, [{'op': 'create', 'data': {'description': f't{i}'}} for i in range(2)])
+    statuses, _ = _bulk(client, headers, [
+        {'op': 'update', 'id': 2, 'data': {'status': 'done'}},
+        {'op': 'delete', 'id': 1},
+        {'op': 'delete', 'id': 1},
+        {'op': 'update', 'id': 1, 'data': {'status': 'done'}},
+    ])
+    assert statuses == [(200, 2), (200, 1), (404, 1), (404, 1)]
+    assert _task_count(app) == 1
+
+
+def test_request_level_errors(client, auth_headers):
+    headers = auth_headers()
+    assert client.post('/tasks/bulk', json={'operations': {}}, headers=headers).status_code == 400
+    assert client.post('/tasks/bulk', json={'operations': []}, headers=auth_headers('Read Only', user_id=2)).status_code == 403
+
+
+def test_unexpected_failure_applies_nothing(app, client, auth_headers, monkeypatch):
+    from app.routes import task_routes
+    headers = auth_headers()
+    _bulk(client, headers, [{'op': 'create', 'data': {'description': 'existing'}}])
+    record_changes = task_routes.record_changes
+
+    def fail_on_delete(resource, ids, action, **kwargs):
+        if action == 'delete':
+            raise RuntimeError('boom')
+        return record_changes(resource, ids, action, **kwargs)
+
+    monkeypatch.setattr(task_routes, 'record_changes', fail_on_delete)
+    response = client.post('/tasks/bulk', headers=headers, json={'operations': [
+        {'op': 'create', 'data': {'description': 'new'}},
+        {'op': 'delete', 'id': 1},
+    ]})
+    assert response.status_code == 500
+    assert 'boom' not in response.get_data(as_text=True)
+    with app.app_context():
+        assert list(db.session.scalars(select(Task.description))) == ['existing']
+
+
+def test_creates_are_batched(app, client, auth_headers):
+    headers = auth_headers()
+    _bulk(client, headers, [{'op': 'create', 'data': {'description': 'existing'}}])
+    with app.app_context():
+        engine = db.engine
+    inserts = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO task '):
+            inserts.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        statuses, _ = _bulk(client, headers, [
+            {'op': 'create', 'data': {'description': f't{i}', **({'status': 'done'} if i % 2 else {})}}
+            for i in range(10)
+        ])
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert statuses == [(201, task_id) for task_id in range(2, 12)]
+    assert len(inserts) == 1
+    with app.app_context():
+        rows = db.session.execute(select(Task.id, Task.description, Task.status).where(Task.id > 1)).all()
+    assert rows == [(i + 2, f't{i}', 'done' if i % 2 else None) for i in range(10)]
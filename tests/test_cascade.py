@@ -0,0 +1,176 @@
+# tests/test_cascade.py
+import os
+
+import pytest
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.exc import IntegrityError
+
+from app import create_app, db
+from app.config import Config, engine_options
+from app.jobs import claim_next_job, run_job
+from app.models.change_log import ChangeLog
+from app.models.job import Job
+from app.models.project import Project
+from app.models.resource_version import ResourceVersion
+from app.models.task import Task
+from app.routes.task_routes import CONSTRAINT_ERROR
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    return make_app(JOBS_DIR=str(tmp_path), JOBS_CHUNK_SIZE=2)
+
+
+def _create(client, headers, url, body, key):
+    response = client.post(url, json=body, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()[key]
+
+
+def _state(app):
+    """Returns ({task id: (owner_id, project_id, version)}, {project id: owner_id}, job creators, resource versions, change log)."""
+    with app.app_context():
+        tasks = {row.id: (row.owner_id, row.project_id, row.version)
+                 for row in db.session.execute(select(Task.id, Task.owner_id, Task.project_id, Task.version))}
+        projects = dict(db.session.execute(select(Project.id, Project.owner_id)).all())
+        creators = db.session.scalars(select(Job.created_by)).all()
+        versions = dict(db.session.execute(select(ResourceVersion.resource, ResourceVersion.version)).all())
+        changes = db.session.execute(select(ChangeLog.resource, ChangeLog.resource_id, ChangeLog.action)
+                                     .order_by(ChangeLog.id)).all()
+        return tasks, projects, creators, versions, changes
+
+
+def _run_queued(app):
+    with app.app_context():
+        while (job_id := claim_next_job()) is not None:
+            run_job(job_id)
+        db.session.remove()
+
+
+def test_deleting_a_project_keeps_its_tasks(app, client, auth_headers):
+    headers = auth_headers()
+    project_id = _create(client, headers, '/projects/', {'name': 'p'}, 'project_id')
+    task_ids = [_create(client, headers, '/tasks/', {'description': d, 'project_id': project_id}, 'task_id')
+                for d in ('a', 'b')]
+    other = _create(client, headers, '/tasks/', {'description': 'c'}, 'task_id')
+    tasks, _, _, versions, changes = _state(app)
+
+    response = client.delete(f'/projects/{project_id}', headers=headers)
+    assert response.status_code == 200, response.get_json()
+
+    after, projects, _, versions_after, changes_after = _state(app)
+    assert projects == {}
+    for task_id in task_ids:
+        assert after[task_id][:2] == (None, None)
+        assert after[task_id][2] == tasks[task_id][2] + 1
+    assert after[other] == tasks[other]
+    assert versions_after['task'] > versions['task'] and versions_after['project'] > versions['project']
+    assert changes_after[len(changes):] == [('task', task_ids[0], 'upsert'), ('task', task_ids[1], 'upsert'),
+                                            ('project', project_id, 'delete')]
+
+
+def test_deleting_a_user_unassigns_what_they_own(app, client, auth_headers):
+    headers = auth_headers()
+    auth_headers(user_id=2) # The user to delete
+    project_id = _create(client, headers, '/projects/', {'name': 'p', 'owner_id': 2}, 'project_id')
+    task_id = _create(client, headers, '/tasks/', {'description': 'a', 'owner_id': 2, 'project_id': project_id}, 'task_id')
+    with app.app_context():
+        db.session.add(Job(kind='export', format='csv', created_by=2))
+        db.session.commit()
+    _, _, _, versions, changes = _state(app)
+
+    response = client.delete('/users/2', headers=headers)
+    assert response.status_code == 200, response.get_json()
+
+    tasks, projects, creators, versions_after, changes_after = _state(app)
+    assert tasks[task_id][:2] == (None, project_id)
+    assert projects == {project_id: None}
+    assert creators == [None]
+    for resource in ('task', 'project', 'user'):
+        assert versions_after[resource] > versions[resource]
+    assert changes_after[len(changes):] == [('task', task_id, 'upsert'), ('project', project_id, 'upsert'),
+                                            ('user', 2, 'delete')]
+
+
+def test_many_dependents_are_detached_by_a_job(app, client, auth_headers):
+    app.config['CASCADE_SYNC_MAX_ROWS'] = 3
+    headers = auth_headers()
+    project_id = _create(client, headers, '/projects/', {'name': 'p'}, 'project_id')
+    task_ids = [_create(client, headers, '/tasks/', {'description': str(i), 'project_id': project_id}, 'task_id')
+                for i in range(5)]
+    _, _, _, _, changes = _state(app)
+
+    response = client.delete(f'/projects/{project_id}', headers=headers)
+    assert response.status_code == 202
+    job_id = response.get_json()['job']['id']
+    _, projects, _, _, _ = _state(app)
+    assert projects == {project_id: None} # Nothing happens until the job runs
+
+    _run_queued(app)
+    assert client.get(f'/jobs/{job_id}', headers=headers).get_json()['status'] == 'completed'
+    tasks, projects, _, _, changes_after = _state(app)
+    assert projects == {}
+    assert all(tasks[task_id][:2] == (None, None) for task_id in task_ids)
+    assert changes_after[len(changes):] == [('task', task_id, 'upsert') for task_id in task_ids] + \
+        [('project', project_id, 'delete')]
+
+
+@pytest.mark.parametrize('body', [{'owner_id': 999}, {'project_id': 999}])
+def test_dangling_references_are_rejected_cleanly(client, auth_headers, body):
+    headers = auth_headers()
+    response = client.post('/tasks/', json={'description': 'a', **body}, headers=headers)
+    assert response.status_code == 409
+    assert response.get_json() == {'error': CONSTRAINT_ERROR}
+
+    task_id = _create(client, headers, '/tasks/', {'description': 'a'}, 'task_id')
+    response = client.put(f'/tasks/{task_id}', json=body, headers=headers)
+    assert response.status_code == 409
+    assert response.get_json() == {'error': CONSTRAINT_ERROR}
+
+
+def test_dangling_project_owner_is_rejected_cleanly(client, auth_headers):
+    headers = auth_headers()
+    response = client.post('/projects/', json={'name': 'p', 'owner_id': 999}, headers=headers)
+    assert response.status_code == 409
+    project_id = _create(client, headers, '/projects/', {'name': 'p'}, 'project_id')
+    response = client.put(f'/projects/{project_id}', json={'owner_id': 999}, headers=headers)
+    assert response.status_code == 409
+    assert response.get_json() == {'error': CONSTRAINT_ERROR}
+
+
+def test_on_delete_set_null_migration(monkeypatch, tmp_path):
+    from flask_migrate import Migrate, downgrade, upgrade
+
+    uri = f"sqlite:///{tmp_path / 'migrated.db'}"
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', uri)
+    monkeypatch.setattr(Config, 'SQLALCHEMY_ENGINE_OPTIONS', engine_options(uri))
+    app = create_app()
+    Migrate(app, db, directory=MIGRATIONS)
+    engine = create_engine(uri)
+    event.listen(engine, 'connect', lambda connection, _: connection.execute('PRAGMA foreign_keys=ON'))
+
+    def delete_owner():
+        with engine.begin() as connection:
+            connection.execute(text("INSERT INTO user (id, username, email) VALUES (7, 'u', 'u@example.com')"))
+            connection.execute(text("INSERT INTO project (id, name, owner_id) VALUES (7, 'p', 7)"))
+            connection.execute(text("INSERT INTO task (id, description, owner_id, project_id) VALUES (7, 'found me', 7, 7)"))
+        with engine.begin() as connection:
+            connection.execute(text('DELETE FROM user WHERE id = 7'))
+            connection.execute(text('DELETE FROM project WHERE id = 7'))
+            return connection.execute(text('SELECT owner_id, project_id FROM task WHERE id = 7')).one()
+
+    with app.app_context():
+        upgrade(revision='a7d3c9e2f415')
+        assert tuple(delete_owner()) == (None, None)
+        with engine.connect() as connection: # The rebuilt table kept its full-text triggers
+            assert connection.scalar(text("SELECT rowid FROM task_fts WHERE task_fts MATCH 'found'")) == 7
+            connection.execute(text('DELETE FROM task'))
+            connection.commit()
+
+        downgrade(revision='5f3e8a1b7c64')
+        with pytest.raises(IntegrityError):
+            delete_owner()
+        db.session.remove()
+    engine.dispose()
@@ -0,0 +1,45 @@
+# tests/test_compression.py
+import gzip
+
+import pytest
+from flask import jsonify
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(COMPRESS_MIN_BYTES=10)
+
+    @app.route('/strong')
+    def strong():
+        response = jsonify(['x' * 100])
+        response.set_etag('v1')
+        return response
+    return app
+
+
+def _create(client, headers, count):
+    for i in range(count):
+        assert client.post('/tasks/', json={'description': f'task {i}'}, headers=headers).status_code == 201
+
+
+def test_compressed_list_keeps_a_weak_etag(client, auth_headers):
+    headers = auth_headers()
+    _create(client, headers, 5)
+    plain = client.get('/tasks/', headers=headers)
+    compressed = client.get('/tasks/', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert compressed.headers['ETag'].startswith('W/')
+    assert compressed.headers['ETag'] == plain.headers['ETag']
+
+    # A client's cached copy validates whichever encoding it was sent in
+    revalidated = client.get('/tasks/', headers={**headers, 'Accept-Encoding': 'gzip',
+                                                 'If-None-Match': plain.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_compression_weakens_a_strong_etag(client):
+    assert client.get('/strong').headers['ETag'] == '"v1"'
+    compressed = client.get('/strong', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'] == 'W/"v1"'
@@ -0,0 +1,51 @@
+# tests/test_events.py
+import json
+
+import pytest
+
+from app import db
+from app.events import get_event_backend
+from app.models.task import Task
+
+
+def _drain(subscription):
+    messages = []
+    while (message := subscription.get(timeout=0)) is not None:
+        messages.append(json.loads(message))
+    return messages
+
+
+def test_committed_writes_are_published(app):
+    with app.app_context():
+        subscription = get_event_backend().subscribe()
+        db.session.add(Task(description='kept'))
+        db.session.commit()
+        db.session.add(Task(description='dropped'))
+        db.session.flush()
+        db.session.rollback()
+        subscription.close()
+    assert _drain(subscription) == [{'resource': 'task', 'id': 1, 'action': 'upsert', 'project_id': None}]
+
+
+def test_postgres_backend_needs_postgres(make_app):
+    with pytest.raises(RuntimeError, match='PostgreSQL'):
+        make_app(EVENTS_BACKEND='app.events.PostgresBackend')
+
+
+def test_a_rolled_back_savepoint_drops_only_its_events(app):
+    with app.app_context():
+        subscription = get_event_backend().subscribe()
+        db.session.add(Task(description='kept'))
+        db.session.flush()
+        try:
+            with db.session.begin_nested():
+                db.session.add(Task(description='dropped'))
+                db.session.flush()
+                raise ValueError()
+        except ValueError:
+            pass
+        with db.session.begin_nested():
+            db.session.add(Task(description='also kept'))
+        db.session.commit()
+        subscription.close()
+    assert [event['id'] for event in _drain(subscription)] == [1, 2] # SQLite reuses the rolled back id
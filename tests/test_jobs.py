@@ -0,0 +1,138 @@
+# tests/test_jobs.py
+import io
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app import db, jobs
+from app.jobs import claim_next_job, run_job
+from app.models.task import Task
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    return make_app(JOBS_DIR=str(tmp_path), JOBS_CHUNK_SIZE=2)
+
+
+def _import(client, headers, body, format):
+    response = client.post(f'/jobs/imports?format={format}', data=body, headers=headers)
+    assert response.status_code == 202, response.get_json()
+    return response.get_json()['job']['id']
+
+
+def _run_queued(app):
+    with app.app_context():
+        while (job_id := claim_next_job()) is not None:
+            run_job(job_id)
+        db.session.remove()
+
+
+def _descriptions(app):
+    with app.app_context():
+        return db.session.scalars(select(Task.description).order_by(Task.id)).all()
+
+
+def test_rejected_rows_fail_on_their_own(app, client, auth_headers):
+    headers = auth_headers()
+    lines = ['{"description": "a", "owner_id": 1}', '{"description": "b"}',
+             '{"description": "bad owner", "owner_id": 999}', '{not json', '', '{"description": "c"}']
+    job_id = _import(client, headers, '\n'.join(lines), 'ndjson')
+    _run_queued(app)
+
+    job = client.get(f'/jobs/{job_id}', headers=headers).get_json()
+    assert (job['status'], job['processed'], job['failed']) == ('completed', 5, 2)
+    report = client.get(f'/jobs/{job_id}/errors', headers=headers).get_json()
+    assert [error['row'] for error in report['errors']] == [3, 4]
+    assert report['errors'][1]['error'].startswith('Invalid JSON')
+    assert 'INSERT' not in json.dumps(report) and 'sqlite' not in json.dumps(report)
+    assert _descriptions(app) == ['a', 'b', 'c']
+
+
+def test_json_arrays_are_decoded_in_blocks(app, client, auth_headers, monkeypatch):
+    monkeypatch.setattr(jobs, 'JSON_READ_BYTES', 7) # Items, numbers and separators straddle blocks
+    headers = auth_headers()
+    rows = [{'description': f'task {i}', 'owner_id': 1, 'status': 'open'} for i in range(5)] + [{'description': 'x', 'owner_id': 12345}]
+    job_id = _import(client, headers, json.dumps(rows, indent=2), 'json')
+    _run_queued(app)
+    job = client.get(f'/jobs/{job_id}', headers=headers).get_json()
+    assert (job['status'], job['processed'], job['failed']) == ('completed', 6, 1)
+    assert _descriptions(app) == [f'task {i}' for i in range(5)]
+
+
+@pytest.mark.parametrize('body, error', [
+    ('{"description": "a"}', 'A JSON import must be an array of task objects.'),
+    ('[{"description": "a"}, {"description": "b"}, {"description": ', 'Row 3 is not valid JSON: Expecting value.'),
+    ('[{"description": "a"}, {"description": "b"} {"description": "c"}]', 'Expected "," or "]" after row 2 of the JSON array.'),
+])
+def test_malformed_json_documents(app, client, auth_headers, body, error):
+    headers = auth_headers()
+    job_id = _import(client, headers, body, 'json')
+    _run_queued(app)
+    report = client.get(f'/jobs/{job_id}/errors', headers=headers).get_json()
+    assert report['status'] == 'failed'
+    assert report['errors'] == [{'row': None, 'error': error}]
+
+
+def test_csv_import(app, client, auth_headers):
+    headers = auth_headers()
+    body = 'description,owner_id,status\nfirst,1,open\nsecond,,\nthird,abc,\n'
+    job_id = _import(client, headers, body, 'csv')
+    _run_queued(app)
+    report = client.get(f'/jobs/{job_id}/errors', headers=headers).get_json()
+    assert report['errors'] == [{'row': 3, 'error': 'owner_id must be an integer.'}]
+    assert _descriptions(app) == ['first', 'second']
+
+
+def test_a_job_is_claimed_once(app, client, auth_headers):
+    headers = auth_headers()
+    first = _import(client, headers, '{"description": "a"}', 'ndjson')
+    second = _import(client, headers, '{"description": "b"}', 'ndjson')
+    with app.app_context():
+        assert [claim_next_job(), claim_next_job(), claim_next_job()] == [first, second, None]
+
+
+def test_cancel_a_queued_job(app, client, auth_headers):
+    headers = auth_headers()
+    job_id = _import(client, headers, '{"description": "a"}', 'ndjson')
+    response = client.post(f'/jobs/{job_id}/cancel', headers=headers)
+    assert response.status_code == 202
+    assert response.get_json()['job']['status'] == 'cancelled'
+    assert client.post(f'/jobs/{job_id}/cancel', headers=headers).status_code == 409
+    _run_queued(app)
+    assert _descriptions(app) == []
+
+
+def test_cancel_a_running_import(app, client, auth_headers):
+    headers = auth_headers()
+    job_id = _import(client, headers, '\n'.join(f'{{"description": "{i}"}}' for i in range(6)), 'ndjson')
+    with app.app_context():
+        assert claim_next_job() == job_id
+        db.session.remove()
+    response = client.post(f'/jobs/{job_id}/cancel', headers=headers)
+    assert response.get_json()['message'] == 'Cancellation requested'
+    with app.app_context():
+        run_job(job_id)
+        db.session.remove()
+    job = client.get(f'/jobs/{job_id}', headers=headers).get_json()
+    assert (job['status'], job['processed']) == ('cancelled', 2)
+    assert _descriptions(app) == ['0', '1'] # The chunk committed before the cancellation was seen
+
+
+def test_export_download(app, client, auth_headers):
+    headers = auth_headers()
+    for description, status in (('open one', 'open'), ('done one', 'done'), ('open two', 'open')):
+        client.post('/tasks/', json={'description': description, 'status': status}, headers=headers)
+    response = client.post('/jobs/exports', json={'format': 'ndjson', 'filters': {'status': 'open'}}, headers=headers)
+    job_id = response.get_json()['job']['id']
+    assert client.get(f'/jobs/{job_id}/download', headers=headers).status_code == 409 # Not run yet
+    _run_queued(app)
+
+    job = client.get(f'/jobs/{job_id}', headers=headers).get_json()
+    assert (job['status'], job['total'], job['processed']) == ('completed', 2, 2)
+    download = client.get(job['download_url'], headers=headers)
+    assert download.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in io.BytesIO(download.data)]
+    assert [row['description'] for row in rows] == ['open one', 'open two']
+    # Other users' jobs are invisible to non-Admins
+    assert client.get(f'/jobs/{job_id}', headers=auth_headers(role='Read Only', user_id=2)).status_code == 404
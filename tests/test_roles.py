@@ -0,0 +1,133 @@
+# tests/test_roles.py
+import threading
+import time
+
+from sqlalchemy import event, select, update
+
+from app import db
+from app.config import engine_options
+from app.models.role import Role
+from app.roles import DEFAULT_ROLES, RoleCache, get_role_cache
+
+
+def test_load_seeds_default_roles(app):
+    with app.app_context():
+        assert [role['name'] for role in get_role_cache().all()] == list(DEFAULT_ROLES)
+        assert set(db.session.scalars(select(Role.name))) == set(DEFAULT_ROLES)
+
+
+def test_load_leaves_the_callers_session_alone(app):
+    with app.app_context():
+        db.session.add(Role(name='Pending'))
+        RoleCache().load()
+        db.session.rollback()
+        assert db.session.scalar(select(Role).where(Role.name == 'Pending')) is None
+
+
+def test_unknown_name_and_id(app):
+    with app.app_context():
+        roles = get_role_cache()
+        assert roles.id_for('Nope') is None
+        assert roles.name_for(999) is None
+        assert roles.name_for(None) is None
+
+
+def test_invalidate_reloads(app, client, auth_headers):
+    with app.app_context():
+        admin_id = get_role_cache().id_for('Admin')
+    response = client.put(f'/roles/{admin_id}', json={'name': 'Administrator'}, headers=auth_headers())
+    assert response.status_code == 200
+    with app.app_context():
+        assert get_role_cache().name_for(admin_id) == 'Administrator'
+        assert get_role_cache().id_for('Administrator') == admin_id
+        assert get_role_cache().id_for('Admin') is None # Seeding ran once, at the first load
+
+
+def test_changes_made_elsewhere_show_up_after_the_ttl(app):
+    with app.app_context():
+        roles = RoleCache(ttl_seconds=0.05)
+        admin_id = roles.id_for('Admin')
+        # Another worker renames the role; its invalidation never reaches this cache
+        db.session.execute(update(Role).where(Role.id == admin_id).values(name='Administrator'))
+        db.session.commit()
+        assert roles.name_for(admin_id) == 'Admin'
+        time.sleep(0.06)
+        assert roles.name_for(admin_id) == 'Administrator'
+
+
+def test_an_expired_table_is_reloaded_once(make_app, tmp_path):
+    uri = f"sqlite:///{tmp_path / 'roles.db'}"
+    app = make_app(SQLALCHEMY_DATABASE_URI=uri, SQLALCHEMY_ENGINE_OPTIONS=engine_options(uri))
+    with app.app_context():
+        roles = RoleCache(ttl_seconds=0.05)
+        roles.load()
+        engine = db.engine
+    loads = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM role' in statement:
+            loads.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    time.sleep(0.06)
+    start = threading.Barrier(8)
+
+    def read():
+        with app.app_context():
+            start.wait()
+            roles.id_for('Admin')
+
+    readers = [threading.Thread(target=read) for _ in range(8)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    event.remove(engine, 'before_cursor_execute', count)
+    assert len(loads) == 1
+
+
+def test_invalidate_drops_the_local_copy_before_the_channel_delivers(app):
+    class SilentChannel: # E.g. NOTIFY, which reaches this process a moment later
+        def subscribe(self, callback):
+            pass
+
+        def publish(self, message):
+            pass
+
+    with app.app_context():
+        roles = RoleCache(channel=SilentChannel())
+        admin_id = roles.id_for('Admin')
+        db.session.execute(update(Role).where(Role.id == admin_id).values(name='Administrator'))
+        db.session.commit()
+        roles.invalidate()
+        assert roles.name_for(admin_id) == 'Administrator'
+
+
+def test_lookups_survive_concurrent_invalidation(make_app, tmp_path):
+    uri = f"sqlite:///{tmp_path / 'roles.db'}"
+    app = make_app(SQLALCHEMY_DATABASE_URI=uri, SQLALCHEMY_ENGINE_OPTIONS=engine_options(uri))
+    roles = app.extensions['roles']
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    assert roles.id_for('Admin') is not None
+                    assert roles.name_for(roles.id_for('Read Only')) == 'Read Only'
+                    assert len(roles.all()) == len(DEFAULT_ROLES)
+                except Exception as e: # Collected, as failures in threads don't fail the test
+                    errors.append(e)
+                    return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    deadline = time.monotonic() + 0.5
+    while time.monotonic() < deadline:
+        roles.invalidate()
+    stop.set()
+    for reader in readers:
+        reader.join()
+    assert errors == []
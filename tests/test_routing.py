@@ -0,0 +1,97 @@
+# tests/test_routing.py
+import time
+
+import pytest
+from sqlalchemy import insert
+
+from app import db
+from app.config import engine_options
+from app.models.task import Task
+
+
+@pytest.fixture
+def replicated(make_app, tmp_path):
+    """Builds apps on one file primary and two file replicas; each database holds a task named after it."""
+    uri = f"sqlite:///{tmp_path / 'primary.db'}"
+    binds = {name: f"sqlite:///{tmp_path / name}.db" for name in ('replica_0', 'replica_1')}
+
+    def make():
+        app = make_app(SQLALCHEMY_DATABASE_URI=uri, SQLALCHEMY_ENGINE_OPTIONS=engine_options(uri),
+                       SQLALCHEMY_BINDS=binds)
+        with app.app_context():
+            for name, engine in [('primary', db.engine)] + [(key, db.engines[key]) for key in binds]:
+                db.metadata.create_all(engine)
+                with engine.begin() as connection:
+                    if not connection.scalar(Task.__table__.select().limit(1).exists().select()):
+                        connection.execute(insert(Task), {'id': 1, 'description': name})
+        return app
+    return make
+
+
+@pytest.fixture
+def app(replicated):
+    return replicated()
+
+
+def _task_source(client, headers, **kwargs):
+    return client.get('/tasks/1', headers=headers, **kwargs).get_json()['description']
+
+
+def test_a_request_reads_from_one_replica(app):
+    for _ in range(5):
+        with app.test_request_context('/tasks/', method='GET'):
+            engines = {db.session.get_bind() for _ in range(20)}
+            assert len(engines) == 1
+            assert engines.pop() in (db.engines['replica_0'], db.engines['replica_1'])
+            db.session.remove()
+
+
+def test_writes_send_the_client_to_the_primary(client, auth_headers):
+    headers = auth_headers()
+    assert _task_source(client, headers).startswith('replica_')
+
+    response = client.post('/tasks/', json={'description': 'new'}, headers=headers)
+    last_write = float(response.headers['X-Last-Write'])
+    assert abs(time.time() - last_write) < 5
+    assert client.get_cookie('last_write').value == response.headers['X-Last-Write']
+    assert _task_source(client, headers) == 'primary' # The cookie is sent back
+
+    client.delete_cookie('last_write')
+    assert _task_source(client, headers).startswith('replica_')
+
+
+def test_the_marker_works_on_any_worker(app, replicated, auth_headers):
+    writer, reader = app, replicated() # Two processes sharing the databases
+    headers = auth_headers()
+    response = writer.test_client().post('/tasks/', json={'description': 'new'}, headers=headers)
+    marker = {'X-Last-Write': response.headers['X-Last-Write']}
+    assert _task_source(reader.test_client(), {**headers, **marker}) == 'primary'
+
+
+@pytest.mark.parametrize('offset', [-60, 3600])
+def test_stale_or_future_markers_are_ignored(client, auth_headers, offset):
+    headers = {**auth_headers(), 'X-Last-Write': str(time.time() + offset)}
+    assert _task_source(client, headers).startswith('replica_')
+
+
+def test_reads_leave_no_marker(client, auth_headers):
+    response = client.get('/tasks/1', headers=auth_headers())
+    assert 'X-Last-Write' not in response.headers
+    assert client.get_cookie('last_write') is None
+
+
+def test_a_cross_origin_client_echoing_the_header_reads_its_writes(app, auth_headers):
+    """Drives the task-tracker-frontend's fetch(): another origin, no cookies, X-Last-Write kept and sent back."""
+    client = app.test_client(use_cookies=False)
+    origin = {'Origin': 'http://localhost:3000'}
+    headers = {**auth_headers(), **origin}
+
+    response = client.post('/tasks/', json={'description': 'new'}, headers=headers)
+    assert 'X-Last-Write' in response.headers['Access-Control-Expose-Headers']
+    marker = response.headers['X-Last-Write']
+    assert _task_source(client, headers).startswith('replica_') # Without the header the write's cookie is lost
+
+    preflight = client.options('/tasks/1', headers={**origin, 'Access-Control-Request-Method': 'GET',
+                                                    'Access-Control-Request-Headers': 'authorization,x-last-write'})
+    assert 'x-last-write' in preflight.headers['Access-Control-Allow-Headers'].lower()
+    assert _task_source(client, {**headers, 'X-Last-Write': marker}) == 'primary'
@@ -0,0 +1,85 @@
+# tests/test_serializers.py
+import datetime
+
+import pytest
+from sqlalchemy import event, insert
+
+from app import db, serializers
+from app.models.task import Task
+from app.models.user import User
+from app.roles import get_role_cache
+
+
+@pytest.fixture
+def tasks(app):
+    with app.app_context():
+        db.session.execute(insert(Task), [
+            {'description': 'first', 'status': 'open', 'due_date': datetime.date(2025, 1, 31)},
+            {'description': 'second', 'status': 'done'},
+        ])
+        db.session.commit()
+
+
+def _statements(app, client, url, headers):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    return response, [statement for statement in statements if 'FROM task' in statement]
+
+
+def test_all_fields_by_default(client, auth_headers, tasks):
+    rows = client.get('/tasks/', headers=auth_headers()).get_json()
+    assert rows[0] == {'id': 1, 'description': 'first', 'due_date': '2025-01-31', 'status': 'open',
+                       'owner_id': None, 'project_id': None}
+
+
+def test_fields_selects_only_those_columns(app, client, auth_headers, tasks):
+    headers = auth_headers()
+    response, statements = _statements(app, client, '/tasks/?fields=status', headers)
+    assert response.get_json() == [{'id': 1, 'status': 'open'}, {'id': 2, 'status': 'done'}]
+    assert statements and all('description' not in statement for statement in statements)
+    assert client.get('/tasks/1?fields=due_date', headers=headers).get_json() == {'id': 1, 'due_date': '2025-01-31'}
+
+
+def test_unknown_field_is_rejected(client, auth_headers, tasks):
+    response = client.get('/tasks/?fields=status,secret', headers=auth_headers())
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Unknown field(s): secret'}
+
+
+def test_derived_role_name_without_a_join(app, client, auth_headers):
+    headers = auth_headers()
+    with app.app_context():
+        db.session.add(User(username='reader', email='reader@example.com', role_id=get_role_cache().id_for('Read Only')))
+        db.session.commit()
+    response, _ = _statements(app, client, '/users/?fields=roleName', headers)
+    assert response.get_json() == [{'id': 1, 'roleName': 'Admin'}, {'id': 2, 'roleName': 'Read Only'}]
+
+
+def test_columnar_layout(client, auth_headers, tasks):
+    body = client.get('/tasks/?fields=status&layout=columnar', headers=auth_headers()).get_json()
+    assert body == {'id': [1, 2], 'status': ['open', 'done']}
+    assert client.get('/tasks/?layout=sideways', headers=auth_headers()).status_code == 400
+
+
+def test_msgpack_negotiation(client, auth_headers, tasks):
+    msgpack = pytest.importorskip('msgpack')
+    response = client.get('/tasks/?fields=due_date', headers={**auth_headers(), 'Accept': 'application/msgpack'})
+    assert response.mimetype == 'application/msgpack'
+    assert msgpack.unpackb(response.data) == [{'id': 1, 'due_date': '2025-01-31'}, {'id': 2, 'due_date': None}]
+    assert 'Accept' in response.headers['Vary']
+
+
+def test_stdlib_encoder_matches_orjson(monkeypatch):
+    payload = [{'id': 1, 'due_date': datetime.date(2025, 1, 31), 'at': datetime.datetime(2025, 1, 31, 12, 30)}]
+    monkeypatch.setattr(serializers, 'orjson', None)
+    assert serializers.dumps(payload) == '[{"id":1,"due_date":"2025-01-31","at":"2025-01-31T12:30:00"}]'
@@ -0,0 +1,59 @@
+# tests/test_sync.py
+import pytest
+
+from app.routes import sync_routes
+
+
+def _create(client, headers, description):
+    response = client.post('/tasks/', json={'description': description}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['task_id']
+
+
+def test_pages_with_the_cursor(client, auth_headers):
+    headers = auth_headers()
+    ids = [_create(client, headers, f'task {i}') for i in range(3)]
+
+    first = client.get('/sync/?resources=task&limit=2', headers=headers).get_json()
+    assert first['has_more'] is True
+    assert [row['id'] for row in first['changes']['task']['upserted']] == ids[:2]
+
+    second = client.get(f"/sync/?resources=task&limit=2&cursor={first['cursor']}", headers=headers).get_json()
+    assert second['has_more'] is False
+    assert [row['id'] for row in second['changes']['task']['upserted']] == ids[2:]
+
+    empty = client.get(f"/sync/?resources=task&cursor={second['cursor']}", headers=headers).get_json()
+    assert empty == {'cursor': second['cursor'], 'has_more': False, 'changes': {'task': {'upserted': [], 'deleted': []}}}
+
+
+def test_changes_collapse_to_the_latest_state(client, auth_headers):
+    headers = auth_headers()
+    kept, removed = _create(client, headers, 'kept'), _create(client, headers, 'removed')
+    client.put(f'/tasks/{kept}', json={'description': 'renamed'}, headers=headers)
+    client.delete(f'/tasks/{removed}', headers=headers)
+
+    changes = client.get('/sync/?resources=task', headers=headers).get_json()['changes']['task']
+    assert [row['description'] for row in changes['upserted']] == ['renamed']
+    assert changes['deleted'] == [removed]
+
+
+def test_resources_filter(client, auth_headers):
+    headers = auth_headers()
+    _create(client, headers, 'task')
+    body = client.get('/sync/?resources=project', headers=headers).get_json()
+    assert list(body['changes']) == ['project']
+    assert client.get('/sync/?resources=task,nope', headers=headers).status_code == 400
+
+
+@pytest.mark.parametrize('cursor', ['-1', 'abc', '1.2'])
+def test_invalid_cursor(client, auth_headers, cursor):
+    response = client.get(f'/sync/?cursor={cursor}', headers=auth_headers())
+    assert response.status_code == 400
+
+
+def test_postgres_cursor_carries_the_txid(app):
+    with app.test_request_context():
+        assert sync_routes._parse_cursor('0', True) == (0, 0)
+        assert sync_routes._parse_cursor('7301.42', True) == (7301, 42)
+        with pytest.raises(ValueError):
+            sync_routes._parse_cursor('7301.x', True)
@@ -0,0 +1,71 @@
+# tests/test_users.py
+from sqlalchemy import event, insert
+
+from app import db
+from app.models.user import User
+from app.roles import get_role_cache
+
+
+def _seed_users(app, count, start=0):
+    with app.app_context():
+        roles = get_role_cache()
+        role_ids = [roles.id_for(name) for name in ('Admin', 'Task Creator', 'Read Only')]
+        db.session.execute(insert(User), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'role_id': role_ids[i % 3]}
+            for i in range(start, start + count)
+        ])
+        db.session.commit()
+
+
+def _count_statements(app, client, url, headers):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert response.status_code == 200
+    return response, len(statements)
+
+
+def test_list_users_statement_count_does_not_grow_with_users(app, client, auth_headers):
+    headers = auth_headers()
+    _seed_users(app, 5)
+    client.get('/users/?limit=1000', headers=headers) # Loads the role registry
+    small, small_count = _count_statements(app, client, '/users/?limit=1000', headers)
+    _seed_users(app, 45, start=5)
+    large, large_count = _count_statements(app, client, '/users/?limit=1000', headers)
+
+    assert len(small.get_json()) == 6 # The seeded users and the caller
+    assert len(large.get_json()) == 51
+    assert small_count > 0
+    assert large_count == small_count
+    assert {user['roleName'] for user in large.get_json()} == {'Admin', 'Task Creator', 'Read Only'}
+
+
+def test_get_user_includes_role_name(app, client, auth_headers):
+    headers = auth_headers()
+    _seed_users(app, 2) # user0 is id 2, user1 id 3
+    response = client.get('/users/3', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['roleName'] == 'Task Creator'
+
+
+def test_list_users_role_filter(app, client, auth_headers):
+    headers = auth_headers()
+    _seed_users(app, 6)
+    with app.app_context():
+        db.session.add(User(username='norole', email='norole@example.com'))
+        db.session.commit()
+    admins = client.get('/users/?role=Admin', headers=headers).get_json()
+    assert [user['username'] for user in admins] == ['auth1', 'user0', 'user3']
+    # An unknown role matches nobody, not the users without a role
+    response = client.get('/users/?role=Nope', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json() == []
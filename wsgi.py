@@ -0,0 +1,5 @@
+from app import create_app
+
+# Entry point for production WSGI servers: `gunicorn -c gunicorn.conf.py wsgi:app`,
+# or `python serve.py`. run.py stays the development server.
+app = create_app()